@@ -0,0 +1,75 @@
+import random
+import time
+from types import SimpleNamespace
+
+from igraph import Graph
+
+from sym_cps.isomorphisms.index import IsomorphismIndex
+
+component_types = ["Battery", "BatteryController", "Motor", "Propeller", "Flange", "Tube", "Hub4", "Wing"]
+directions = ["Top", "Bottom", "Side1", "Side2"]
+
+
+def random_subgraph(n_nodes: int, rng: random.Random) -> Graph:
+    """Random tree of typed components, directed as the connections of DConcrete graphs"""
+    graph = Graph(directed=True)
+    graph.add_vertices(n_nodes)
+    graph.vs["c_type"] = [SimpleNamespace(id=rng.choice(component_types)) for _ in range(n_nodes)]
+    graph.vs["label"] = [c_type.id for c_type in graph.vs["c_type"]]
+    edges = [(rng.randrange(v), v) for v in range(1, n_nodes)]
+    graph.add_edges(edges)
+    graph.es["label"] = [rng.choice(directions) for _ in edges]
+    return graph
+
+
+def shuffled(graph: Graph, rng: random.Random) -> Graph:
+    """Isomorphic copy of the graph with the nodes in another order"""
+    permutation = list(range(graph.vcount()))
+    rng.shuffle(permutation)
+    return graph.permute_vertices(permutation)
+
+
+def random_decompositions(n_graphs: int, n_classes: int, n_nodes: int = 8, seed: int = 0) -> list[Graph]:
+    rng = random.Random(seed)
+    bases = [random_subgraph(n_nodes, rng) for _ in range(n_classes)]
+    return [shuffled(rng.choice(bases), rng) for _ in range(n_graphs)]
+
+
+def pairwise_classes(graphs: list[Graph]) -> list[Graph]:
+    """Representatives found as is_isomorphism_present did: all the mappings to every representative, in Python"""
+    node_compat = lambda g1, g2, n1, n2: g1.vs[n1]["c_type"].id == g2.vs[n2]["c_type"].id
+    edge_compat = lambda g1, g2, e1, e2: g1.es[e1]["label"] == g2.es[e2]["label"]
+    representatives: list[Graph] = []
+    for graph in graphs:
+        if not any(
+            len(r.get_isomorphisms_vf2(graph, node_compat_fn=node_compat, edge_compat_fn=edge_compat)) > 0
+            for r in representatives
+        ):
+            representatives.append(graph)
+    return representatives
+
+
+def benchmark_isomorphism_index(n_graphs: int = 1000, n_classes: int = 100, n_nodes: int = 8, seed: int = 0) -> dict:
+    graphs = random_decompositions(n_graphs, n_classes, n_nodes, seed)
+    start = time.perf_counter()
+    n_pairwise = len(pairwise_classes(graphs))
+    pairwise_time = time.perf_counter() - start
+    start = time.perf_counter()
+    index = IsomorphismIndex()
+    for graph in graphs:
+        index.add(graph)
+    index_time = time.perf_counter() - start
+    return {
+        "graphs": n_graphs,
+        "pairwise_classes": n_pairwise,
+        "index_classes": len(index),
+        "index_vf2_checks": index.n_vf2,
+        "pairwise_time": pairwise_time,
+        "index_time": index_time,
+        "speedup": pairwise_time / index_time,
+    }
+
+
+if __name__ == "__main__":
+    for k, v in benchmark_isomorphism_index().items():
+        print(f"{k}: {v}")
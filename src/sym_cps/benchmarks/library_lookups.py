@@ -0,0 +1,45 @@
+import time
+
+from sym_cps.representation.library import JsonIndex
+
+
+def _random_designs(n_designs: int, seed: int) -> list:
+    import random
+
+    from sym_cps.grammar.rules import generate_random_topology
+    from sym_cps.representation.design.abstract import AbstractDesign
+
+    random.seed(seed)
+    designs = []
+    for i in range(n_designs):
+        abstract_design = AbstractDesign(f"benchmark_{i}")
+        abstract_design.parse_grid(generate_random_topology())
+        designs.append(abstract_design)
+    return designs
+
+
+def benchmark_to_concrete(n_designs: int = 20, seed: int = 0) -> dict:
+    """Time of 'to_concrete' on random grammar designs, parsing the library json files at every lookup (as before)
+    and with the cached indexes"""
+    designs = _random_designs(n_designs, seed)
+    n_components = sum(len(d.grid) for d in designs)
+    times = {}
+    for enabled in [False, True]:
+        JsonIndex.enabled = enabled
+        start = time.perf_counter()
+        for design in designs:
+            design.to_concrete()
+        times[enabled] = time.perf_counter() - start
+    JsonIndex.enabled = True
+    return {
+        "n_designs": n_designs,
+        "n_abstract_components": n_components,
+        "to_concrete_uncached_s": times[False],
+        "to_concrete_cached_s": times[True],
+        "speedup": times[False] / times[True],
+    }
+
+
+if __name__ == "__main__":
+    for k, v in benchmark_to_concrete().items():
+        print(f"{k}: {v}")
@@ -0,0 +1,128 @@
+import random
+import time
+
+from sym_cps.benchmarks.refinement_batch import motor_system, random_motors
+from sym_cps.contract.tool.component_interface import ComponentInterface
+from sym_cps.contract.tool.contract_instance import ContractInstance
+from sym_cps.contract.tool.contract_system import ContractSystem
+from sym_cps.contract.tool.contract_template import ContractTemplate
+from sym_cps.contract.tool.solver.milp_interface import MilpInterface
+from sym_cps.contract.tool.solver.z3_interface import Z3Interface
+
+
+def random_candidates(n_candidates: int, seed: int) -> tuple[list[dict], list[dict]]:
+    rng = random.Random(seed)
+    propellers = [
+        {"name": f"prop_{i}", "thrust_max": rng.uniform(5, 60), "W_prop": rng.uniform(0.01, 0.3)}
+        for i in range(n_candidates)
+    ]
+    batteries = [
+        {"name": f"batt_{i}", "capacity": rng.uniform(0.5, 10), "W_batt": rng.uniform(0.1, 2.0)}
+        for i in range(n_candidates)
+    ]
+    return propellers, batteries
+
+
+def linear_selection_system(solver_interface, propellers, batteries, num_motor: int = 4, body_weight: float = 1.0):
+    """One-hot choice of a propeller and a battery with linear weight and thrust sums"""
+    propeller = ContractTemplate(
+        name="Propeller",
+        port_list=[ComponentInterface("thrust", "real"), ComponentInterface("W", "real")],
+        property_list=[ComponentInterface("thrust_max", "real"), ComponentInterface("W_prop", "real")],
+        assumption=lambda vs: [],
+        guarantee=lambda vs: [vs["thrust"] <= vs["thrust_max"] * num_motor, vs["W"] == vs["W_prop"] * num_motor],
+    )
+    battery = ContractTemplate(
+        name="Battery",
+        port_list=[ComponentInterface("capacity_out", "real"), ComponentInterface("W", "real")],
+        property_list=[ComponentInterface("capacity", "real"), ComponentInterface("W_batt", "real")],
+        assumption=lambda vs: [],
+        guarantee=lambda vs: [vs["capacity_out"] == vs["capacity"], vs["W"] == vs["W_batt"]],
+    )
+    system = ContractTemplate(
+        name="System",
+        port_list=[
+            ComponentInterface("thrust_sum", "real"),
+            ComponentInterface("weight_sum", "real"),
+            ComponentInterface("W_prop", "real"),
+            ComponentInterface("W_batt", "real"),
+            ComponentInterface("capacity", "real"),
+        ],
+        property_list=[],
+        assumption=lambda vs: [vs["weight_sum"] == (vs["W_prop"] + vs["W_batt"] + body_weight) * 9.81],
+        guarantee=lambda vs: [vs["thrust_sum"] >= 1.5 * vs["weight_sum"], vs["capacity"] >= 4],
+    )
+    contract_system = ContractSystem(verbose=False, solver_interface=solver_interface)
+    prop_inst = ContractInstance(template=propeller, instance_name="Propeller")
+    batt_inst = ContractInstance(template=battery, instance_name="Battery")
+    contract_system.add_instance(prop_inst)
+    contract_system.add_instance(batt_inst)
+    contract_system.set_selection(prop_inst, candidate_list=propellers)
+    contract_system.set_selection(batt_inst, candidate_list=batteries)
+    sys_inst = ContractInstance(template=system, instance_name="System")
+    connection = {
+        "Propeller": [("thrust_sum", "thrust"), ("W_prop", "W")],
+        "Battery": [("W_batt", "W"), ("capacity", "capacity_out")],
+    }
+    return contract_system, sys_inst, connection
+
+
+def margin(propeller: dict, battery: dict, num_motor: int = 4, body_weight: float = 1.0) -> float:
+    """Largest thrust_sum - weight_sum of the system of 'linear_selection_system' with the given components"""
+    return (
+        num_motor * propeller["thrust_max"] - (num_motor * propeller["W_prop"] + battery["W_batt"] + body_weight) * 9.81
+    )
+
+
+def select(solver_interface, propellers, batteries, max_iter: int = 10, times: dict | None = None):
+    """Selection maximizing the margin of thrust over weight, and its margin.
+    'times' gets the seconds to build the system ("build_s") and to select the components ("select_s")"""
+    start = time.perf_counter()
+    contract_system, sys_inst, connection = linear_selection_system(solver_interface, propellers, batteries)
+    contract_system.set_objective(
+        expr=lambda vs: [vs["thrust_sum"] - vs["weight_sum"]],
+        value=0,
+        evaluate_fn=lambda: contract_system.get_metric_inst(sys_inst, "thrust_sum")
+        - contract_system.get_metric_inst(sys_inst, "weight_sum"),
+    )
+    built = time.perf_counter()
+    selection = contract_system.select(sys_inst, connection, max_iter=max_iter, timeout_milliseconds=100000)
+    if times is not None:
+        times["build_s"] = built - start
+        times["select_s"] = time.perf_counter() - built
+    if selection is None:
+        return None, None
+    """The model of the last check is not kept if it was UNSAT, the margin is computed from the components"""
+    components = {inst.instance_name: cand for inst, cand in selection.items()}
+    return {name: cand["name"] for name, cand in components.items()}, margin(
+        components["Propeller"], components["Battery"]
+    )
+
+
+def benchmark_milp_backend(n_candidates: int = 100, max_iter: int = 10, seed: int = 0) -> dict:
+    """Time and margin of a linear selection with the z3 and the MILP solver interfaces, with at most max_iter checks,
+    and time of the incremental refinement checks of a nonlinear catalog, where the MILP interface falls back to z3"""
+    propellers, batteries = random_candidates(n_candidates, seed)
+    ret = {"n_candidates": n_candidates}
+    for name, solver_interface in [("z3", Z3Interface()), ("milp", MilpInterface())]:
+        times = {}
+        _, objective = select(solver_interface, propellers, batteries, max_iter=max_iter, times=times)
+        for k, v in times.items():
+            ret[f"{name}_{k}"] = v
+        ret[f"{name}_objective"] = objective
+    ret["optimum"] = max(margin(p, b) for p in propellers for b in batteries if b["capacity"] >= 4)
+    ret["select_speedup"] = ret["z3_select_s"] / ret["milp_select_s"]
+
+    motors = random_motors(n_candidates, seed)
+    for name, solver_interface in [("z3", Z3Interface()), ("milp", MilpInterface())]:
+        start = time.perf_counter()
+        contract_system, sys_inst, connection = motor_system(solver_interface=solver_interface)
+        contract_system.set_incremental(sys_inst, connection, swap_inst=contract_system.get_instance("Motor"))
+        ret[f"nonlinear_{name}_refining"] = sum(contract_system.check_candidate(motor) for motor in motors)
+        ret[f"nonlinear_{name}_s"] = time.perf_counter() - start
+    return ret
+
+
+if __name__ == "__main__":
+    for k, v in benchmark_milp_backend().items():
+        print(f"{k}: {v}")
@@ -0,0 +1,74 @@
+"""Benchmark of the vectorized PerfTable queries against the reference loop implementation"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+
+from sym_cps.representation.library.elements.perf_table import PerfTable
+
+
+def write_synthetic_table(file_path: Path, rpms: list[int], vs: list[float]) -> Path:
+    """Writes a propeller table in the APC format parsed by PerfTable.parse_from_file"""
+    lines = []
+    for rpm in rpms:
+        lines.append(f"         PROP RPM =   {rpm}")
+        lines.append("V J Pe Ct Cp PWR Torque Thrust")
+        lines.append("(mph) (Adv_Ratio) - - - (Hp) (In-Lbf) (Lbf)")
+        for v in vs:
+            j = v / rpm * 100
+            ct = 0.1 - 0.05 * j + 1e-7 * rpm
+            cp = 0.05 - 0.02 * j + 2e-7 * rpm
+            lines.append(f"{v:.2f} {j:.4f} {0.5:.4f} {ct:.4f} {cp:.4f} {1.0:.3f} {2.0:.3f} {3.0:.3f}")
+        lines.append("")
+    file_path.write_text("\n".join(lines))
+    return file_path
+
+
+def benchmark_perf_table(table: PerfTable, n_queries: int = 100_000, label: str = "Cp", seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    rpm_min, rpm_max = table.rpm_range
+    v_min, v_max = table.v_range
+    rpms = rng.uniform(rpm_min, rpm_max, n_queries)
+    vs = rng.uniform(v_min, v_max, n_queries)
+
+    start = time.perf_counter()
+    reference = [table._get_value_reference(rpm=rpm, v=v, label=label) for rpm, v in zip(rpms, vs)]
+    time_reference = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = table.get_values(rpms, vs, label)
+    time_vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        table._get_range_reference(rpm_min, rpm_max, v_min, v_max, label)
+    time_range_reference = (time.perf_counter() - start) / 1000
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        table.get_range(rpm_min, rpm_max, v_min, v_max, label)
+    time_range = (time.perf_counter() - start) / 1000
+
+    return {
+        "n_queries": n_queries,
+        "max_abs_difference": float(np.nanmax(np.abs(np.array(reference) - vectorized))),
+        "get_value_loop_s": time_reference,
+        "get_values_s": time_vectorized,
+        "speedup": time_reference / time_vectorized,
+        "get_range_reference_s": time_range_reference,
+        "get_range_s": time_range,
+    }
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as folder:
+        table_path = write_synthetic_table(
+            Path(folder) / "synthetic.dat", rpms=list(range(1000, 30001, 1000)), vs=list(np.linspace(0, 120, 30))
+        )
+        perf_table = PerfTable()
+        perf_table.parse_from_file(table_path)
+    for k, v in benchmark_perf_table(perf_table).items():
+        print(f"{k}: {v}")
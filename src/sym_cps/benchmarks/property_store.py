@@ -0,0 +1,42 @@
+import time
+
+
+def benchmark_property_interface(n_repeats: int = 10, use_rpm_v_range: bool = True) -> dict:
+    """Time of the aggregated property dictionaries of every propeller, motor and battery of the library,
+    walking the LibraryComponent properties and the PerfTables (as before) and reading the rows of the PropertyStore"""
+    from sym_cps.contract.property_store import PropertyStore
+    from sym_cps.contract.tester.uav_contract import UAVContract
+    from sym_cps.representation.tools.parsers.parsing_prop_table import parsing_prop_table
+    from sym_cps.shared.library import c_library
+
+    table_dict = parsing_prop_table(c_library)
+    start = time.perf_counter()
+    store = PropertyStore(c_library=c_library, table_dict=table_dict)
+    build_time = time.perf_counter() - start
+
+    components = [c for comp_type in ["Propeller", "Motor", "Battery"] for c in c_library.components_in_type[comp_type]]
+    components = [c for c in components if c.comp_type.id != "Propeller" or c in table_dict]
+    times = {}
+    for name, property_store in [("dicts", None), ("store", store)]:
+        contract = UAVContract(table_dict=table_dict, num_motor=4, num_battery=1, property_store=property_store)
+        contract.set_rpm(rpm=5000)
+        contract.set_rpm_upper(rpm=18000)
+        contract.set_speed(v=1)
+        contract.set_speed_upper(v=25)
+        start = time.perf_counter()
+        for _ in range(n_repeats):
+            for component in components:
+                contract.hackathon_property_interface_fn_aggregated(component, use_rpm_v_range=use_rpm_v_range)
+        times[name] = time.perf_counter() - start
+    return {
+        "n_lookups": n_repeats * len(components),
+        "store_build_s": build_time,
+        "dicts_s": times["dicts"],
+        "store_s": times["store"],
+        "speedup": times["dicts"] / times["store"],
+    }
+
+
+if __name__ == "__main__":
+    for k, v in benchmark_property_interface().items():
+        print(f"{k}: {v}")
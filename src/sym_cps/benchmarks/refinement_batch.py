@@ -0,0 +1,84 @@
+import random
+import time
+
+from sym_cps.contract.tool.component_interface import ComponentInterface
+from sym_cps.contract.tool.contract_instance import ContractInstance
+from sym_cps.contract.tool.contract_system import ContractSystem
+from sym_cps.contract.tool.contract_template import ContractTemplate
+from sym_cps.contract.tool.solver.solver_interface import SolverInterface
+
+
+def random_motors(n_candidates: int, seed: int) -> list[dict]:
+    """Motors with a fixed gain and a range of mass, as the aggregated properties of the selector"""
+    rng = random.Random(seed)
+    motors = []
+    for i in range(n_candidates):
+        mass = rng.uniform(0.1, 2.0)
+        motors.append({"name": f"motor_{i}", "gain": rng.uniform(0.2, 3.0), "mass": (mass, mass * 1.2)})
+    return motors
+
+
+def motor_system(
+    properties: dict | None = None, solver_interface: SolverInterface | None = None
+) -> tuple[ContractSystem, ContractInstance, dict]:
+    """Motor with a nonlinear thrust, refining the system if it gives 20 of thrust at 4 V"""
+    motor = ContractTemplate(
+        name="Motor",
+        port_list=[ComponentInterface("V", "real"), ComponentInterface("thrust", "real")],
+        property_list=[ComponentInterface("gain", "real"), ComponentInterface("mass", "real")],
+        assumption=lambda vs: [vs["V"] >= 0, vs["V"] <= 10],
+        guarantee=lambda vs: [vs["thrust"] == vs["gain"] * vs["V"] * vs["V"] - vs["mass"]],
+    )
+    system = ContractTemplate(
+        name="System",
+        port_list=[ComponentInterface("V_sys", "real"), ComponentInterface("thrust_sum", "real")],
+        property_list=[],
+        assumption=lambda vs: [vs["V_sys"] == 4],
+        guarantee=lambda vs: [vs["thrust_sum"] >= 20],
+    )
+    contract_system = ContractSystem(verbose=False, solver_interface=solver_interface)
+    contract_system.add_instance(
+        ContractInstance(template=motor, instance_name="Motor", component_properties=properties)
+    )
+    sys_inst = ContractInstance(template=system, instance_name="System")
+    return contract_system, sys_inst, {"Motor": [("V_sys", "V"), ("thrust_sum", "thrust")]}
+
+
+def benchmark_refinement_batch(n_candidates: int = 200, seed: int = 0) -> dict:
+    """Time to find the refining motors of a catalog with a system per motor, with one incremental system swapping the
+    motor and with a single check_refinement_all"""
+    motors = random_motors(n_candidates, seed)
+    ret = {"n_candidates": n_candidates}
+
+    start = time.perf_counter()
+    rebuilt = []
+    for motor in motors:
+        contract_system, sys_inst, connection = motor_system(motor)
+        if contract_system.check_refinement(sys_inst, connection):
+            rebuilt.append(motor["name"])
+    ret["rebuilt_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    contract_system, sys_inst, connection = motor_system()
+    contract_system.set_incremental(sys_inst, connection, swap_inst=contract_system.get_instance("Motor"))
+    incremental = [motor["name"] for motor in motors if contract_system.check_candidate(motor)]
+    ret["incremental_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    contract_system, sys_inst, connection = motor_system()
+    refining, counterexamples = contract_system.check_refinement_all(
+        sys_inst, connection, contract_system.get_instance("Motor"), motors
+    )
+    ret["batch_s"] = time.perf_counter() - start
+
+    ret["n_refining"] = len(refining)
+    ret["n_counterexamples"] = len(counterexamples)
+    ret["same_result"] = rebuilt == incremental == [motor["name"] for motor in refining]
+    ret["speedup_vs_rebuilt"] = ret["rebuilt_s"] / ret["batch_s"]
+    ret["speedup_vs_incremental"] = ret["incremental_s"] / ret["batch_s"]
+    return ret
+
+
+if __name__ == "__main__":
+    for k, v in benchmark_refinement_batch().items():
+        print(f"{k}: {v}")
@@ -0,0 +1,70 @@
+import json
+import random
+import time
+from pathlib import Path
+
+from sym_cps.grammar.rules import compile_rules, generate_random_topology, get_matching_rules, symbol_groups
+
+
+def example_rule_dict() -> dict:
+    """Rules in the format of grammar_rules.json, using symbol groups and boundaries"""
+    rules = [
+        ({"S": ["UNOCCUPIED"], "LS": ["BODY", "CONNECTOR"]}, {"S": "CONNECTOR", "EDGES": ["LS"]}),
+        ({"S": ["UNOCCUPIED"], "LS": ["CONNECTOR"], "RS": ["BOUNDARY", "FREE"]}, {"S": "ROTOR", "EDGES": ["LS"]}),
+        ({"S": ["UNOCCUPIED"], "B": ["CONNECTOR"], "T": ["WING-TOP"]}, {"S": "WING", "EDGES": ["B"]}),
+        ({"S": ["UNOCCUPIED"], "R": ["ANYTHING"]}, {"S": "CONNECTOR", "EDGES": ["R"]}),
+        ({"S": ["UNOCCUPIED"], "F": ["CONNECTOR", "FUSELAGE"]}, {"S": "ROTOR", "EDGES": ["F"]}),
+        ({"S": ["UNOCCUPIED"]}, {"S": "EMPTY"}),
+        ({"S": ["UNOCCUPIED"], "T": ["BODY"], "B": ["BOUNDARY"]}, {"S": "CONNECTOR", "EDGES": ["T"]}),
+        ({"S": ["UNOCCUPIED"], "LS": ["NON-WING"], "RS": ["BOUNDARY"]}, {"S": "WING", "EDGES": ["LS"]}),
+        ({"S": ["UNOCCUPIED"], "RS": ["CONNECTOR"], "F": ["FREE", "BOUNDARY"]}, {"S": "HUB", "EDGES": ["RS", "F"]}),
+        ({"S": ["UNOCCUPIED"], "LS": ["HUB"], "T": ["FREE"]}, {"S": "TUBE", "EDGES": ["LS", "T"]}),
+        ({"S": ["UNOCCUPIED"], "LS": ["BODY"]}, {"S": "ROTOR", "EDGES": ["LS"]}),
+    ]
+    return {
+        f"r{i}": {"name": f"rule_{i}", "conditions": conditions, "production": production}
+        for i, (conditions, production) in enumerate(rules)
+    }
+
+
+def write_example_rules(folder: Path) -> Path:
+    rule_dict_path = folder / "example_grammar_rules.json"
+    with open(rule_dict_path, "w") as f:
+        json.dump(example_rule_dict(), f)
+    return rule_dict_path
+
+
+def benchmark_rule_matching(n_topologies: int = 500, rule_dict_path: Path | None = None, seed: int = 0) -> dict:
+    """Topologies per second of generate_random_topology, and nodes per second matched by get_matching_rules on grids of
+    strings and by the compiled rules on int8 grids, on the nodes of the generated topologies"""
+    kwargs = {} if rule_dict_path is None else {"rule_dict_path": rule_dict_path}
+    rules = compile_rules(**kwargs)
+    random.seed(seed)
+    start = time.perf_counter()
+    grids = [generate_random_topology(**kwargs) for _ in range(n_topologies)]
+    ret = {"topologies_per_second": n_topologies / (time.perf_counter() - start)}
+
+    states = [(grid.nodes, rules.encode(grid.nodes)) for grid in grids]
+    nodes = [
+        (state, encoded, (i, j, k))
+        for state, encoded in states
+        for i in range(len(state))
+        for j in range(len(state[0]))
+        for k in range(len(state[0][0]))
+    ]
+    rule_dict = {f"r{i}": rule for i, rule in enumerate(rules.rules)}
+    start = time.perf_counter()
+    for state, _, node in nodes:
+        get_matching_rules(node, state, rule_dict, symbol_groups, 1, 1)
+    ret["strings_nodes_per_second"] = len(nodes) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for _, encoded, node in nodes:
+        rules.matching_rules(node, encoded, 1, 1)
+    ret["compiled_nodes_per_second"] = len(nodes) / (time.perf_counter() - start)
+    ret["matching_speedup"] = ret["compiled_nodes_per_second"] / ret["strings_nodes_per_second"]
+    return ret
+
+
+if __name__ == "__main__":
+    for k, v in benchmark_rule_matching().items():
+        print(f"{k}: {v}")
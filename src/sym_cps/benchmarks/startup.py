@@ -0,0 +1,69 @@
+import math
+import re
+import statistics
+import subprocess
+import sys
+from importlib.metadata import entry_points
+
+from sym_cps.shared.paths import repo_folder
+
+"""Code run in a fresh interpreter to measure the import of a module, optionally touching some of its attributes"""
+_probe = """
+import time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+for attribute in {touch}:
+    getattr({module}, attribute).__class__
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def project_scripts() -> dict[str, str]:
+    """Entry points of the package: {script_name: "module:function"}"""
+    scripts = {e.name: e.value for e in entry_points(group="console_scripts") if e.value.startswith("sym_cps")}
+    if len(scripts) > 0:
+        return scripts
+    """Not installed: read the [project.scripts] section of the pyproject"""
+    section = False
+    for line in (repo_folder / "pyproject.toml").read_text().splitlines():
+        if line.startswith("["):
+            section = line.strip() == "[project.scripts]"
+        elif section:
+            match = re.match(r'\s*([\w\-]+)\s*=\s*"([^"]+)"', line)
+            if match is not None:
+                scripts[match.group(1)] = match.group(2)
+    return scripts
+
+
+def measure_import(module: str, touch: tuple[str, ...] = (), repeat: int = 5) -> tuple[float, float]:
+    """Median seconds to import 'module' in a new process, and to load the 'touch' attributes afterwards.
+    NaN if the module cannot be imported."""
+    imports, loads = [], []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-c", _probe.format(module=module, touch=tuple(touch))], capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            print(f"{module} could not be imported: {process.stderr.strip().splitlines()[-1]}")
+            return math.nan, math.nan
+        import_time, load_time = process.stdout.strip().splitlines()[-1].split()
+        imports.append(float(import_time))
+        loads.append(float(load_time))
+    return statistics.median(imports), statistics.median(loads)
+
+
+def benchmark_startup(repeat: int = 5) -> dict[str, float]:
+    """Import time of the module of each entry point"""
+    results = {}
+    for name, target in project_scripts().items():
+        module = target.split(":")[0]
+        results[name], _ = measure_import(module, repeat=repeat)
+    results["shared.library (load)"] = sum(measure_import("sym_cps.shared.library", ("c_library",), repeat))
+    results["shared.designs (load)"] = sum(measure_import("sym_cps.shared.designs", ("designs",), repeat))
+    return results
+
+
+if __name__ == "__main__":
+    for k, v in benchmark_startup().items():
+        print(f"{k: <32}{v * 1000:10.1f} ms")
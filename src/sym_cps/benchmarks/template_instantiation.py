@@ -0,0 +1,63 @@
+import time
+from types import SimpleNamespace
+
+from sym_cps.contract.motor_propeller_analysis import MotorPropellerAnalysis
+from sym_cps.contract.tool.contract_tool import ContractTemplate
+
+
+def analysis_templates() -> dict[str, ContractTemplate]:
+    """Templates of a thrust analysis of MotorPropellerAnalysis, with an empty battery library"""
+    analysis = MotorPropellerAnalysis(
+        table_dict={}, c_library=SimpleNamespace(components_in_type={"Battery": []}), run=False
+    )
+    analysis.set_contract()
+    analysis.set_system_battery_thrust(add_weight=0.5)
+    return dict(analysis._contracts)
+
+
+def counting_templates(templates: dict[str, ContractTemplate], cache_clauses: bool) -> tuple[dict, dict]:
+    """Copies of the templates counting the calls of their clause functions"""
+    calls = {"n": 0}
+
+    def counting(fn):
+        def wrapped(vs, **kwargs):
+            calls["n"] += 1
+            return fn(vs, **kwargs)
+
+        return wrapped
+
+    copies = {
+        name: ContractTemplate(
+            name=template.name,
+            port_name_list=template.port_name_list,
+            property_name_list=template.property_name_list,
+            guarantee=counting(template.guarantee),
+            assumption=counting(template.assumption),
+            cache_clauses=cache_clauses,
+        )
+        for name, template in templates.items()
+    }
+    return copies, calls
+
+
+def benchmark_template_instantiation(n_instances: int = 1000) -> dict:
+    """Time and clause function calls of 'n_instances' instantiations of each template of the thrust analysis,
+    building the clauses with the functions every time and substituting the compiled clauses"""
+    templates = analysis_templates()
+    ret = {"n_instantiations": n_instances * len(templates)}
+    for name, cache_clauses in [("functions", False), ("compiled", True)]:
+        copies, calls = counting_templates(templates, cache_clauses=cache_clauses)
+        start = time.perf_counter()
+        for i in range(n_instances):
+            for template in copies.values():
+                template.instantiate(f"Inst_{i}")
+        ret[f"{name}_s"] = time.perf_counter() - start
+        ret[f"{name}_us_per_instance"] = ret[f"{name}_s"] / ret["n_instantiations"] * 1e6
+        ret[f"{name}_callbacks"] = calls["n"]
+    ret["speedup"] = ret["functions_s"] / ret["compiled_s"]
+    return ret
+
+
+if __name__ == "__main__":
+    for k, v in benchmark_template_instantiation().items():
+        print(f"{k}: {v}")
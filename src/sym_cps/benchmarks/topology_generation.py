@@ -0,0 +1,33 @@
+import time
+
+from sym_cps.grammar.rules import generate_random_topology
+from sym_cps.grammar.topology_generator import RandomTopologyGenerator, grid_hash
+from sym_cps.tools.topology_index import TopologyIndex
+
+
+def benchmark_topology_generation(n: int = 2000, max_workers: int | None = None, seed: int = 0) -> dict:
+    """Unique topologies per minute generated serially and with RandomTopologyGenerator"""
+    start = time.perf_counter()
+    index = TopologyIndex()
+    n_serial = 0
+    while n_serial < n // 10:
+        if index.add(grid_hash(generate_random_topology())):
+            n_serial += 1
+    time_serial = time.perf_counter() - start
+
+    generator = RandomTopologyGenerator(max_workers=max_workers, seed=seed)
+    start = time.perf_counter()
+    n_parallel = sum(1 for _ in generator.generate(n))
+    time_parallel = time.perf_counter() - start
+
+    return {
+        "serial_per_minute": 60 * n_serial / time_serial,
+        "parallel_per_minute": 60 * n_parallel / time_parallel,
+        "speedup": (n_parallel / time_parallel) / (n_serial / time_serial),
+        "parallel_duplicates": generator.n_duplicates,
+    }
+
+
+if __name__ == "__main__":
+    for k, v in benchmark_topology_generation().items():
+        print(f"{k}: {v}")
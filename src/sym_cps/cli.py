@@ -13,7 +13,7 @@ from sym_cps.representation.design.concrete import DConcrete
 from sym_cps.representation.design.human import HumanDesign
 from sym_cps.representation.tools.optimize import find_components
 from sym_cps.scripts import generate_random_instance_id, get_latest_evaluated_design_number, get_random_new_topology
-from sym_cps.shared.paths import aws_folder, data_folder, designs_folder
+from sym_cps.shared.paths import aws_folder, data_folder, designs_folder, random_topologies_index_path
 from sym_cps.tools.update_library import export_all_designs, update_dat_files_library
 
 
@@ -55,33 +55,60 @@ def generate_random(args: Optional[List[str]] = None):
     parser.add_argument("--n_wings_max", type=int, default=-1, help="Specify the max number of wings")
     parser.add_argument("--n_props_max", type=int, default=-1, help="Specify the max number of propellers")
     parser.add_argument("--no_optimization", default=False, action="store_true")
+    parser.add_argument("--workers", type=int, default=0, help="Generate the topologies on a pool of processes")
     opts = parser.parse_args(args=args)
     print(f"args: {opts}")
 
     index = get_latest_evaluated_design_number()
 
+    generator = None
+    grids = None
+    if opts.workers > 0:
+        from sym_cps.grammar.rules import optimized_n_propellers
+        from sym_cps.grammar.topology_generator import RandomTopologyGenerator
+        from sym_cps.tools.topology_index import TopologyIndex
+
+        """One batch per worker: each design is evaluated for minutes while the next candidates are generated"""
+        generator = RandomTopologyGenerator(
+            index=TopologyIndex(random_topologies_index_path),
+            max_workers=opts.workers,
+            max_right_num_rotors=opts.n_props_max,
+            max_right_num_wings=opts.n_wings_max,
+            prefetch=opts.workers,
+        )
+        grids = generator.generate()
+
     random_call_id = generate_random_instance_id()
     random_session_seed = str(random_call_id)
 
-    for i in range((index + 1), (index + opts.n + 1)):
-        print(f"Random iteration {i}")
-        design_tag = f"grammar_{random_call_id}"
-        design_index = i
-
-        new_design: AbstractDesign = get_random_new_topology(
-            design_tag, design_index, opts.n_wings_max, opts.n_props_max
-        )
-        new_design.save()
-        d_concrete = new_design.to_concrete()
-        d_concrete.choose_default_components_for_empty_ones()
-        d_concrete.export_all()
-        d_concrete.evaluate()
-
-        print(f"Optimizing Components")
-        new_d_concrete = deepcopy(d_concrete)
-        find_components(new_d_concrete)
-        d_concrete.export_all()
-        d_concrete.evaluate()
+    try:
+        for i in range((index + 1), (index + opts.n + 1)):
+            print(f"Random iteration {i}")
+            design_tag = f"grammar_{random_call_id}"
+            design_index = i
+
+            if generator is not None:
+                """The workers discard the grids that get_random_new_topology would skip, re-read as components of
+                new numbers of propellers can be optimized during the run"""
+                generator.n_props_allowed = optimized_n_propellers()
+            new_design: AbstractDesign = get_random_new_topology(
+                design_tag, design_index, opts.n_wings_max, opts.n_props_max, grids
+            )
+            new_design.save()
+            d_concrete = new_design.to_concrete()
+            d_concrete.choose_default_components_for_empty_ones()
+            d_concrete.export_all()
+            d_concrete.evaluate()
+
+            print(f"Optimizing Components")
+            new_d_concrete = deepcopy(d_concrete)
+            find_components(new_d_concrete)
+            d_concrete.export_all()
+            d_concrete.evaluate()
+    finally:
+        if grids is not None:
+            """Stops the workers and writes the topologies of the run to the index"""
+            grids.close()
 
 
 def _evaluate_grid_path(grid_file_path: Path):
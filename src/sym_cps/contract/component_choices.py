@@ -0,0 +1,154 @@
+"""
+Persistent memo of the components chosen by the local search of SimplifiedSelector.
+
+The choice depends on everything the contracts see of a design: the number of components of each type, the direction
+of the propellers and the body weight. These form the signature of the design. The memo is a json lines file, each line
+one signature with its components and score, appended by any number of processes: a process reads the lines appended by
+the others before every lookup, so a signature is searched again only if no process has finished it yet.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from sym_cps.shared.paths import component_choices_path
+
+
+@dataclass(frozen=True)
+class ComponentSignature:
+    """counts: (component type, number of components) sorted by type
+    propeller_direction: thrust ratio of each propeller, None if not known"""
+
+    counts: tuple[tuple[str, int], ...]
+    propeller_direction: tuple[float, ...] | None
+    body_weight: float
+
+    @staticmethod
+    def build(counts: dict[str, int], propeller_direction: list | None, body_weight: float) -> ComponentSignature:
+        return ComponentSignature(
+            counts=tuple(sorted(counts.items())),
+            propeller_direction=(
+                tuple(round(float(d), 6) for d in propeller_direction) if propeller_direction is not None else None
+            ),
+            body_weight=round(float(body_weight), 6),
+        )
+
+    @property
+    def key(self) -> str:
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "counts": dict(self.counts),
+            "propeller_direction": list(self.propeller_direction) if self.propeller_direction is not None else None,
+            "body_weight": self.body_weight,
+        }
+
+    @staticmethod
+    def from_dict(signature: dict) -> ComponentSignature:
+        return ComponentSignature.build(**signature)
+
+    def distance(self, other: ComponentSignature) -> float:
+        """Differences in the number of components, in the propeller directions and in the body weight (kg)"""
+        counts, other_counts = dict(self.counts), dict(other.counts)
+        ret = sum(abs(counts.get(c_type, 0) - other_counts.get(c_type, 0)) for c_type in counts.keys() | other_counts)
+        directions, other_directions = self.propeller_direction or (), other.propeller_direction or ()
+        if len(directions) == len(other_directions):
+            ret += sum(abs(a - b) for a, b in zip(directions, other_directions))
+        else:
+            ret += max(len(directions), len(other_directions))
+        return ret + abs(self.body_weight - other.body_weight)
+
+
+@dataclass
+class ComponentChoice:
+    signature: ComponentSignature
+    """Library component id by component type"""
+    components: dict[str, str]
+    score: float
+
+
+class ComponentChoiceCache(object):
+    """Best ComponentChoice of each signature, persisted as one json line per choice in 'file_path'"""
+
+    def __init__(self, file_path: Path = component_choices_path):
+        self._file_path = file_path
+        self._choices: dict[str, ComponentChoice] = {}
+        """Bytes of the file already read"""
+        self._offset = 0
+        self.hits = 0
+        self.misses = 0
+
+    def refresh(self):
+        """Reads the lines appended since the last read, by this or other processes.
+        A last line without its newline is not complete yet: it is read again at the next refresh."""
+        if not os.path.exists(self._file_path):
+            return
+        with open(self._file_path, "rb") as file:
+            file.seek(self._offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                self._offset += len(line)
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # line of a process interrupted while writing
+                    continue
+                self._add(
+                    ComponentChoice(
+                        ComponentSignature.from_dict(entry["signature"]), entry["components"], entry["score"]
+                    )
+                )
+
+    def _add(self, choice: ComponentChoice) -> bool:
+        """Keeps the best choice of each signature, e.g. if two processes searched it at the same time"""
+        key = choice.signature.key
+        if key in self._choices and self._choices[key].score >= choice.score:
+            return False
+        self._choices[key] = choice
+        return True
+
+    def get(self, signature: ComponentSignature) -> ComponentChoice | None:
+        self.refresh()
+        choice = self._choices.get(signature.key)
+        if choice is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return choice
+
+    def nearest(self, signature: ComponentSignature) -> ComponentChoice | None:
+        """Choice of the closest signature, to warm start the search of a new one"""
+        self.refresh()
+        if len(self._choices) == 0:
+            return None
+        return min(self._choices.values(), key=lambda choice: signature.distance(choice.signature))
+
+    def put(self, signature: ComponentSignature, components: dict[str, str], score: float):
+        self.refresh()
+        choice = ComponentChoice(signature, dict(components), score)
+        if not self._add(choice):
+            return
+        os.makedirs(os.path.dirname(self._file_path), exist_ok=True)
+        line = json.dumps({"signature": signature.to_dict(), "components": choice.components, "score": score}) + "\n"
+        """A single write in append mode, so the lines of concurrent processes are not interleaved.
+        A file not ending with a newline was left by a process interrupted while writing: its line is terminated"""
+        fd = os.open(self._file_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size > 0 and os.pread(fd, 1, size - 1) != b"\n":
+                line = "\n" + line
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def __len__(self):
+        self.refresh()
+        return len(self._choices)
+
+    def __str__(self):
+        return f"component choice cache: {len(self)} signatures, {self.hits} hits, {self.misses} misses"
@@ -102,7 +102,14 @@ class ComponentSelectionContract:
             for comp, lib in zip(comps, libs):
                 comp.library_component = lib
 
-    def select_hackathon(self, design_concrete: DConcrete, max_iter=10, timeout_millisecond=100000, body_weight=0):
+    def select_hackathon(
+        self,
+        design_concrete: DConcrete,
+        max_iter=10,
+        timeout_millisecond=100000,
+        body_weight=0,
+        mode="iterate",
+    ):
         print(" ")
 
         """Instantiate the contract"""
@@ -130,7 +137,7 @@ class ComponentSelectionContract:
         """Solver the OMT problem to optimize selection of components """
         start = time.time()
         propeller, motor, battery = manager.solve_optimize(
-            c_library=self._library, max_iter=max_iter, timeout_millisecond=timeout_millisecond
+            c_library=self._library, max_iter=max_iter, timeout_millisecond=timeout_millisecond, mode=mode
         )
         end = time.time()
         print("Solving Time:", end - start)
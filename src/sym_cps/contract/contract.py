@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING
 
 import z3
 
+from sym_cps.contract.tool.objective_search import maximize_objective
 from sym_cps.representation.library import Library
 
 if TYPE_CHECKING:
@@ -528,42 +529,42 @@ class ContractManagerBruteForce:
         )
         print("==================================================================")
 
-    def solve_optimize(self, c_library: Library, max_iter=0, timeout_millisecond=100000):
-        num_iter = 0
+    def solve_optimize(
+        self, c_library: Library, max_iter=0, timeout_millisecond=100000, mode="iterate", tolerance=1e-3
+    ):
+        """Selection maximizing thrust_sum - weight_sum, see objective_search.maximize_objective for the modes.
+        The objective trajectory and the time of each check are kept in self.optimization_trace."""
         propeller = None
         motor = None
         battery = None
-        solver = z3.Solver()
-        # solver = z3.Optimize()
-        solver.add(self._all_clause)
-        solver.set("timeout", timeout_millisecond)
-        ret = solver.check()
-        while ret == z3.sat:
-            model = solver.model()
+        num_iter = 0
+        thrust_sum = self._vs_dict["system"]["thrust_sum"]
+        weight_sum = self._vs_dict["system"]["weight_sum"]
+
+        def on_model(model):
+            nonlocal propeller, motor, battery, num_iter
             propeller, motor, battery = self.get_component_selection(model=model, c_library=c_library)
             print(f"Iteration: {num_iter}, Component Found:")
             print(f"    Propeller: {propeller.id}")
             print(f"    Motor: {motor.id}")
             print(f"    Battery: {battery.id}")
             self.print_metric(model=model)
-            # count progress
-            if num_iter >= max_iter:
-                break
-            else:
-                num_iter += 1
-            # set for next iteration
-            thrust = (
-                model[self._vs_dict["system"]["thrust_sum"]].numerator_as_long()
-                / model[self._vs_dict["system"]["thrust_sum"]].denominator_as_long()
-            )
-            weight = (
-                model[self._vs_dict["system"]["weight_sum"]].numerator_as_long()
-                / model[self._vs_dict["system"]["weight_sum"]].denominator_as_long()
-            )
-            solver.add(
-                self._vs_dict["system"]["thrust_sum"] - self._vs_dict["system"]["weight_sum"] >= thrust - weight + 1
-            )
-            ret = solver.check()
+            num_iter += 1
+            thrust = model[thrust_sum].numerator_as_long() / model[thrust_sum].denominator_as_long()
+            weight = model[weight_sum].numerator_as_long() / model[weight_sum].denominator_as_long()
+            return thrust - weight
+
+        self.optimization_trace = maximize_objective(
+            clauses=self._all_clause,
+            objective_expr=thrust_sum - weight_sum,
+            on_model=on_model,
+            mode=mode,
+            max_iter=max_iter,
+            timeout_millisecond=timeout_millisecond,
+            tolerance=tolerance,
+            min_step=1,
+        )
+        print(self.optimization_trace)
         if propeller is None or motor is None or battery is None:
             print("Fail.....")
 
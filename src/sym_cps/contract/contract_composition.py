@@ -38,8 +38,8 @@ class Hackathon2Contract(object):
             print(f"Check Completed (objective: {objective})")
         return objective
 
-    def optimize(self, max_iter=0, timeout_millisecond=100000):
-        self._manager.solve_optimize(max_iter=max_iter, timeout_millisecond=timeout_millisecond)
+    def optimize(self, max_iter=0, timeout_millisecond=100000, mode="iterate"):
+        self._manager.solve_optimize(max_iter=max_iter, timeout_millisecond=timeout_millisecond, mode=mode)
         selection_result = self._manager.get_component_selection()
         if selection_result is None:
             return None
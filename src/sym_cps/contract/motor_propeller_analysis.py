@@ -1,62 +1,214 @@
+from __future__ import annotations
+
 import json
 import math
-
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator
+
+from sym_cps.contract.prefilter import (
+    PrefilterStats,
+    exceeds,
+    motor_propeller_feasible,
+    operating_point,
+    property_arrays,
+)
 from sym_cps.contract.tool.contract_tool import ContractManager, ContractTemplate
 from sym_cps.representation.library.elements.library_component import LibraryComponent
 from sym_cps.shared.paths import data_folder
 
+analysis_folder = data_folder / "ComponentLibrary" / "component_selection_analysis"
+
+
+def read_pair_results(file_path: Path) -> dict[tuple[str, str], dict]:
+    """{(propeller, motor): record} of the json lines in file_path.
+    A line truncated by an interrupted run is ignored, so its pair is analyzed again."""
+    results = {}
+    if not file_path.exists():
+        return results
+    with open(file_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results[(record["propeller"], record["motor"])] = record
+    return results
+
+
+def append_pair_results(file_path: Path, records: list[dict]):
+    if len(records) == 0:
+        return
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(file_path, "a") as f:
+        """A truncated last line (interrupted run) must not swallow the first new record"""
+        if f.tell() > 0:
+            with open(file_path, "rb") as r:
+                r.seek(-1, 2)
+                if r.read(1) != b"\n":
+                    f.write("\n")
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def export_pair_results(file_path: Path, export_path: Path) -> list:
+    """Writes the pairs that can fly in the format read by RefineComponentSelection: [propeller, motor, results]"""
+    ret = [
+        [record["propeller"], record["motor"], {"min_fly": record["min_fly"], "max_v": record["max_v"]}]
+        for record in read_pair_results(file_path).values()
+        if record["status"] == "ok"
+    ]
+    with open(export_path, "w") as outfile:
+        print(len(ret))
+        json.dump(ret, outfile, indent=4)
+    return ret
+
+
+"""Analysis object of each worker process, set up once by '_init_worker'"""
+_worker_analysis: MotorPropellerAnalysis | None = None
+
+
+def _init_worker(table_dict, c_library):
+    global _worker_analysis
+    _worker_analysis = MotorPropellerAnalysis(table_dict=table_dict, c_library=c_library, run=False)
+
+
+def _analyze_shard(shard: list[tuple[str, str]]) -> list[dict]:
+    return _worker_analysis.analyze_shard(shard)
+
 
 class MotorPropellerAnalysis(object):
-    def __init__(self, table_dict, c_library):
+    """Analysis of every (propeller, motor) pair of the library, see 'run'.
+    With run=False the object is only set up, e.g. to analyze single pairs with 'analyze_pair'."""
+
+    def __init__(
+        self,
+        table_dict,
+        c_library,
+        run: bool = True,
+        max_workers: int | None = None,
+        shard_size: int = 20,
+        output_file: Path = analysis_folder / "motor_propeller_pair.jsonl",
+    ):
         self._table_dict = table_dict
         self._c_library = c_library
         self.collect_abstracted_battery()
         self._rpm_static = 10000
         self._solver_verbose = False
-        ret = []
-        for np, prop in enumerate(list(self._c_library.components_in_type["Propeller"])):
-            for nm, motor in enumerate(list(self._c_library.components_in_type["Motor"])):
-                ##### first find the prop motor that can generates thrust
-                ##### Then find the maximum voltage to break the system... save the voltage in result.
-                # for np, prop in enumerate([self._c_library.components["apc_propellers_7x5E"]]):#apc_propellers_6x4E
-                #     for nm, motor in enumerate([self._c_library.components["kde_direct_KDE2315XF_885"]]): #t_motor_AT2312KV1400
-                print(f"{np} {nm} Analyze ({prop.id}, {motor.id})", end="")
-                self.battery_system_analysis_thrust(add_weight=0.5, motors=[motor], propellers=[prop])
-                is_sat_thrust = self._manager.solve()
-                if not is_sat_thrust:
-                    print("     Incompatible")
+        self._contracts = {}
+        """System templates by (kind, parameters), the templates compile their clauses once"""
+        self._system_contracts = {}
+        if run:
+            self.run(output_file=output_file, max_workers=max_workers, shard_size=shard_size)
+
+    def run(self, output_file: Path, max_workers: int | None = None, shard_size: int = 20):
+        """Analyzes the pairs in shards of 'shard_size' on a pool of 'max_workers' processes (in this process if 1).
+        Each analyzed pair is appended as a json line to 'output_file' as soon as its shard completes, and the pairs
+        already in 'output_file' are skipped, so an interrupted analysis resumes where it stopped.
+        The pairs that can fly are finally exported to motor_propeller_pair.json"""
+        propellers = list(self._c_library.components_in_type["Propeller"])
+        motors = list(self._c_library.components_in_type["Motor"])
+        done = read_pair_results(output_file)
+        print(f"{len(done)} pairs already analyzed in {output_file}")
+        feasible = self.prefilter(propellers=propellers, motors=motors, add_weight=0.5)
+        pairs = []
+        prefiltered = []
+        for np, prop in enumerate(propellers):
+            for nm, motor in enumerate(motors):
+                if (prop.id, motor.id) in done:
                     continue
-                v_motor = self._manager.get_metric("MotorInst", "V_motor")
-                i_motor = self._manager.get_metric("MotorInst", "I_motor")
-
-                self.battery_system_analysis_voltage(add_weight=0, motors=[motor], propellers=[prop], check_power=True)
-                is_sat_voltage_power = self._manager.solve()
-                v_current = None
-                v_power = None
-                if is_sat_voltage_power:
-                    v_power = self._manager.get_metric("MotorInst", "V_motor")
-                self.battery_system_analysis_voltage(add_weight=0, motors=[motor], propellers=[prop], check_power=False)
-                is_sat_voltage_current = self._manager.solve()
-                if is_sat_voltage_current:
-                    v_current = self._manager.get_metric("MotorInst", "V_motor")
-                if is_sat_voltage_current or is_sat_voltage_power:
-                    print(f" V power {v_power}, V Current {v_current} V thrust {v_motor}", end="")
-                    if v_current is None:
-                        v_ret = v_power
-                    elif v_power is None:
-                        v_ret = v_current
-                    else:
-                        v_ret = min(v_power, v_current)
-                    ret.append([prop.id, motor.id, {"min_fly": {"I": i_motor, "V": v_motor}, "max_v": v_ret}])
-                    print("     OK")
+                if not feasible[np, nm]:
+                    prefiltered.append({"propeller": prop.id, "motor": motor.id, "status": "incompatible (pre-filter)"})
                 else:
-                    print("     Error")
-                    print("     Incompatible?")
-        file_path = data_folder / "ComponentLibrary" / "component_selection_analysis" / "motor_propeller_pair.json"
+                    pairs.append((prop.id, motor.id))
+        append_pair_results(output_file, prefiltered)
+
+        shards = [pairs[i : i + shard_size] for i in range(0, len(pairs), shard_size)]
+        print(f"Analyzing {len(pairs)} pairs in {len(shards)} shards")
+        n_analyzed = 0
+        start = time.time()
+        for records in self._analyze_shards(shards, max_workers):
+            append_pair_results(output_file, records)
+            n_analyzed += len(records)
+            elapsed = time.time() - start
+            print(f"{n_analyzed}/{len(pairs)} pairs analyzed, {n_analyzed / elapsed:.2f} pairs/s")
+
+        export_pair_results(output_file, analysis_folder / "motor_propeller_pair.json")
+
+    def _analyze_shards(self, shards: list[list[tuple[str, str]]], max_workers: int | None) -> Iterator[list[dict]]:
+        if max_workers == 1:
+            for shard in shards:
+                yield self.analyze_shard(shard)
+            return
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(self._table_dict, self._c_library)
+        ) as executor:
+            futures = [executor.submit(_analyze_shard, shard) for shard in shards]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def analyze_shard(self, shard: list[tuple[str, str]]) -> list[dict]:
+        return [
+            self.analyze_pair(self._c_library.components[prop_id], self._c_library.components[motor_id])
+            for prop_id, motor_id in shard
+        ]
 
-        with open(file_path, "w") as outfile:
-            print(len(ret))
-            json.dump(ret, outfile, indent=4)
+    def analyze_pair(self, prop: LibraryComponent, motor: LibraryComponent) -> dict:
+        """First finds the operating point where the pair lifts its weight,
+        then the maximum voltage before exceeding the max power or the max current of the motor"""
+        record = {"propeller": prop.id, "motor": motor.id}
+        self.battery_system_analysis_thrust(add_weight=0.5, motors=[motor], propellers=[prop])
+        is_sat_thrust = self._manager.solve()
+        if not is_sat_thrust:
+            record["status"] = "incompatible"
+            return record
+        v_motor = self._manager.get_metric("MotorInst", "V_motor")
+        i_motor = self._manager.get_metric("MotorInst", "I_motor")
+
+        self.battery_system_analysis_voltage(add_weight=0, motors=[motor], propellers=[prop], check_power=True)
+        is_sat_voltage_power = self._manager.solve()
+        v_current = None
+        v_power = None
+        if is_sat_voltage_power:
+            v_power = self._manager.get_metric("MotorInst", "V_motor")
+        self.battery_system_analysis_voltage(add_weight=0, motors=[motor], propellers=[prop], check_power=False)
+        is_sat_voltage_current = self._manager.solve()
+        if is_sat_voltage_current:
+            v_current = self._manager.get_metric("MotorInst", "V_motor")
+        if not (is_sat_voltage_current or is_sat_voltage_power):
+            record["status"] = "error"
+            return record
+        if v_current is None:
+            v_ret = v_power
+        elif v_power is None:
+            v_ret = v_current
+        else:
+            v_ret = min(v_power, v_current)
+        record["status"] = "ok"
+        record["min_fly"] = {"I": i_motor, "V": v_motor}
+        record["max_v"] = v_ret
+        return record
+
+    def prefilter(self, propellers: list[LibraryComponent], motors: list[LibraryComponent], add_weight=0):
+        """Matrix (propeller, motor) of the pairs that can pass battery_system_analysis_thrust, computed without solver.
+        The pairs that fail it are never sent to the solver."""
+        self.set_rpm(rpm=10000)
+        propeller = property_arrays([self.hackathon_property_interface_fn(p) for p in propellers], axis=0, ndim=2)
+        motor = property_arrays([self.hackathon_property_interface_fn(m) for m in motors], axis=1, ndim=2)
+        weight = (add_weight + propeller["W_prop"][0] + motor["W_motor"][0]) * 9.81
+        point = operating_point(propeller, motor, weight)
+        feasible = motor_propeller_feasible(propeller, motor, point)
+        """The battery is abstracted by the range of its properties across the library"""
+        feasible &= ~exceeds(point["I_motor"], self._battery_dict["capacity"][1] * 3600 / 400 / 4)
+        feasible &= ~exceeds(point["I_motor"], self._battery_dict["I_max"][1])
+        stats = PrefilterStats()
+        stats.update(feasible)
+        print(f"Motor-Propeller {stats}")
+        return feasible
 
     def collect_abstracted_battery(self):
         self._num_battery = 2
@@ -268,6 +420,10 @@ class MotorPropellerAnalysis(object):
         self._manager.set_objective(expr=objective_expr, value=objective_val, evaluate_fn=objective_fn)
 
     def set_system_battery_voltage(self, add_weight=0, check_power=False):
+        key = ("battery_voltage", add_weight, check_power)
+        if key in self._system_contracts:
+            self._contracts["System"] = self._system_contracts[key]
+            return
         system_port_name_list = [
             "rho",
             "thrust",
@@ -303,9 +459,14 @@ class MotorPropellerAnalysis(object):
             guarantee=system_guarantee,
             assumption=system_assumption,
         )
+        self._system_contracts[key] = system_contract
         self._contracts["System"] = system_contract
 
     def set_system_battery_thrust(self, add_weight=0):
+        key = ("battery_thrust", add_weight)
+        if key in self._system_contracts:
+            self._contracts["System"] = self._system_contracts[key]
+            return
         system_port_name_list = [
             "rho",
             "thrust",
@@ -342,9 +503,14 @@ class MotorPropellerAnalysis(object):
             guarantee=system_guarantee,
             assumption=system_assumption,
         )
+        self._system_contracts[key] = system_contract
         self._contracts["System"] = system_contract
 
     def set_system(self, add_weight=0):
+        key = ("system", add_weight)
+        if key in self._system_contracts:
+            self._contracts["System"] = self._system_contracts[key]
+            return
         # TODO should be able to be generated automatically from contract_tool
         system_port_name_list = ["rho", "thrust", "weight_sum", "I_motor", "W_motor", "W_prop", "thrust", "V_motor"]
         system_property_name_list = []
@@ -370,10 +536,14 @@ class MotorPropellerAnalysis(object):
             guarantee=system_guarantee,
             assumption=system_assumption,
         )
+        self._system_contracts[key] = system_contract
         self._contracts["System"] = system_contract
 
     def set_contract(self):
-        self._contracts = {}
+        """The component templates only depend on the battery ranges, which are fixed: they are built once and every
+        analysis reuses the clauses they compiled"""
+        if "Propeller" in self._contracts:
+            return
 
         propeller_port_name_list = ["rho", "omega_prop", "torque_prop", "thrust", "shaft_motor"]
         propeller_property_name_list = ["C_p", "C_t", "diameter", "shaft_prop", "W_prop"]
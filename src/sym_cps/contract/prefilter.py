@@ -0,0 +1,89 @@
+"""
+Numeric pre-filter of component candidates, run before building any SMT problem.
+
+It uses the same equations as the contracts in `contract/tester/uav_contract.py`:
+  propeller:  torque = C_p * rho * omega^2 * D^5 / (2 pi)^3,  thrust = C_t * rho * omega^2 * D^4 / (2 pi)^2 * multiplier
+  motor:      I * R_w = V - omega / K_v,  torque = K_t / R_w * (V - R_w * I_idle - omega / K_v)
+The motor equations give I = torque / K_t + I_idle and V = I * R_w + omega / K_v, both increasing with omega.
+Every property is an interval (a value or a (min, max) tuple, as produced with use_rpm_v_range), so the smallest omega
+that lifts the weight and the corresponding current, voltage and power are lower bounds over all the behaviors of the
+system. A candidate is dropped only when even these lower bounds violate the contracts, so no feasible candidate is lost.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+"""Same value of pi used in the contracts"""
+_pi = 3.14159265
+
+"""Relative margin on the comparisons, so that rounding errors never drop a candidate that the solver would accept"""
+_margin = 1e-6
+
+
+@dataclass
+class PrefilterStats:
+    candidates: int = 0
+    dropped: int = 0
+    smt_calls_per_candidate: int = 1
+
+    @property
+    def smt_calls_saved(self) -> int:
+        return self.dropped * self.smt_calls_per_candidate
+
+    def update(self, feasible: np.ndarray):
+        self.candidates += int(feasible.size)
+        self.dropped += int(feasible.size - np.count_nonzero(feasible))
+
+    def __str__(self):
+        return (
+            f"pre-filter: {self.candidates - self.dropped}/{self.candidates} candidates kept, "
+            f"{self.smt_calls_saved} SMT calls saved"
+        )
+
+
+def property_arrays(candidates: list[dict], axis: int = 0, ndim: int = 1) -> dict:
+    """{name: (lower, upper)} arrays of the properties of the candidates, laid along 'axis' of 'ndim' dimensions
+    for broadcasting. Tuples are intervals, other values are degenerate intervals."""
+    names = [name for name in candidates[0].keys() if name != "name"]
+    shape = [1] * ndim
+    shape[axis] = len(candidates)
+    arrays = {}
+    for name in names:
+        values = [c[name] if isinstance(c[name], tuple) else (c[name], c[name]) for c in candidates]
+        values = np.array(values, dtype=float).reshape(len(candidates), 2)
+        arrays[name] = (values[:, 0].reshape(shape), values[:, 1].reshape(shape))
+    return arrays
+
+
+def operating_point(propeller: dict, motor: dict, weight, rho: float = 1.225, thrust_multiplier: float = 1.0) -> dict:
+    """Lower bounds of omega, I_motor, V_motor and power needed to produce a thrust equal to 'weight' (N).
+    propeller and motor are the output of property_arrays, weight can be an array broadcastable with them."""
+    c_t = propeller["C_t"][1]
+    c_p = np.maximum(propeller["C_p"][0], 0)
+    diameter = propeller["diameter"][1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        omega = np.sqrt(weight * (2 * _pi) ** 2 / (c_t * rho * diameter**4 * thrust_multiplier))
+        omega = np.where(c_t > 0, omega, np.inf)
+        torque = c_p * rho * omega**2 * propeller["diameter"][0] ** 5 / (2 * _pi) ** 3
+        current = torque / motor["K_t"][1] + motor["I_idle"][0]
+        voltage = current * motor["R_w"][0] + omega / motor["K_v"][1]
+    return {"omega": omega, "I_motor": current, "V_motor": voltage, "P_motor": voltage * current}
+
+
+def exceeds(lower_bound, upper_bound) -> np.ndarray:
+    """True where lower_bound > upper_bound beyond the rounding margin"""
+    return lower_bound > upper_bound + _margin * np.abs(upper_bound)
+
+
+def motor_propeller_feasible(propeller: dict, motor: dict, point: dict) -> np.ndarray:
+    """Contracts of the propeller and of the motor alone: shaft, C_p >= 0, max current and max power"""
+    infeasible = exceeds(motor["shaft_motor"][0], propeller["shaft_prop"][1])
+    infeasible |= propeller["C_p"][1] < 0
+    infeasible |= exceeds(point["I_motor"], motor["I_max_motor"][1])
+    infeasible |= exceeds(point["P_motor"], motor["P_max_motor"][1])
+    """Motors with non-physical constants are left to the solver"""
+    valid = (motor["K_t"][1] > 0) & (motor["K_v"][1] > 0) & (motor["R_w"][0] >= 0) & (motor["I_idle"][0] >= 0)
+    return ~infeasible | ~valid
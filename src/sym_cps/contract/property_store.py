@@ -0,0 +1,173 @@
+"""
+Columnar store of the component properties used by the contracts.
+
+The contract interface functions of `contract/tester/uav_contract.py` read `properties["..."].value`, convert the units
+and query the PerfTable of the propellers for every candidate they evaluate. The store does this once for the whole
+library: one array per property and component type, in the units of the contracts, and the C_p / C_t of all the
+propellers at the (rpm, v) points and ranges queried by the selectors.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from sym_cps.representation.library import Library
+
+"""(rpm, v) points and (rpm1, rpm2, v1, v2) ranges queried by the selectors, computed when the store is built.
+Other points are computed at the first query and cached."""
+standard_points = [(10000, 0), (18000, 0), (10000, 19), (18000, 19)]
+standard_ranges = [(5000, 18000, 1, 25)]
+
+
+class PropertyStore:
+    """
+    ids[comp_type]: ids of the components, in row order
+    rows[comp_type]: {component id: row}
+    columns[comp_type]: {property name: array with one entry per row}, for a single motor and a single battery
+    Propellers without performance table in 'table_dict' are not in the store.
+    """
+
+    def __init__(self, c_library: Library, table_dict: dict):
+        self.ids: dict[str, list[str]] = {}
+        self.rows: dict[str, dict[str, int]] = {}
+        self.columns: dict[str, dict[str, np.ndarray]] = {}
+
+        propellers = [p for p in c_library.components_in_type["Propeller"] if p in table_dict]
+        self._tables = [table_dict[p] for p in propellers]
+        self._add(
+            "Propeller",
+            propellers,
+            {
+                "diameter": lambda c: c.properties["DIAMETER"].value / 1000,
+                "shaft_prop": lambda c: c.properties["SHAFT_DIAMETER"].value,
+                "W_prop": lambda c: c.properties["WEIGHT"].value,
+            },
+        )
+        self._add(
+            "Motor",
+            list(c_library.components_in_type["Motor"]),
+            {
+                "R_w": lambda c: c.properties["INTERNAL_RESISTANCE"].value / 1000,  # Ohm
+                "K_t": lambda c: c.properties["KT"].value,
+                "K_v": lambda c: c.properties["KV"].value * (2 * math.pi) / 60,  # rpm/V to rad/(V-sec)
+                "I_idle": lambda c: c.properties["IO_IDLE_CURRENT_10V"].value,
+                "W_motor": lambda c: c.properties["WEIGHT"].value,
+                "I_max_motor": lambda c: c.properties["MAX_CURRENT"].value,
+                "P_max_motor": lambda c: c.properties["MAX_POWER"].value,
+                "shaft_motor": lambda c: c.properties["SHAFT_DIAMETER"].value,
+            },
+        )
+        self._add(
+            "Battery",
+            list(c_library.components_in_type["Battery"]),
+            {
+                "capacity": lambda c: c.properties["CAPACITY"].value / 1000,  # mAh -> Ah
+                "W_batt": lambda c: c.properties["WEIGHT"].value,
+                "V_battery": lambda c: c.properties["VOLTAGE"].value,
+                "discharge_rate": lambda c: c.properties["CONT_DISCHARGE_RATE"].value,
+            },
+        )
+
+        self._coefficients: dict[tuple, tuple[np.ndarray, np.ndarray]] = {}
+        self._coefficient_ranges: dict[tuple, tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+        for rpm, v in standard_points:
+            self.coefficients(rpm, v)
+        for rpm1, rpm2, v1, v2 in standard_ranges:
+            self.coefficient_ranges(rpm1, rpm2, v1, v2)
+
+    def _add(self, comp_type: str, components: list, properties: dict):
+        self.ids[comp_type] = [c.id for c in components]
+        self.rows[comp_type] = {c.id: row for row, c in enumerate(components)}
+        self.columns[comp_type] = {
+            name: np.array([fn(c) for c in components], dtype=float) for name, fn in properties.items()
+        }
+
+    def __contains__(self, component) -> bool:
+        return component.id in self.rows.get(component.comp_type.id, {})
+
+    def coefficients(self, rpm: float, v: float) -> tuple[np.ndarray, np.ndarray]:
+        """C_p and C_t of every propeller at (rpm, v)"""
+        key = (rpm, v)
+        if key not in self._coefficients:
+            self._coefficients[key] = (
+                np.array([table.get_value(rpm=rpm, v=v, label="Cp") for table in self._tables], dtype=float),
+                np.array([table.get_value(rpm=rpm, v=v, label="Ct") for table in self._tables], dtype=float),
+            )
+        return self._coefficients[key]
+
+    def coefficient_ranges(self, rpm1: float, rpm2: float, v1: float, v2: float) -> tuple[np.ndarray, ...]:
+        """C_p min, C_p max, C_t min and C_t max of every propeller over [rpm1, rpm2] x [v1, v2]"""
+        key = (rpm1, rpm2, v1, v2)
+        if key not in self._coefficient_ranges:
+            c_p = [table.get_range(rpm1=rpm1, rpm2=rpm2, v1=v1, v2=v2, label="Cp") for table in self._tables]
+            c_t = [table.get_range(rpm1=rpm1, rpm2=rpm2, v1=v1, v2=v2, label="Ct") for table in self._tables]
+            c_p = np.array(c_p, dtype=float).reshape(len(self._tables), 2)
+            c_t = np.array(c_t, dtype=float).reshape(len(self._tables), 2)
+            self._coefficient_ranges[key] = (c_p[:, 0], c_p[:, 1], c_t[:, 0], c_t[:, 1])
+        return self._coefficient_ranges[key]
+
+    def propeller_arrays(self, rows, rpm, rpm2, v, v2, num_motor, use_rpm_v_range) -> dict:
+        """Properties of the propellers in 'rows' as {name: array}, or {name: (min array, max array)} for the ranges"""
+        columns = self.columns["Propeller"]
+        ret = {}
+        if not use_rpm_v_range:
+            c_p, c_t = self.coefficients(rpm, v)
+            ret["C_p"] = c_p[rows]
+            ret["C_t"] = c_t[rows]
+        else:
+            c_p_min, c_p_max, c_t_min, c_t_max = self.coefficient_ranges(rpm, rpm2, v, v2)
+            ret["C_p"] = (c_p_min[rows], c_p_max[rows])
+            ret["C_t"] = (c_t_min[rows], c_t_max[rows])
+        ret["W_prop"] = columns["W_prop"][rows] * num_motor
+        ret["diameter"] = columns["diameter"][rows]
+        ret["shaft_prop"] = columns["shaft_prop"][rows]
+        return ret
+
+    def motor_arrays(self, rows, num_motor) -> dict:
+        columns = self.columns["Motor"]
+        ret = {name: column[rows] for name, column in columns.items()}
+        ret["W_motor"] = columns["W_motor"][rows] * num_motor
+        return ret
+
+    def battery_arrays(self, rows, num_battery) -> dict:
+        columns = self.columns["Battery"]
+        capacity = columns["capacity"][rows] * num_battery
+        return {
+            "capacity": capacity,
+            "W_batt": columns["W_batt"][rows] * num_battery,
+            "V_battery": columns["V_battery"][rows],
+            "I_max": columns["discharge_rate"][rows] * capacity,
+        }
+
+    def propeller_property(self, component_id: str, rpm, rpm2, v, v2, num_motor, use_rpm_v_range) -> dict:
+        """Same dictionary as UAVContract.hackthon_get_propeller_property"""
+        row = self.rows["Propeller"][component_id]
+        return _row_dict(self.propeller_arrays(row, rpm, rpm2, v, v2, num_motor, use_rpm_v_range), component_id)
+
+    def motor_property(self, component_id: str, num_motor) -> dict:
+        """Same dictionary as UAVContract.hackthon_get_motor_property"""
+        return _row_dict(self.motor_arrays(self.rows["Motor"][component_id], num_motor), component_id)
+
+    def battery_property(self, component_id: str, num_battery) -> dict:
+        """Same dictionary as UAVContract.hackthon_get_battery_property"""
+        return _row_dict(self.battery_arrays(self.rows["Battery"][component_id], num_battery), component_id)
+
+    def interval_arrays(self, comp_type: str, component_ids: list[str], **kwargs) -> dict:
+        """{name: (lower, upper)} arrays of the components, as 'prefilter.property_arrays' builds from the dictionaries.
+        kwargs are the arguments of the '<comp_type>_arrays' method, other than the rows"""
+        rows = np.array([self.rows[comp_type][component_id] for component_id in component_ids], dtype=int)
+        arrays = getattr(self, f"{comp_type.lower()}_arrays")(rows, **kwargs)
+        return {name: value if isinstance(value, tuple) else (value, value) for name, value in arrays.items()}
+
+
+def _row_dict(arrays: dict, component_id: str) -> dict:
+    ret = {
+        name: (float(value[0]), float(value[1])) if isinstance(value, tuple) else float(value)
+        for name, value in arrays.items()
+    }
+    ret["name"] = component_id
+    return ret
@@ -1,26 +1,144 @@
+from __future__ import annotations
+
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from multiprocessing import Value
+from typing import Iterator
+
+import numpy as np
+
+from sym_cps.contract.prefilter import (
+    PrefilterStats,
+    exceeds,
+    motor_propeller_feasible,
+    operating_point,
+)
+from sym_cps.contract.property_store import PropertyStore
 from sym_cps.contract.tester.uav_contract import UAVContract
 from sym_cps.contract.tool.component_interface import ComponentInterface
 from sym_cps.contract.tool.contract_instance import ContractInstance
 from sym_cps.contract.tool.contract_system import ContractSystem
 from sym_cps.contract.tool.contract_template import ContractTemplate
-from sym_cps.contract.tool.solver.z3_interface import Z3Interface
 from sym_cps.representation.design.concrete import DConcrete
 from sym_cps.representation.library import Library, LibraryComponent
 from sym_cps.representation.tools.parsers.parse import parse_library_and_seed_designs
 from sym_cps.representation.tools.parsers.parsing_prop_table import parsing_prop_table
 
+"""Component types changed by the local search, in the order of its coordinate descent"""
+search_types = ["Propeller", "Motor", "Battery"]
+
+
+@dataclass(frozen=True)
+class ComponentAssignment:
+    """What select_single_iterate needs from a design: the number of components of each type and the library
+    component used for each type. Restarts of the local search work on it instead of a DConcrete."""
+
+    counts: dict[str, int]
+    components: dict[str, LibraryComponent]
+    propeller_direction: list | None = None
+
+    @staticmethod
+    def from_design(d_concrete: DConcrete) -> ComponentAssignment:
+        counts = {}
+        components = {}
+        for component in d_concrete.components:
+            c_type = component.c_type.id
+            counts[c_type] = counts.get(c_type, 0) + 1
+            components.setdefault(c_type, component.library_component)
+        return ComponentAssignment(
+            counts=counts,
+            components=components,
+            propeller_direction=SimplifiedSelector._get_propeller_info(d_concrete=d_concrete),
+        )
+
+    def with_component(self, component: LibraryComponent | None) -> ComponentAssignment:
+        """Assignment with every component of the type of 'component' replaced, unchanged if None"""
+        if component is None:
+            return self
+        return replace(self, components={**self.components, component.comp_type.id: component})
+
+    def component_list(self) -> dict:
+        """Same format as SimplifiedSelector.dconcrete_component_lists"""
+        return {c_type: {"comp": [comp], "lib": [comp]} for c_type, comp in self.components.items()}
+
+    @property
+    def ids(self) -> dict[str, str]:
+        return {c_type: comp.id for c_type, comp in self.components.items()}
+
+
+@dataclass
+class RestartResult:
+    restart: int
+    """Motor score of select_single_iterate, 0 if no motor was found"""
+    score: float
+    """Component ids of the best round of the restart, by type"""
+    components: dict[str, str] = field(default_factory=dict)
+    n_rounds: int = 0
+    time: float = 0
+
+
+"""Selector and best score shared by the restarts of each worker process, set up once by '_init_worker'"""
+_worker_selector: SimplifiedSelector | None = None
+_worker_best_score = None
+
+
+def _init_worker(selector_class: type, library: Library, table_dict: dict, property_store: PropertyStore, best_score):
+    global _worker_selector, _worker_best_score
+    _worker_selector = selector_class()
+    _worker_selector.set_library(library=library, table_dict=table_dict, property_store=property_store)
+    _worker_best_score = best_score
+
+
+def _run_restart(
+    restart: int,
+    counts: dict,
+    ids: dict,
+    propeller_direction: list | None,
+    n_rounds: int,
+    body_weight: float,
+    deadline: float | None,
+):
+    """The assignment is sent as component ids, the library of the worker has the components"""
+    library = _worker_selector._c_library
+    assignment = ComponentAssignment(
+        counts=counts,
+        components={c_type: library.components[c_id] for c_type, c_id in ids.items()},
+        propeller_direction=propeller_direction,
+    )
+    return _worker_selector.run_restart(
+        restart=restart,
+        assignment=assignment,
+        n_rounds=n_rounds,
+        body_weight=body_weight,
+        deadline=deadline,
+        best_score=_worker_best_score,
+    )
+
 
 class SimplifiedSelector:
     def __init__(self):
-        pass
+        self.local_search_result: RestartResult | None = None
 
-    def set_library(self, library: Library):
+    def set_library(
+        self, library: Library, table_dict: dict | None = None, property_store: PropertyStore | None = None
+    ):
+        """table_dict and property_store are built from the library if not given"""
         self._c_library = library
-        self._table_dict = parsing_prop_table(library=self._c_library)
+        self._table_dict = table_dict if table_dict is not None else parsing_prop_table(library=self._c_library)
+        if property_store is None:
+            property_store = PropertyStore(c_library=self._c_library, table_dict=self._table_dict)
+        self._property_store = property_store
 
     def select_all(self, d_concrete: DConcrete, verbose: bool = True, body_weight: float = 0):
         num_batteries, num_propellers, num_motors, num_batt_controllers = self.count_components(d_concrete=d_concrete)
-        self._uav_contract = UAVContract(table_dict=self._table_dict, num_motor=num_motors, num_battery=num_batteries)
+        self._uav_contract = UAVContract(
+            table_dict=self._table_dict,
+            num_motor=num_motors,
+            num_battery=num_batteries,
+            property_store=self._property_store,
+        )
         self._uav_contract.set_rpm(rpm=18000)
         self._uav_contract.set_speed(v=19)
         self._uav_contract.set_contract_simplified()
@@ -44,7 +162,12 @@ class SimplifiedSelector:
     def check(self, d_concrete: DConcrete, verbose: bool = True, body_weight: float = 0):
         num_batteries, num_propellers, num_motors, num_batt_controllers = self.count_components(d_concrete=d_concrete)
         component_list = self.dconcrete_component_lists(d_concrete=d_concrete)
-        self._uav_contract = UAVContract(table_dict=self._table_dict, num_motor=num_motors, num_battery=num_batteries)
+        self._uav_contract = UAVContract(
+            table_dict=self._table_dict,
+            num_motor=num_motors,
+            num_battery=num_batteries,
+            property_store=self._property_store,
+        )
         self._uav_contract.set_rpm(rpm=10000)
         self._uav_contract.set_speed(v=19)
         self._uav_contract.set_contract_simplified()
@@ -93,52 +216,98 @@ class SimplifiedSelector:
         contract_system.set_objective(expr=obj_expr, value=obj_val, evaluate_fn=obj_fn)
 
     def select_single_iterate(self, d_concrete: DConcrete, comp_type: str, verbose=True, body_weight=0):
+        return self.select_single_iterate_assignment(
+            assignment=ComponentAssignment.from_design(d_concrete),
+            comp_type=comp_type,
+            verbose=verbose,
+            body_weight=body_weight,
+        )
+
+    def select_single_iterate_assignment(
+        self, assignment: ComponentAssignment, comp_type: str, verbose=True, body_weight=0
+    ):
         # for a battery, we want to check if the largest voltage is OK for the system
-        num_batteries, num_propellers, num_motors, num_batt_controllers = self.count_components(d_concrete=d_concrete)
-        component_list = self.dconcrete_component_lists(d_concrete=d_concrete)
-        self._uav_contract = UAVContract(table_dict=self._table_dict, num_motor=num_motors, num_battery=num_batteries)
-        propeller_info = self._get_propeller_info(d_concrete=d_concrete)
-        self._uav_contract.set_contract_simplified(propeller_direction=propeller_info)
+        num_batteries = assignment.counts.get("Battery", 0)
+        num_motors = assignment.counts.get("Motor", 0)
+        component_list = assignment.component_list()
+        self._uav_contract = UAVContract(
+            table_dict=self._table_dict,
+            num_motor=num_motors,
+            num_battery=num_batteries,
+            property_store=self._property_store,
+        )
+        self._uav_contract.set_contract_simplified(propeller_direction=assignment.propeller_direction)
 
         comps = []
         best_comp = None
         best_diff = 0  # float("inf")
         history = {}
-        for comp in list(self._c_library.components_in_type[comp_type]):
-            # for batt in [self._c_library.components["TurnigyGraphene1000mAh2S75C"]]:
-            # for comp in [self._c_library.components["Tattu25C10000mAh4S1P"]]:
-            # self._uav_contract.set_rpm(rpm=18000)
-            # self._uav_contract.set_speed(v=19)
-
-            self._uav_contract.set_rpm(rpm=5000)
-            self._uav_contract.set_rpm_upper(rpm=18000)
-            self._uav_contract.set_speed(v=1)
-            self._uav_contract.set_speed_upper(v=25)
-            component_list[comp_type]["lib"] = [comp] * len(component_list[comp_type]["lib"])
-            contract_system = self.build_contract_system(verbose=verbose, component_list=component_list, use_range=True)
-            sys_inst, sys_connection = self._set_check_max_voltage_system_contract(body_weight=body_weight)
-            is_refine = contract_system.check_refinement(sys_inst=sys_inst, sys_connection_map=sys_connection)
-            # is_refine = contract_system.find_behavior(sys_inst=sys_inst, sys_connection_map=sys_connection)
+        candidates = list(self._c_library.components_in_type[comp_type])
+        # for batt in [self._c_library.components["TurnigyGraphene1000mAh2S75C"]]:
+        # for comp in [self._c_library.components["Tattu25C10000mAh4S1P"]]:
+        # self._uav_contract.set_rpm(rpm=18000)
+        # self._uav_contract.set_speed(v=19)
+
+        """The composition is the same for every candidate: each system is built once with the comp_type instance left
+        free, and the candidates are checked incrementally"""
+        self._uav_contract.set_rpm(rpm=5000)
+        self._uav_contract.set_rpm_upper(rpm=18000)
+        self._uav_contract.set_speed(v=1)
+        self._uav_contract.set_speed_upper(v=25)
+        candidates = self.prefilter(
+            comp_type=comp_type,
+            component_list=component_list,
+            candidates=candidates,
+            num_motors=num_motors,
+            body_weight=body_weight,
+        )
+        refine_system = self.build_contract_system(
+            verbose=verbose, component_list=component_list, use_range=True, swap_type=comp_type
+        )
+        sys_inst, sys_connection = self._set_check_max_voltage_system_contract(body_weight=body_weight)
+        refine_system.set_incremental(
+            sys_inst=sys_inst, sys_connection_map=sys_connection, swap_inst=refine_system.get_instance(comp_type)
+        )
+        behavior_system = self.build_contract_system(
+            verbose=verbose, component_list=component_list, use_range=True, swap_type=comp_type
+        )
+        behavior_sys_inst, behavior_sys_connection = self._set_check_max_voltage_system_contract(
+            body_weight=body_weight
+        )
+        behavior_system.set_incremental(
+            sys_inst=behavior_sys_inst,
+            sys_connection_map=behavior_sys_connection,
+            swap_inst=behavior_system.get_instance(comp_type),
+            refinement=False,
+        )
+        for comp in candidates:
+            properties = self._uav_contract.hackathon_property_interface_fn_aggregated(comp, use_rpm_v_range=True)
+            is_refine = refine_system.check_candidate(properties)
             # compute something....
 
             if is_refine:
-                contract_system.set_solver(Z3Interface())
-                is_find = contract_system.find_behavior(sys_inst=sys_inst, sys_connection_map=sys_connection)
-                thrust = contract_system.get_metric_inst(inst=sys_inst, port_property_name="thrust_sum")
-                weight = contract_system.get_metric_inst(inst=sys_inst, port_property_name="weight_sum")
+                is_find = behavior_system.check_candidate(properties)
+                thrust = behavior_system.get_metric_inst(inst=behavior_sys_inst, port_property_name="thrust_sum")
+                weight = behavior_system.get_metric_inst(inst=behavior_sys_inst, port_property_name="weight_sum")
                 obj = thrust - weight
                 comps.append((comp, obj))
 
+        self._uav_contract.set_rpm(rpm=10000)
+        self._uav_contract.set_speed(v=19)
+        contract_system = self.build_contract_system(
+            verbose=verbose, component_list=component_list, use_range=False, swap_type=comp_type
+        )
+        sys_inst, sys_connection = self._set_check_balance_system_contract(body_weight=body_weight)
+        contract_system.set_incremental(
+            sys_inst=sys_inst,
+            sys_connection_map=sys_connection,
+            swap_inst=contract_system.get_instance(comp_type),
+            refinement=False,
+        )
         for comp, val in comps:
             print(comp.id, end="")
-            self._uav_contract.set_rpm(rpm=10000)
-            self._uav_contract.set_speed(v=19)
-            component_list[comp_type]["lib"] = [comp] * len(component_list[comp_type]["lib"])
-            contract_system = self.build_contract_system(
-                verbose=verbose, component_list=component_list, use_range=False
-            )
-            sys_inst, sys_connection = self._set_check_balance_system_contract(body_weight=body_weight)
-            is_find = contract_system.find_behavior(sys_inst=sys_inst, sys_connection_map=sys_connection)
+            properties = self._uav_contract.hackathon_property_interface_fn_aggregated(comp, use_rpm_v_range=False)
+            is_find = contract_system.check_candidate(properties)
             if is_find:
                 V = contract_system.get_metric_inst(inst=sys_inst, port_property_name="V_motor")
                 I = contract_system.get_metric(inst_name="Motor", port_property_name="I_motor")
@@ -158,6 +327,34 @@ class SimplifiedSelector:
             print("Best: ", best_comp.id, best_diff)
         return best_comp, best_diff
 
+    def prefilter(
+        self,
+        comp_type: str,
+        component_list: dict,
+        candidates: list[LibraryComponent],
+        num_motors: int,
+        body_weight: float,
+    ) -> list[LibraryComponent]:
+        """Drop the candidates that cannot pass the max voltage check of select_single_iterate, without any solver"""
+        if len(candidates) == 0:
+            return candidates
+        properties = {}
+        for type_str in ["Propeller", "Motor", "Battery"]:
+            components = candidates if type_str == comp_type else [component_list[type_str]["lib"][0]]
+            properties[type_str] = self._uav_contract.property_arrays_aggregated(components, use_rpm_v_range=True)
+        propeller, motor, battery = properties["Propeller"], properties["Motor"], properties["Battery"]
+        weight = (battery["W_batt"][0] + body_weight + propeller["W_prop"][0] + motor["W_motor"][0]) * 9.81
+        point = operating_point(propeller, motor, weight, thrust_multiplier=self._uav_contract.thrust_multiplier)
+        feasible = motor_propeller_feasible(propeller, motor, point)
+        feasible &= ~exceeds(point["V_motor"], battery["V_battery"][1])
+        feasible &= ~exceeds(point["I_motor"] * num_motors / 0.95, battery["I_max"][1])
+        feasible = np.broadcast_to(feasible, (len(candidates),))
+
+        stats = PrefilterStats()
+        stats.update(feasible)
+        print(f"{comp_type} {stats}")
+        return [comp for comp, is_feasible in zip(candidates, feasible) if is_feasible]
+
     def _set_check_max_voltage_system_contract(self, body_weight: float):
         system_port_name_list = [
             ComponentInterface(name="rho", sort="real"),
@@ -297,15 +494,15 @@ class SimplifiedSelector:
         system_instance = ContractInstance(template=system_contract, instance_name="System")
         return system_instance, sys_connection_map
 
-    def build_contract_system(self, verbose, component_list, use_range):
+    def build_contract_system(self, verbose, component_list, use_range, swap_type: str | None = None):
+        """swap_type: the instance of this type is left without component, to be swapped with check_candidate"""
         contract_system = ContractSystem(verbose=verbose)
-        contract_system.set_solver(Z3Interface())
         # Propeller
         contract_type_list = ["Propeller", "Motor", "Battery", "BatteryController"]
         contract_insts = {}
         for type_str in contract_type_list:
             properties = None
-            if component_list is not None:
+            if component_list is not None and type_str != swap_type:
                 properties = self._uav_contract.hackathon_property_interface_fn_aggregated(
                     component_list[type_str]["lib"][0], use_rpm_v_range=use_range
                 )
@@ -420,57 +617,143 @@ class SimplifiedSelector:
 
         return component_dict
 
-    def random_local_search(self, d_concrete: DConcrete):
-        import random
-
-        random.seed(5)
-
-        best_score = 0
-        best_prop = None
-        best_batt = None
-        best_motor = None
+    def random_local_search(
+        self,
+        d_concrete: DConcrete,
+        n_restarts: int = 20,
+        n_rounds: int = 3,
+        max_workers: int | None = None,
+        time_budget: float | None = None,
+        seed: int = 5,
+        body_weight: float = 2.0,
+        start_components: dict[str, str] | None = None,
+    ):
+        """Multi-start coordinate descent on the propeller, the motor and the battery of the design.
+        The first restart starts from the components of the design, with the library components of 'start_components'
+        ({type: id}, e.g. the choice of a similar design) if given, the others from random components drawn from
+        'seed'. Each restart runs up to 'n_rounds' rounds of select_single_iterate on the three types, and stops early
+        when a round leaves the components unchanged (the next rounds would find the same ones).
+        The restarts run on a pool of 'max_workers' processes (in this process if 1) and share the best score.
+        After 'time_budget' seconds no new round is started. The design is updated with the best components, the best
+        restart is kept in self.local_search_result."""
+        start = ComponentAssignment.from_design(d_concrete)
+        for c_type, c_id in (start_components or {}).items():
+            if c_type in start.components and c_id in self._c_library.components:
+                start = start.with_component(self._c_library.components[c_id])
+        rng = random.Random(seed)
         batteries = list(self._c_library.components_in_type["Battery"])
         propellers = list(self._c_library.components_in_type["Propeller"])
         motors = list(self._c_library.components_in_type["Motor"])
-        for j in range(20):
-            print(j)
-            for i in range(3):
-                print(i)
-                propeller, _ = self.select_single_iterate(
-                    d_concrete=d_concrete, comp_type="Propeller", body_weight=2.0, verbose=False
-                )
-                self.replace_with_component(design_concrete=d_concrete, propeller=propeller)
-                motor, score = self.select_single_iterate(
-                    d_concrete=d_concrete, comp_type="Motor", body_weight=2.0, verbose=False
-                )
-                self.replace_with_component(design_concrete=d_concrete, motor=motor)
-                battery, _ = self.select_single_iterate(
-                    d_concrete=d_concrete, comp_type="Battery", body_weight=2.0, verbose=False
-                )
-                self.replace_with_component(design_concrete=d_concrete, battery=battery)
-                # self.check(d_concrete=d_concrete, verbose=True, body_weight=1.0)
-
-                if score > best_score:
-                    best_prop = propeller
-                    best_motor = motor
-                    best_batt = battery
-                    best_score = score
-            # get random components
-            battery = random.choice(batteries)
-            print(type(battery))
-            motor = random.choice(motors)
-            propeller = random.choice(propellers)
-            self.replace_with_component(design_concrete=d_concrete, motor=motor, battery=battery, propeller=propeller)
+        starts = [start]
+        for _ in range(n_restarts - 1):
+            battery, motor, propeller = rng.choice(batteries), rng.choice(motors), rng.choice(propellers)
+            starts.append(start.with_component(battery).with_component(motor).with_component(propeller))
+        deadline = time.time() + time_budget if time_budget is not None else None
+
+        best: RestartResult | None = None
+        start_time = time.time()
+        for result in self._run_restarts(starts, n_rounds, body_weight, deadline, max_workers):
+            if result.score > 0 and (best is None or result.score > best.score):
+                best = result
+            print(
+                f"Restart {result.restart}: score {result.score} in {result.n_rounds} rounds ({result.time:.1f} s), "
+                f"best {best.score if best is not None else None}, {time.time() - start_time:.1f} s elapsed"
+            )
+        self.local_search_result = best
+        if best is None:
+            print("No components found")
+            return None, None, None
+        best_motor, best_batt, best_prop = [
+            self._c_library.components[best.components[c_type]] if c_type in best.components else None
+            for c_type in ["Motor", "Battery", "Propeller"]
+        ]
         print("Best:")
-        print(best_prop.id)
-        print(best_motor.id)
-        print(best_batt.id)
-        print("Best score: ", best_score)
+        for component in [best_prop, best_motor, best_batt]:
+            print(component.id if component is not None else None)
+        print("Best score: ", best.score)
         self.replace_with_component(
             design_concrete=d_concrete, motor=best_motor, battery=best_batt, propeller=best_prop
         )
         return best_motor, best_batt, best_prop
 
+    def _run_restarts(
+        self,
+        starts: list[ComponentAssignment],
+        n_rounds: int,
+        body_weight: float,
+        deadline: float | None,
+        max_workers: int | None,
+    ) -> Iterator[RestartResult]:
+        best_score = Value("d", 0.0)
+        if max_workers == 1:
+            for restart, assignment in enumerate(starts):
+                yield self.run_restart(restart, assignment, n_rounds, body_weight, deadline, best_score)
+            return
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(type(self), self._c_library, self._table_dict, self._property_store, best_score),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _run_restart,
+                    restart,
+                    assignment.counts,
+                    assignment.ids,
+                    assignment.propeller_direction,
+                    n_rounds,
+                    body_weight,
+                    deadline,
+                )
+                for restart, assignment in enumerate(starts)
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def run_restart(
+        self,
+        restart: int,
+        assignment: ComponentAssignment,
+        n_rounds: int,
+        body_weight: float,
+        deadline: float | None,
+        best_score,
+    ) -> RestartResult:
+        """Coordinate descent from 'assignment'. The score of a round is the one of its motor selection, the best
+        round is kept. best_score is a multiprocessing.Value with the best score of all the restarts: when the next
+        round would end after the deadline, a restart behind it stops instead of delaying the others"""
+        start_time = time.time()
+        result = RestartResult(restart=restart, score=0)
+        for i in range(n_rounds):
+            if deadline is not None and time.time() > deadline:
+                break
+            previous = assignment.ids
+            score = 0
+            for c_type in search_types:
+                component, comp_score = self.select_single_iterate_assignment(
+                    assignment=assignment, comp_type=c_type, body_weight=body_weight, verbose=False
+                )
+                assignment = assignment.with_component(component)
+                if c_type == "Motor":
+                    score = comp_score
+            result.n_rounds += 1
+            if score > result.score:
+                result.score = score
+                """The components of the assignment, also those of the types for which no component was selected"""
+                ids = assignment.ids
+                result.components = {c_type: ids[c_type] for c_type in search_types if c_type in ids}
+                with best_score.get_lock():
+                    best_score.value = max(best_score.value, score)
+            print(f"Restart {restart}, round {i}: score {score}, best of all restarts {best_score.value}")
+            if assignment.ids == previous:
+                break
+            round_time = (time.time() - start_time) / result.n_rounds
+            if deadline is not None and time.time() + round_time > deadline and result.score < best_score.value:
+                print(f"Restart {restart} stopped: behind the best of all restarts and no time for another round")
+                break
+        result.time = time.time() - start_time
+        return result
+
     def runTest(self):
         self._c_library, self._seed_designs = parse_library_and_seed_designs()
         self.set_library(library=self._c_library)
@@ -530,7 +813,7 @@ def draw_result(history: dict):
         if add_new:
             pareto_fronts.append((name, obj1, obj2))
 
-    for (name, obj1, obj2) in pareto_fronts:
+    for name, obj1, obj2 in pareto_fronts:
         names.append(name)
         xs.append(obj1)
         ys.append(obj2)
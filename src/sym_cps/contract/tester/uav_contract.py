@@ -1,20 +1,29 @@
 import math
 
+from sym_cps.contract.prefilter import property_arrays
+from sym_cps.contract.property_store import PropertyStore
 from sym_cps.contract.tool.component_interface import ComponentInterface
 from sym_cps.contract.tool.contract_template import ContractTemplate
 from sym_cps.representation.library.elements.library_component import LibraryComponent
 
 
 class UAVContract(object):
-    def __init__(self, table_dict: dict, num_motor=None, num_battery=None):
+    def __init__(self, table_dict: dict, num_motor=None, num_battery=None, property_store: PropertyStore | None = None):
         self._contracts = {}
         self._table_dict = table_dict
+        """With a property store, the properties of the components in the store are read from its arrays"""
+        self._property_store = property_store
         self.set_num(num_motor=num_motor, num_battery=num_battery)
         # self.set_contract()
         self._rpm_static = 10000
         self._rpm_upper = 18000
         self._speed = 1
         self._speed_upper = 50
+        self._thrust_multiplier = 1.0
+
+    @property
+    def thrust_multiplier(self) -> float:
+        return self._thrust_multiplier
 
     def get_contract(self, contract_name: str) -> ContractTemplate:
         return self._contracts[contract_name]
@@ -97,6 +106,7 @@ class UAVContract(object):
         1.0 means full facing up. other number means the ratio that the thrust is used for thrust
         """
         thrust_multiplier = sum(propeller_direction)
+        self._thrust_multiplier = thrust_multiplier
         propeller_port_list = [
             ComponentInterface(name="rho", sort="real"),
             ComponentInterface(name="omega_prop", sort="real"),
@@ -279,7 +289,35 @@ class UAVContract(object):
         elif component.comp_type.id == "BatteryController":
             return {}
 
+    def property_arrays_aggregated(self, components: list[LibraryComponent], use_rpm_v_range: bool = False) -> dict:
+        """{name: (lower, upper)} arrays of the aggregated properties of components of the same type"""
+        comp_type = components[0].comp_type.id
+        if self._property_store is None or not all(comp in self._property_store for comp in components):
+            return property_arrays(
+                [self.hackathon_property_interface_fn_aggregated(comp, use_rpm_v_range) for comp in components]
+            )
+        component_ids = [comp.id for comp in components]
+        if comp_type == "Propeller":
+            return self._property_store.interval_arrays(
+                comp_type,
+                component_ids,
+                rpm=self._rpm_static,
+                rpm2=self._rpm_upper,
+                v=self._speed,
+                v2=self._speed_upper,
+                num_motor=self._num_motor,
+                use_rpm_v_range=use_rpm_v_range,
+            )
+        elif comp_type == "Battery":
+            return self._property_store.interval_arrays(comp_type, component_ids, num_battery=self._num_battery)
+        elif comp_type == "Motor":
+            return self._property_store.interval_arrays(comp_type, component_ids, num_motor=self._num_motor)
+
     def hackthon_get_propeller_property(self, propeller, table_dict, rpm, rpm2, v, v2, num_motor, use_rpm_v_range):
+        if self._property_store is not None and propeller in self._property_store:
+            return self._property_store.propeller_property(
+                propeller.id, rpm, rpm2, v, v2, num_motor=num_motor, use_rpm_v_range=use_rpm_v_range
+            )
         # ports get value
 
         diameter: float = propeller.properties["DIAMETER"].value / 1000
@@ -304,6 +342,8 @@ class UAVContract(object):
         }
 
     def hackthon_get_motor_property(self, motor, num_motor):
+        if self._property_store is not None and motor in self._property_store:
+            return self._property_store.motor_property(motor.id, num_motor=num_motor)
         R_w: float = motor.properties["INTERNAL_RESISTANCE"].value / 1000  # Ohm
         K_t: float = motor.properties["KT"].value
         K_v: float = motor.properties["KV"].value * (2 * math.pi) / 60  # rpm/V to rad/(V-sec)
@@ -325,6 +365,8 @@ class UAVContract(object):
         }
 
     def hackthon_get_battery_property(self, battery, num_battery):
+        if self._property_store is not None and battery in self._property_store:
+            return self._property_store.battery_property(battery.id, num_battery=num_battery)
         capacity: float = battery.properties["CAPACITY"].value * num_battery / 1000  # mAh -> Ah
         W_batt: float = battery.properties["WEIGHT"].value * num_battery
         V_battery: float = battery.properties["VOLTAGE"].value
@@ -1,12 +1,14 @@
 from sym_cps.contract.tool.component_interface import ComponentInterface
 from sym_cps.contract.tool.contract_instance import ContractInstance
+from sym_cps.contract.tool.solver.milp_interface import MilpInterface
 from sym_cps.contract.tool.solver.solver_interface import SolverInterface
 
 
 class ContractSystem(object):
     """Define the system in horizontal view, in this view, contracts are interacting using their interface"""
 
-    def __init__(self, verbose=True):
+    def __init__(self, verbose=True, solver_interface: SolverInterface | None = None):
+        """The default solver interface checks the linear systems with MILP and the others with z3, see MilpInterface"""
         self._c_instance: dict[str, ContractInstance] = {}  # instance name ->  #instance
         # self._clauses: list = []
         self._constraint_clauses: list = []  # list to make compositon
@@ -15,11 +17,13 @@ class ContractSystem(object):
         self._selection_candidate: dict[ContractInstance, dict] = {}  # map each instance to all available choice
         # the tuple contains {z3 var: actual component}
         # self._model = None
-        self._solver: SolverInterface = None
+        self._solver: SolverInterface = solver_interface if solver_interface is not None else MilpInterface()
         self._objective_expr = None
         self._objective_val = None
         self._objective_fn = None
         self._print_verbose = verbose
+        self._swap_inst: ContractInstance | None = None  # instance whose properties are swapped by check_candidate
+        self._swap_refinement: bool = False
 
     def set_solver(self, solver_interface: SolverInterface):
         self._solver = solver_interface
@@ -82,6 +86,107 @@ class ContractSystem(object):
             self.print_debug("UNSAT")
         return is_sat
 
+    def set_incremental(
+        self,
+        sys_inst: ContractInstance,
+        sys_connection_map: dict[str, list[tuple[str, str]]],
+        swap_inst: ContractInstance,
+        refinement: bool = True,
+    ):
+        """Assert the composition once in the solver, leaving the properties of swap_inst free.
+        Each call of check_candidate then only adds the properties of one component in a push/pop scope, which is
+        equivalent to check_refinement (refinement=True) or find_behavior (refinement=False) on a system built with
+        that component, without rebuilding the system and the solver for every candidate.
+        """
+        self.print_debug("Incremental System Invoked!")
+        if not swap_inst.is_selectable:
+            raise Exception(f"Instance {swap_inst.instance_name} has a concrete component and cannot be swapped")
+        self._clear_clauses()
+        sys_inst.build_clauses(solver_interface=self._solver)
+        if refinement:
+            self._build_refinement_system(sys_inst=sys_inst)
+        else:
+            self._build_find_behavior_system(sys_inst=sys_inst)
+        self._build_connection_one_to_multi(sys_inst, sys_connection_map=sys_connection_map)
+        self._solver.add_conjunction_clause(self._guarantee_clauses)
+        self._solver.add_conjunction_clause(self._system_clauses)
+        if refinement:
+            self._solver.add_conjunction_clause(
+                self._solver.clause_not(self._solver.clause_and(*self._constraint_clauses))
+            )
+        else:
+            self._solver.add_conjunction_clause(self._constraint_clauses)
+        self._swap_inst = swap_inst
+        self._swap_refinement = refinement
+
+    def check_candidate(self, component_properties: dict) -> bool:
+        """Check the system set by set_incremental with swap_inst instantiated with component_properties.
+        The model stays available for get_metric until the next check."""
+        inst = self._swap_inst
+        if inst is None:
+            raise Exception("set_incremental must be called before check_candidate")
+        self._solver.push()
+        self._solver.add_conjunction_clause(self._property_clauses(inst, component_properties))
+        is_sat = self._solver.check()
+        self._solver.pop()
+        self.print_debug(f"Candidate {component_properties.get('name', '')}: {'SAT' if is_sat else 'UNSAT'}")
+        if self._swap_refinement:
+            return not is_sat
+        return is_sat
+
+    def check_refinement_all(
+        self,
+        sys_inst: ContractInstance,
+        sys_connection_map: dict[str, list[tuple[str, str]]],
+        inst: ContractInstance,
+        candidates: list[dict],
+    ) -> tuple[list[dict], dict[str, dict]]:
+        """check_refinement of the system with each of the candidates as the component of inst, in one solver session.
+        Each candidate is encoded with a selection variable as in set_selection, so a model is a counterexample of the
+        selected candidates, which are then blocked, until no candidate has a counterexample.
+        Returns the candidates refining the system contract and the counterexample behavior (see get_behavior) of
+        each other candidate by candidate name.
+        """
+        self.print_debug("Check Refinement All Invoked!")
+        if not inst.is_selectable:
+            raise Exception(f"Instance {inst.instance_name} has a concrete component and cannot be checked")
+        self._clear_clauses()
+        sys_inst.build_clauses(solver_interface=self._solver)
+        self._build_refinement_system(sys_inst=sys_inst)
+        self._build_connection_one_to_multi(sys_inst, sys_connection_map=sys_connection_map)
+        self._solver.push()
+        self._solver.add_conjunction_clause(self._guarantee_clauses)
+        self._solver.add_conjunction_clause(self._system_clauses)
+        self._solver.add_conjunction_clause(self._solver.clause_not(self._solver.clause_and(*self._constraint_clauses)))
+        selection_dict = {}
+        for candidate in candidates:
+            use_v = self._solver.get_fresh_variable(
+                var_name=f"{inst.instance_name}_check_{candidate['name']}", sort="boolean"
+            )
+            self._solver.add_conjunction_clause(
+                self._solver.clause_implication(
+                    use_v, self._solver.clause_and(*self._property_clauses(inst, candidate))
+                )
+            )
+            selection_dict[use_v] = candidate
+        self._solver.add_conjunction_clause(self._solver.clause_or(*selection_dict.keys()))
+        counterexamples = {}
+        while len(selection_dict) > 0 and self._solver.check():
+            behavior = self.get_behavior([sys_inst] + list(self._c_instance.values()))
+            """Reading the selection variables is slow, the candidates with the properties of the model are read first.
+            Candidates selected together share the properties of the counterexample, the others are found later"""
+            properties = {prop.name: behavior[inst.instance_name][prop.name] for prop in inst.property_list}
+            ordered = sorted(selection_dict.items(), key=lambda item: not self._has_properties(item[1], properties))
+            use_v, cand = next((v, cand) for v, cand in ordered if self._solver.get_model_for_var(var=v))
+            del selection_dict[use_v]
+            counterexamples[cand["name"]] = behavior
+            self.print_debug(f"Candidate {cand['name']}: counterexample")
+            self._solver.add_conjunction_clause(self._solver.clause_not(use_v))
+        self._solver.pop()
+        refining = [cand for cand in candidates if cand["name"] not in counterexamples]
+        self.print_debug(f"{len(refining)} of {len(candidates)} candidates refine the system")
+        return refining, counterexamples
+
     def select(
         self,
         sys_inst: ContractInstance,
@@ -103,6 +208,7 @@ class ContractSystem(object):
         self._solver.add_conjunction_clause(self._constraint_clauses)
         self._solver.add_conjunction_clause(self._system_clauses)
         self._solver.add_conjunction_clause(self._solver.clause_gt(objective_clause, self._objective_val))
+        self._solver.set_objective_hint(objective_clause)
         # set timeout
         self._solver.set_timeout(timeout_millisecond=timeout_milliseconds)
         is_sat = self._solver.check()
@@ -192,24 +298,40 @@ class ContractSystem(object):
             use_v = self._solver.get_fresh_variable(
                 var_name=f"{inst.instance_name}_use_{candidate_name}", sort="boolean"
             )
-            assignment_constraint = [
-                self._solver.clause_equal(inst.get_property_var(prop.name), candidate[prop.name])
-                for prop in inst.property_list
-            ]
-            self._system_clauses.append(
-                self._solver.clause_implication(use_v, self._solver.clause_and(*assignment_constraint))
-            )
+            assignment = [(inst.get_property_var(prop.name), candidate[prop.name]) for prop in inst.property_list]
+            self._system_clauses.append(self._solver.clause_choice(use_v, assignment))
             selection_dict[use_v] = candidate
 
         self._selection_candidate[inst] = selection_dict
 
-        # constraint that no multiple chosen
-        for v, cand in selection_dict.items():
-            not_v2s = [self._solver.clause_not(v2) for v2 in selection_dict.keys() if v.get_id() != v2.get_id()]
-            self._system_clauses.append(self._solver.clause_implication(v, self._solver.clause_and(*not_v2s)))
+        # select exactly one
+        self._system_clauses.extend(self._solver.clause_exactly_one(*selection_dict.keys()))
 
-        # select one
-        self._system_clauses.append(self._solver.clause_or(*(selection_dict.keys())))
+    def _property_clauses(self, inst: ContractInstance, component_properties: dict) -> list:
+        """Clauses fixing the properties of inst, a tuple value is the range (lower, upper) of the property"""
+        clauses = []
+        for prop in inst.property_list:
+            value = component_properties[prop.name]
+            prop_var = inst.get_property_var(prop.name)
+            if isinstance(value, tuple):
+                clauses.append(self._solver.clause_ge(prop_var, value[0]))
+                clauses.append(self._solver.clause_ge(value[1], prop_var))
+            else:
+                clauses.append(self._solver.clause_equal(prop_var, prop.produce_constant(self._solver, value)))
+        return clauses
+
+    @staticmethod
+    def _has_properties(component_properties: dict, properties: dict, tolerance: float = 1e-9) -> bool:
+        """Whether the property values of a model are the ones of the component, or in its ranges"""
+        for name, value in properties.items():
+            if name not in component_properties:
+                return False
+            bounds = component_properties[name]
+            if not isinstance(bounds, tuple):
+                bounds = (bounds, bounds)
+            if not bounds[0] - tolerance <= value <= bounds[1] + tolerance:
+                return False
+        return True
 
     def set_objective(self, expr, value, evaluate_fn):
         self._objective_expr = expr
@@ -231,6 +353,16 @@ class ContractSystem(object):
         var = inst.get_var(port_property_name=port_property_name)
         return self._solver.get_model_for_var(var=var)
 
+    def get_behavior(self, insts: list[ContractInstance]) -> dict[str, dict]:
+        """Values of the ports and properties of each instance in the current model, by instance name"""
+        return {
+            inst.instance_name: {
+                name: self.get_metric_inst(inst=inst, port_property_name=name)
+                for name in [port.name for port in inst.port_list] + [prop.name for prop in inst.property_list]
+            }
+            for inst in insts
+        }
+
     def get_component_selection(self) -> dict:  # ContractInstance to Candidate Component
         ret = {}
         for inst, selection_dict in self._selection_candidate.items():
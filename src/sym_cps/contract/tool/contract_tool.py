@@ -2,6 +2,8 @@ from typing import Callable
 
 import z3
 
+from sym_cps.contract.tool.objective_search import OptimizationTrace, maximize_objective
+
 
 class ContractInstance(object):
     def __init__(
@@ -69,8 +71,17 @@ class ContractInstance(object):
 
 class ContractTemplate(object):
     def __init__(
-        self, name: str, port_name_list: list, property_name_list: list, guarantee: Callable, assumption: Callable
+        self,
+        name: str,
+        port_name_list: list,
+        property_name_list: list,
+        guarantee: Callable,
+        assumption: Callable,
+        cache_clauses: bool = True,
     ):
+        """With cache_clauses, the assumption and guarantee functions are called once for each set of keyword arguments
+        of 'instantiate', on placeholder variables, and the instances are built by substituting their own variables.
+        The functions must then only depend on 'vs' and the keyword arguments."""
         self._port_name_list = port_name_list
         self._property_name_list = property_name_list
         self._guarantee = guarantee
@@ -78,13 +89,21 @@ class ContractTemplate(object):
         self._count = 0
         self._instance_list: list[ContractInstance] = []
         self._name = name
+        self._cache_clauses = cache_clauses
+        self._compiled: dict[tuple, tuple[dict, list, list]] = {}  # kwargs -> placeholder variables, A, G
 
     def instantiate(self, instance_name="", **kwargs) -> ContractInstance:
         """Instantiate a contract"""
-        vs = {v: z3.Real(f"{self._name}_{self._count}_{instance_name}_{v}") for v in self._port_name_list}
-        vs.update({v: z3.Real(f"{self._name}_{self._count}_{instance_name}_{v}") for v in self._property_name_list})
-        A = self._assumption(vs, **kwargs)
-        G = self._guarantee(vs, **kwargs)
+        vs = _reals(f"{self._name}_{self._count}_{instance_name}_", self._port_name_list + self._property_name_list)
+        compiled = self._compile(kwargs) if self._cache_clauses else None
+        if compiled is None:
+            A = self._assumption(vs, **kwargs)
+            G = self._guarantee(vs, **kwargs)
+        else:
+            placeholders, A, G = compiled
+            substitution = _Substitution([placeholders[v] for v in vs], list(vs.values()))
+            A = [substitution.apply(clause) for clause in A]
+            G = [substitution.apply(clause) for clause in G]
         instance = ContractInstance(
             name=instance_name,
             port_name_list=self._port_name_list,
@@ -99,10 +118,66 @@ class ContractTemplate(object):
         self._count += 1
         return instance
 
+    def _compile(self, kwargs: dict) -> tuple[dict, list, list] | None:
+        """Placeholder variables and clauses of the template for the keyword arguments, None if they are not hashable"""
+        try:
+            key = tuple(sorted(kwargs.items()))
+            hash(key)
+        except TypeError:
+            return None
+        if key not in self._compiled:
+            placeholders = _reals(f"{self._name}_template_", self._port_name_list + self._property_name_list)
+            self._compiled[key] = (
+                placeholders,
+                self._assumption(placeholders, **kwargs),
+                self._guarantee(placeholders, **kwargs),
+            )
+        return self._compiled[key]
+
     @property
     def name(self) -> str:
         return self._name
 
+    @property
+    def port_name_list(self) -> list:
+        return self._port_name_list
+
+    @property
+    def property_name_list(self) -> list:
+        return self._property_name_list
+
+    @property
+    def guarantee(self) -> Callable:
+        return self._guarantee
+
+    @property
+    def assumption(self) -> Callable:
+        return self._assumption
+
+
+def _reals(prefix: str, names: list) -> dict:
+    """{name: z3.Real(prefix + name)}, made with the C API and a single RealSort"""
+    ctx = z3.main_ctx()
+    sort = z3.RealSort(ctx).ast
+    return {v: z3.ArithRef(z3.Z3_mk_const(ctx.ref(), z3.to_symbol(prefix + v, ctx), sort), ctx) for v in names}
+
+
+class _Substitution(object):
+    """z3.substitute of the variables 'src' with 'dst', with the C API: the python wrapper checks every pair again at each
+    call, which costs more than building the clause with the contract functions"""
+
+    def __init__(self, src: list, dst: list):
+        self._n = len(src)
+        self._src = (z3.Ast * self._n)(*[var.as_ast() for var in src])
+        self._dst = (z3.Ast * self._n)(*[var.as_ast() for var in dst])
+
+    def apply(self, clause):
+        """Clauses can also be python booleans, which have no variables"""
+        if not z3.is_expr(clause):
+            return clause
+        ast = z3.Z3_substitute(clause.ctx_ref(), clause.as_ast(), self._n, self._src, self._dst)
+        return type(clause)(ast, clause.ctx)
+
 
 class ContractManager(object):
     def __init__(self, property_interface_fn: Callable, verbose=True):
@@ -119,6 +194,7 @@ class ContractManager(object):
         self._objective_val = None
         self._objective_fn = None
         self._print_verbose = verbose
+        self.optimization_trace: OptimizationTrace | None = None
 
     def print_debug(self, *args):
         if self._print_verbose:
@@ -230,33 +306,33 @@ class ContractManager(object):
             self.print_debug("UNSAT")
             return False
 
-    def solve_optimize(self, max_iter=0, timeout_millisecond=100000):
-        num_iter = 0
+    def solve_optimize(self, max_iter=0, timeout_millisecond=100000, mode="iterate", tolerance=1e-3):
+        """Selection maximizing the objective, see objective_search.maximize_objective for the modes.
+        max_iter bounds the number of checks after the first one and timeout_millisecond is the budget of each check.
+        The objective trajectory and the time of each check are kept in self.optimization_trace."""
         selection_result = None
-        self._solver = z3.Solver()
-        # self._solver = z3.Optimize()
-        self._solver.add(self._constraint_clauses)
-        self._solver.add(self._guarantee_clauses)
-        # self._solver.push()
-        self._solver.add(self._objective_expr >= self._objective_val)
-        self._solver.set("timeout", timeout_millisecond)
-        ret = self._solver.check()
-        while ret == z3.sat:
-            self._model = self._solver.model()
+        num_iter = 0
+
+        def on_model(model):
+            nonlocal selection_result, num_iter
+            self._model = model
             selection_result = self.get_component_selection()
             self.print_debug(f"Iteration: {num_iter}")
+            num_iter += 1
             self.print_selection_result(selection_result)
             self.print_metric()
-            # count progress
-            if num_iter >= max_iter:
-                break
-            else:
-                num_iter += 1
-            # set for next iteration
-            new_value = self.calculate_objective()
-            # self._solver.pop()
-            self._solver.add(self._objective_expr >= new_value)
-            ret = self._solver.check()
+            return self.calculate_objective()
+
+        self.optimization_trace = maximize_objective(
+            clauses=self._constraint_clauses + self._guarantee_clauses + [self._objective_expr >= self._objective_val],
+            objective_expr=self._objective_expr,
+            on_model=on_model,
+            mode=mode,
+            max_iter=max_iter,
+            timeout_millisecond=timeout_millisecond,
+            tolerance=tolerance,
+        )
+        self.print_debug(self.optimization_trace)
         if selection_result is None:
             self.print_debug("Fail.....")
 
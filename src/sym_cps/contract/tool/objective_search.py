@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import z3
+
+"""Modes of 'maximize_objective':
+iterate: after each model, require the objective to be at least the value of the model plus 'min_step'
+optimize: a single check of z3.Optimize maximizing the objective
+bisection: bracket the best objective from the first model (doubling the step until UNSAT) and bisect the bracket
+    until its width is below the tolerance"""
+optimization_modes = ["iterate", "optimize", "bisection"]
+
+
+@dataclass
+class OptimizationStep:
+    iteration: int
+    """Lower bound required on the objective in this check, None if none was added"""
+    bound: float | None
+    result: str
+    """Objective of the model found, None if not SAT"""
+    objective: float | None
+    time: float
+
+
+@dataclass
+class OptimizationTrace:
+    mode: str
+    steps: list[OptimizationStep] = field(default_factory=list)
+
+    @property
+    def n_checks(self) -> int:
+        return len(self.steps)
+
+    @property
+    def total_time(self) -> float:
+        return sum(step.time for step in self.steps)
+
+    @property
+    def best(self) -> float | None:
+        objectives = [step.objective for step in self.steps if step.objective is not None]
+        return max(objectives) if objectives else None
+
+    @property
+    def trajectory(self) -> list[float]:
+        return [step.objective for step in self.steps if step.objective is not None]
+
+    def __str__(self):
+        ret = (
+            f"Objective optimization ({self.mode}): {self.n_checks} checks, {self.total_time:.3f} s, best {self.best}\n"
+        )
+        for step in self.steps:
+            ret += (
+                f"    {step.iteration: >3}  bound: {step.bound}  {step.result: <7}  "
+                f"objective: {step.objective}  time: {step.time:.3f} s\n"
+            )
+        return ret
+
+
+def maximize_objective(
+    clauses: list,
+    objective_expr,
+    on_model: Callable[[z3.ModelRef], float],
+    mode: str = "iterate",
+    max_iter: int = 0,
+    timeout_millisecond: int = 100000,
+    tolerance: float = 1e-3,
+    min_step: float = 0,
+) -> OptimizationTrace:
+    """Searches the models of 'clauses' with the largest 'objective_expr'.
+    'on_model' is called with every model found, in increasing order of objective, and returns the objective value.
+    'max_iter' bounds the number of checks after the first one, 'timeout_millisecond' is the time budget of each check.
+    In bisection mode, the search stops when the bracket is smaller than 'tolerance' (relative to the best objective,
+    absolute below 1); a check that times out is handled as UNSAT, so the result is a lower bound of the optimum."""
+    if mode not in optimization_modes:
+        raise Exception(f"Unknown optimization mode {mode}, use one of {optimization_modes}")
+    trace = OptimizationTrace(mode=mode)
+
+    if mode == "optimize":
+        solver = z3.Optimize()
+        solver.add(clauses)
+        solver.maximize(objective_expr)
+    else:
+        solver = z3.Solver()
+        solver.add(clauses)
+    solver.set("timeout", timeout_millisecond)
+
+    def check(bound: float | None) -> float | None:
+        if bound is not None:
+            solver.push()
+            solver.add(objective_expr >= bound)
+        start = time.time()
+        ret = solver.check()
+        elapsed = time.time() - start
+        objective = on_model(solver.model()) if ret == z3.sat else None
+        if bound is not None:
+            solver.pop()
+        trace.steps.append(OptimizationStep(len(trace.steps), bound, str(ret), objective, elapsed))
+        return objective
+
+    best = check(None)
+    if best is None or mode == "optimize":
+        return trace
+
+    if mode == "iterate":
+        """Bounds are never popped: each check is on top of all the previous ones, as in the original loop"""
+        while trace.n_checks <= max_iter:
+            bound = best + min_step
+            solver.add(objective_expr >= bound)
+            objective = check(None)
+            trace.steps[-1].bound = bound
+            if objective is None:
+                break
+            best = objective
+        return trace
+
+    low, high = best, None
+    step = max(abs(best), 1.0)
+    while trace.n_checks <= max_iter:
+        if high is None:
+            bound = low + step
+        else:
+            if high - low <= tolerance * max(abs(low), 1.0):
+                break
+            bound = (low + high) / 2
+        objective = check(bound)
+        if objective is None:
+            high = bound
+        else:
+            low = objective
+            if high is None:
+                step *= 2
+    return trace
@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+from fractions import Fraction
+
+import numpy as np
+import z3
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import coo_matrix
+
+from sym_cps.contract.tool.solver.z3_interface import Z3Interface
+
+
+class NotLinear(Exception):
+    pass
+
+
+class MilpInterface(Z3Interface):
+    """
+    Solver interface that checks the clause set with the HiGHS MILP solver of SciPy when it is (mixed-integer) linear,
+    and with z3 otherwise.
+    The clauses are built and asserted as z3 expressions exactly as with Z3Interface, so the two are interchangeable and
+    the clause functions of the templates, push/pop and the fallback work unchanged. Each clause is also translated once,
+    when it is added, to linear fragments. The translation supports:
+    - linear (in)equalities over real and integer variables, strict inequalities use 'strict_margin', which is not
+      below the feasibility tolerance of HiGHS (1e-6) so that 'x > value of x in the last model' is UNSAT
+    - boolean variables asserted true or false, as binary variables
+    - the selection encoding of ContractSystem.set_selection: Or(use_1, ..., use_n), Implies(use_i, Not(use_j)) for every
+      pair (a single 'sum == 1' row, without translation when built by clause_exactly_one) and
+      Implies(use_i, And(property == value_i, ...)), where each property becomes sum_i(value_i * use_i)
+    The expression given with set_objective_hint is maximized, so that the selection loops get the best model first.
+    Any other clause (products of variables, negations of conjunctions as in check_refinement, ...) makes the checks
+    fall back to z3 while it is asserted.
+    The clauses are translated at the first check that needs them, and the translation stops at the first nonlinear one:
+    a nonlinear system costs little more than with Z3Interface, so this interface can be used for any contract system.
+    """
+
+    def __init__(self, strict_margin: float = 1e-6):
+        super().__init__()
+        self._strict_margin = strict_margin
+        self._time_limit: float | None = None
+        """Asserted atoms, and the fragments of the first ones (None if not linear)"""
+        self._atoms: list = []
+        self._translations: list[list[tuple] | None] = []
+        self._n_nonlinear = 0
+        self._scopes: list[int] = []
+        """Fragments of the clauses built by clause_exactly_one and clause_choice by clause id, with the clause to keep
+        its id"""
+        self._known_fragments: dict[int, tuple[object, list[tuple]]] = {}
+        self._var_kinds: dict[int, str] = {}
+        self._milp_values: dict[int, float] | None = None
+        self._objective: dict[int, float] = {}
+        self.n_milp_checks = 0
+        self.n_z3_checks = 0
+
+    def set_timeout(self, timeout_millisecond=100000):
+        super().set_timeout(timeout_millisecond=timeout_millisecond)
+        self._time_limit = timeout_millisecond / 1000
+
+    def set_objective_hint(self, expr):
+        """Objective of the MILP checks, so the first model of a selection loop is already the best one.
+        Nonlinear objectives are ignored."""
+        try:
+            self._objective = self._linear(expr)[0]
+        except NotLinear:
+            self._objective = {}
+
+    def clause_exactly_one(self, *args) -> list:
+        """The clauses of Z3Interface for the z3 checks, known to be a single 'sum == 1' row for the MILP checks"""
+        clauses = super().clause_exactly_one(*args)
+        for clause in clauses[:-1]:
+            self._known_fragments[clause.get_id()] = (clause, [])
+        self._known_fragments[clauses[-1].get_id()] = (clauses[-1], [("exactly_one", [self._var(v) for v in args])])
+        return clauses
+
+    def clause_choice(self, use_var, assignment: list[tuple]):
+        """The clause of Z3Interface, known to be the definitions of the variables for the MILP checks"""
+        clause = super().clause_choice(use_var, assignment)
+        try:
+            fragments = [("define", self._var(var), self._var(use_var), float(value)) for var, value in assignment]
+        except (TypeError, ValueError):
+            return clause
+        self._known_fragments[clause.get_id()] = (clause, fragments)
+        return clause
+
+    def add_conjunction_clause(self, *args):
+        super().add_conjunction_clause(*args)
+        for clause in _flatten_args(args):
+            self._atoms.extend(_flatten_and(clause))
+
+    def push(self):
+        super().push()
+        self._scopes.append(len(self._atoms))
+
+    def pop(self):
+        super().pop()
+        n_atoms = self._scopes.pop()
+        del self._atoms[n_atoms:]
+        if len(self._translations) > n_atoms:
+            self._n_nonlinear -= sum(1 for fragments in self._translations[n_atoms:] if fragments is None)
+            del self._translations[n_atoms:]
+
+    def _translate_pending(self):
+        """Translates the atoms asserted since the last check, until the first one that is not linear"""
+        while self._n_nonlinear == 0 and len(self._translations) < len(self._atoms):
+            try:
+                self._translations.append(self._translate(self._atoms[len(self._translations)]))
+            except NotLinear:
+                self._translations.append(None)
+                self._n_nonlinear += 1
+
+    def check(self) -> bool:
+        self._translate_pending()
+        if self._n_nonlinear > 0:
+            return self._check_z3()
+        fragments = [fragment for translation in self._translations for fragment in translation]
+        try:
+            problem = _MilpProblem(fragments, self._var_kinds, self._objective)
+        except NotLinear:
+            return self._check_z3()
+        options = {} if self._time_limit is None else {"time_limit": self._time_limit}
+        res = problem.solve(options)
+        if res.status not in [0, 2]:
+            """Time limit or numerical issues: the answer is left to z3"""
+            return self._check_z3()
+        self.n_milp_checks += 1
+        self._model = None
+        if res.status == 2:
+            self._milp_values = None
+            return False
+        self._milp_values = {var_id: float(res.x[col]) for var_id, col in problem.columns.items()}
+        return True
+
+    def _check_z3(self) -> bool:
+        self._milp_values = None
+        self.n_z3_checks += 1
+        return super().check()
+
+    def get_model_for_var(self, var):
+        if self._milp_values is None or not self._var_is_variable(var):
+            return super().get_model_for_var(var)
+        """Variables not constrained by any clause can take any value"""
+        value = self._milp_values.get(var.get_id(), 0.0)
+        if z3.is_bool(var):
+            return value > 0.5
+        return value
+
+    @property
+    def statistics(self) -> str:
+        return f"{self.n_milp_checks} checks with MILP, {self.n_z3_checks} checks with z3"
+
+    def _var(self, var) -> int:
+        var_id = var.get_id()
+        if var_id not in self._var_kinds:
+            if z3.is_bool(var):
+                self._var_kinds[var_id] = "binary"
+            elif var.sort() == z3.RealSort():
+                self._var_kinds[var_id] = "real"
+            else:
+                self._var_kinds[var_id] = "integer"
+        return var_id
+
+    def _translate(self, atom) -> list[tuple]:
+        """Fragments of an atom of a conjunction:
+        ("fix", var, value), ("one_hot", [use, ...]), ("exactly_one", [use, ...]), ("exclude", use_a, use_b),
+        ("define", var, use, value), ("row", {var: coefficient}, lower, upper)"""
+        if atom.get_id() in self._known_fragments:
+            return self._known_fragments[atom.get_id()][1]
+        if z3.is_true(atom):
+            return []
+        if _is_bool_var(atom):
+            return [("fix", self._var(atom), 1.0)]
+        if z3.is_not(atom) and _is_bool_var(atom.arg(0)):
+            return [("fix", self._var(atom.arg(0)), 0.0)]
+        if z3.is_or(atom) and all(_is_bool_var(arg) for arg in atom.children()):
+            return [("one_hot", [self._var(arg) for arg in atom.children()])]
+        if z3.is_implies(atom) and _is_bool_var(atom.arg(0)):
+            use = self._var(atom.arg(0))
+            excluded = _negated_bool_var_ids(atom.arg(1))
+            if excluded is not None:
+                for var_id in excluded:
+                    self._var_kinds[var_id] = "binary"
+                return [("exclude", use, var_id) for var_id in excluded]
+            fragments = []
+            for consequent in _flatten_and(atom.arg(1)):
+                if z3.is_true(consequent):
+                    continue
+                if z3.is_not(consequent) and _is_bool_var(consequent.arg(0)):
+                    fragments.append(("exclude", use, self._var(consequent.arg(0))))
+                    continue
+                var, value = _variable_assignment(consequent)
+                fragments.append(("define", self._var(var), use, value))
+            return fragments
+        return [self._comparison(atom)]
+
+    def _comparison(self, atom) -> tuple:
+        if not z3.is_app(atom) or atom.num_args() != 2:
+            raise NotLinear
+        kind = atom.decl().kind()
+        if kind not in [z3.Z3_OP_EQ, z3.Z3_OP_LE, z3.Z3_OP_GE, z3.Z3_OP_LT, z3.Z3_OP_GT]:
+            raise NotLinear
+        lhs, rhs = atom.arg(0), atom.arg(1)
+        if not (z3.is_arith(lhs) and z3.is_arith(rhs)):
+            raise NotLinear
+        """lhs - rhs (op) 0"""
+        coefficients, constant = _linear_sub(self._linear(lhs), self._linear(rhs))
+        if kind == z3.Z3_OP_EQ:
+            return "row", coefficients, -constant, -constant
+        elif kind == z3.Z3_OP_LE:
+            return "row", coefficients, -np.inf, -constant
+        elif kind == z3.Z3_OP_LT:
+            return "row", coefficients, -np.inf, -constant - self._strict_margin
+        elif kind == z3.Z3_OP_GE:
+            return "row", coefficients, -constant, np.inf
+        return "row", coefficients, -constant + self._strict_margin, np.inf
+
+    def _linear(self, expr) -> tuple[dict[int, float], float]:
+        """Coefficients by variable id and constant of a linear arithmetic expression"""
+        if z3.is_rational_value(expr) or z3.is_int_value(expr):
+            return {}, _numeral(expr)
+        if _is_arith_var(expr):
+            return {self._var(expr): 1.0}, 0.0
+        kind = expr.decl().kind()
+        if kind == z3.Z3_OP_ADD:
+            coefficients, constant = {}, 0.0
+            for arg in expr.children():
+                c, k = self._linear(arg)
+                for v, value in c.items():
+                    coefficients[v] = coefficients.get(v, 0.0) + value
+                constant += k
+            return coefficients, constant
+        if kind == z3.Z3_OP_SUB:
+            children = expr.children()
+            ret = self._linear(children[0])
+            for arg in children[1:]:
+                ret = _linear_sub(ret, self._linear(arg))
+            return ret
+        if kind == z3.Z3_OP_UMINUS:
+            return _linear_sub(({}, 0.0), self._linear(expr.arg(0)))
+        if kind == z3.Z3_OP_MUL:
+            factor = 1.0
+            linear_part = None
+            for arg in expr.children():
+                c, k = self._linear(arg)
+                if len(c) == 0:
+                    factor *= k
+                elif linear_part is None:
+                    linear_part = (c, k)
+                else:
+                    raise NotLinear
+            if linear_part is None:
+                return {}, factor
+            return {v: factor * value for v, value in linear_part[0].items()}, factor * linear_part[1]
+        if kind == z3.Z3_OP_DIV:
+            c, k = self._linear(expr.arg(0))
+            denominator, denominator_constant = self._linear(expr.arg(1))
+            if len(denominator) > 0 or denominator_constant == 0:
+                raise NotLinear
+            return {v: value / denominator_constant for v, value in c.items()}, k / denominator_constant
+        if kind == z3.Z3_OP_TO_REAL:
+            return self._linear(expr.arg(0))
+        raise NotLinear
+
+
+class _MilpProblem:
+    """Assembles the fragments of the asserted clauses in 'lb <= A x <= ub' over real, integer and binary columns"""
+
+    def __init__(self, fragments: list[tuple], var_kinds: dict[int, str], objective: dict[int, float]):
+        self.columns: dict[int, int] = {}
+        self._objective = objective
+        self._var_kinds = var_kinds
+        self._entries: tuple[list[int], list[int], list[float]] = ([], [], [])
+        self._lb: list[float] = []
+        self._ub: list[float] = []
+
+        one_hot_groups: list[list[int]] = []
+        exactly_one: list[set[int]] = []
+        exclusions: set[tuple[int, int]] = set()
+        definitions: dict[int, dict[int, float]] = {}  # property var -> {use var: value}
+        for fragment in fragments:
+            kind = fragment[0]
+            if kind == "row":
+                self._add_row(*fragment[1:])
+            elif kind == "fix":
+                self._add_row({fragment[1]: 1.0}, fragment[2], fragment[2])
+            elif kind == "one_hot":
+                one_hot_groups.append(sorted(set(fragment[1])))
+            elif kind == "exactly_one":
+                self._add_row({use: 1.0 for use in fragment[1]}, 1.0, 1.0)
+                exactly_one.append(set(fragment[1]))
+            elif kind == "exclude":
+                exclusions.add((min(fragment[1], fragment[2]), max(fragment[1], fragment[2])))
+            elif kind == "define":
+                definitions.setdefault(fragment[1], {})[fragment[2]] = fragment[3]
+
+        """A group whose uses exclude each other pairwise is a single 'sum <= 1' row instead of one row per pair"""
+        covered = set()
+        for group in one_hot_groups:
+            self._add_row({use: 1.0 for use in group}, 1.0, np.inf)
+            pairs = {(a, b) for i, a in enumerate(group) for b in group[i + 1 :]}
+            if pairs <= exclusions:
+                self._add_row({use: 1.0 for use in group}, -np.inf, 1.0)
+                covered |= pairs
+                exactly_one.append(set(group))
+        for use_a, use_b in exclusions - covered:
+            self._add_row({use_a: 1.0, use_b: 1.0}, -np.inf, 1.0)
+
+        for var_id, choices in definitions.items():
+            """property == sum(value_i * use_i) is equivalent to the implications only if exactly one use_i is true"""
+            if set(choices.keys()) not in exactly_one:
+                raise NotLinear
+            self._add_row({var_id: 1.0, **{use: -value for use, value in choices.items()}}, 0.0, 0.0)
+
+    def _column(self, var_id: int) -> int:
+        if var_id not in self.columns:
+            self.columns[var_id] = len(self.columns)
+        return self.columns[var_id]
+
+    def _add_row(self, coefficients: dict[int, float], lower: float, upper: float):
+        row = len(self._lb)
+        rows, cols, values = self._entries
+        for var_id, value in coefficients.items():
+            rows.append(row)
+            cols.append(self._column(var_id))
+            values.append(value)
+        self._lb.append(lower)
+        self._ub.append(upper)
+
+    def solve(self, options: dict):
+        n = len(self.columns)
+        kinds = [""] * n
+        for var_id, col in self.columns.items():
+            kinds[col] = self._var_kinds[var_id]
+        integrality = np.array([0 if kind == "real" else 1 for kind in kinds], dtype=int)
+        lower = np.array([0.0 if kind == "binary" else -np.inf for kind in kinds])
+        upper = np.array([1.0 if kind == "binary" else np.inf for kind in kinds])
+        constraints = []
+        if len(self._lb) > 0:
+            rows, cols, values = self._entries
+            a = coo_matrix((values, (rows, cols)), shape=(len(self._lb), n)).tocsr()
+            constraints = [LinearConstraint(a, np.array(self._lb), np.array(self._ub))]
+        """milp minimizes, variables of the objective not in any clause are left out (the problem would be unbounded)"""
+        c = np.zeros(n)
+        for var_id, value in self._objective.items():
+            if var_id in self.columns:
+                c[self.columns[var_id]] = -value
+        return milp(
+            c=c,
+            constraints=constraints,
+            integrality=integrality,
+            bounds=Bounds(lower, upper),
+            options=options,
+        )
+
+
+def _flatten_args(args) -> list:
+    ret = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            ret.extend(_flatten_args(arg))
+        else:
+            ret.append(arg)
+    return ret
+
+
+def _flatten_and(expr) -> list:
+    if z3.is_and(expr):
+        ret = []
+        for arg in expr.children():
+            ret.extend(_flatten_and(arg))
+        return ret
+    return [expr]
+
+
+def _negated_bool_var_ids(expr) -> list[int] | None:
+    """Ids of v_1, ..., v_n if expr is And(Not(v_1), ..., Not(v_n)) of boolean variables, None otherwise.
+    Read with the C API: the selection encoding has one such clause per candidate, with one argument per other
+    candidate, and the python wrappers of z3 are too slow for that many expressions."""
+    if not z3.is_and(expr):
+        return None
+    ctx, ast = expr.ctx_ref(), expr.as_ast()
+    ret = []
+    for i in range(z3.Z3_get_app_num_args(ctx, ast)):
+        arg = z3.Z3_get_app_arg(ctx, ast, i)
+        if z3.Z3_get_ast_kind(ctx, arg) != z3.Z3_APP_AST:
+            return None
+        if z3.Z3_get_decl_kind(ctx, z3.Z3_get_app_decl(ctx, arg)) != z3.Z3_OP_NOT:
+            return None
+        var = z3.Z3_get_app_arg(ctx, arg, 0)
+        if (
+            z3.Z3_get_ast_kind(ctx, var) != z3.Z3_APP_AST
+            or z3.Z3_get_app_num_args(ctx, var) != 0
+            or z3.Z3_get_decl_kind(ctx, z3.Z3_get_app_decl(ctx, var)) != z3.Z3_OP_UNINTERPRETED
+            or z3.Z3_get_sort_kind(ctx, z3.Z3_get_sort(ctx, var)) != z3.Z3_BOOL_SORT
+        ):
+            return None
+        ret.append(z3.Z3_get_ast_id(ctx, var))
+    return ret
+
+
+def _is_bool_var(expr) -> bool:
+    return z3.is_bool(expr) and z3.is_const(expr) and expr.decl().kind() == z3.Z3_OP_UNINTERPRETED
+
+
+def _is_arith_var(expr) -> bool:
+    return z3.is_arith(expr) and z3.is_const(expr) and expr.decl().kind() == z3.Z3_OP_UNINTERPRETED
+
+
+def _numeral(expr) -> float:
+    if z3.is_rational_value(expr) or z3.is_int_value(expr):
+        return float(Fraction(expr.numerator_as_long(), expr.denominator_as_long()))
+    raise NotLinear
+
+
+def _variable_assignment(expr) -> tuple:
+    """(var, value) of a clause 'var == value' or 'value == var'"""
+    if not z3.is_eq(expr):
+        raise NotLinear
+    lhs, rhs = expr.arg(0), expr.arg(1)
+    if _is_arith_var(lhs) and not _is_arith_var(rhs):
+        return lhs, _numeral(z3.simplify(rhs))
+    if _is_arith_var(rhs) and not _is_arith_var(lhs):
+        return rhs, _numeral(z3.simplify(lhs))
+    raise NotLinear
+
+
+def _linear_sub(a, b):
+    coefficients = dict(a[0])
+    for v, c in b[0].items():
+        coefficients[v] = coefficients.get(v, 0.0) - c
+    return coefficients, a[1] - b[1]
@@ -32,6 +32,11 @@ class SolverInterface(ABC):
     def set_timeout(self, timeout_millisecond=100000):
         pass
 
+    def set_objective_hint(self, expr):
+        """Expression to maximize among the models of the next checks. It is a hint: a backend may ignore it and return
+        any model"""
+        pass
+
     @abstractmethod
     def clause_and(self, *args):
         pass
@@ -44,6 +49,21 @@ class SolverInterface(ABC):
     def clause_not(self, arg):
         pass
 
+    def clause_exactly_one(self, *args) -> list:
+        """Clauses making exactly one of the boolean variables true: each one excludes the others and one is chosen"""
+        negations = [self.clause_not(v) for v in args]
+        clauses = [
+            self.clause_implication(v, self.clause_and(*negations[:i], *negations[i + 1 :])) for i, v in enumerate(args)
+        ]
+        clauses.append(self.clause_or(*args))
+        return clauses
+
+    def clause_choice(self, use_var, assignment: list[tuple]):
+        """Clause giving the values of the (variable, value) pairs of 'assignment' when 'use_var' is true"""
+        return self.clause_implication(
+            use_var, self.clause_and(*[self.clause_equal(var, value) for var, value in assignment])
+        )
+
     @abstractmethod
     def clause_equal(self, arg1, arg2):
         pass
@@ -64,6 +84,14 @@ class SolverInterface(ABC):
     def check(self) -> bool:
         pass
 
+    @abstractmethod
+    def push(self):
+        """Create a backtracking point, the clauses added after it are removed by 'pop'"""
+
+    @abstractmethod
+    def pop(self):
+        pass
+
     @abstractmethod
     def get_model_for_var(self, var):
         pass
@@ -55,6 +55,13 @@ class Z3Interface(SolverInterface):
         return z3.Implies(anticedent, consequent)
 
     def clause_and(self, *args):
+        if len(args) > 0 and all(type(arg) is z3.BoolRef for arg in args):
+            """Same expression as z3.And without its checks of each argument, the selection encoding has a quadratic
+            number of arguments"""
+            ctx = args[0].ctx
+            return z3.BoolRef(
+                z3.Z3_mk_and(ctx.ref(), len(args), (z3.Ast * len(args))(*[arg.as_ast() for arg in args])), ctx
+            )
         return z3.And(*args)
 
     def clause_or(self, *args):
@@ -85,12 +92,19 @@ class Z3Interface(SolverInterface):
             self._model = None
             return False
 
+    def push(self):
+        self._solver.push()
+
+    def pop(self):
+        self._solver.pop()
+
     def set_timeout(self, timeout_millisecond=100000):
         self._solver.set("timeout", timeout_millisecond)
 
     def get_model_for_var(self, var):
         if self._var_is_variable(var):
-            ref = self._model[var]
+            # variables left out of the model by the solver can take any value
+            ref = self._model.eval(var, model_completion=True)
         else:
             ref = var
 
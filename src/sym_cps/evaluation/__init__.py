@@ -5,10 +5,8 @@ https://github.com/LOGiCS-Project/swri-simple-uam-example
 import json
 from pathlib import Path
 
-from simple_uam.client.inputs import load_study_params
-from simple_uam.client.watch import poll_results_backend
-from simple_uam.direct2cad.actions.actors import gen_info_files, process_design
-
+from sym_cps.evaluation.batch import BatchItem, LocalBroker, evaluate_designs
+from sym_cps.evaluation.cache import EvaluationCache, design_swri_hash, evaluation_cache
 from sym_cps.evaluation.tools import extract_results, load_design, load_metadata, polling_results
 from sym_cps.shared.paths import default_study_params_path, designs_folder
 
@@ -20,10 +18,15 @@ def evaluate_design(
     timeout: int = 800,
     info_only: bool = False,
     control_opt: bool = False,
+    cache: EvaluationCache | None = evaluation_cache,
 ) -> dict:
     """Evaluate a design_swri_orog.json provided at location 'design_json_path'
     Metadata to include with the operation, becomes part of metadata.json in the result.
+    Results of designs already evaluated with the same study params are taken from 'cache' (None to disable it).
     """
+    from simple_uam.client.inputs import load_study_params
+    from simple_uam.direct2cad.actions.actors import gen_info_files, process_design
+
     print(f"Input file: {design_json_path}")
     # Load the design from file
     print("Loading Design")
@@ -43,6 +46,12 @@ def evaluate_design(
                 study_params = load_study_params(study_params=study_params)
         else:
             study_params = load_study_params(study_params=default_study_params_path)
+        cache_key = design_swri_hash(design, study_params, control_opt=control_opt)
+        if cache is not None:
+            cached_results = cache.get(cache_key)
+            if cached_results is not None:
+                print(f"Results found in the evaluation cache ({cache.stats})")
+                return cached_results
         msg = process_design.send(design, metadata=metadata, compile_args={"srcs": None}, study_params=study_params)
         # print(json.dumps(msg.asdict(), indent=2, sort_keys=True))
     print("Waiting for results...")
@@ -51,6 +60,8 @@ def evaluate_design(
     # Obtain information from the result foleder
     if not info_only:
         ret = extract_results(result_path, control_opt=control_opt)
+        if cache is not None:
+            cache.put(cache_key, ret)
         return ret
         # return extract_results("/Users/shengjungyu/shengjungyu/Research/UC_Berkeley/Research/LOGiCS/workspace/challenge_data/aws/results/process_design-2022-11-02-kvrbcwlwpg.zip", control_opt = control_opt)
     else:
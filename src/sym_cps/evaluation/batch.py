@@ -0,0 +1,189 @@
+"""
+Concurrent evaluation of many designs.
+
+`evaluate_design` submits one design and blocks until its archive shows up.
+`evaluate_designs` keeps up to `max_in_flight` designs queued on the broker, waits on all their messages at once through
+the shared `ResultsWatcher` and yields each result as soon as its archive is found in the results folder.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from sym_cps.evaluation.cache import EvaluationCache, design_swri_hash, evaluation_cache
+from sym_cps.evaluation.tools import extract_results, load_design, load_metadata
+from sym_cps.evaluation.watcher import get_results_watcher
+from sym_cps.shared.paths import aws_folder, default_study_params_path, fdm_extract_folder
+
+
+@dataclass
+class BatchItem:
+    """A design to evaluate in a batch. `timeout` overrides the batch timeout for this design only."""
+
+    design_json_path: Path
+    metadata: dict | None = None
+    timeout: float | None = None
+
+
+@dataclass
+class _Job:
+    item: BatchItem
+    message_id: str
+    deadline: float
+    cache_key: str
+
+
+@dataclass(frozen=True)
+class LocalMessage:
+    """Minimal stand-in for `dramatiq.Message`, only the id is needed to match the result archive"""
+
+    message_id: str
+
+
+@dataclass
+class LocalBroker:
+    """
+    Local stand-in for the dramatiq broker and the SWRi worker.
+
+    Every `send` runs `worker` on a thread pool and drops a result archive in `results_dir`, with the same
+    `metadata.json` layout produced by the real worker. `worker` receives the design and the study params and returns
+    the files to store in the archive as a dict {archive_name: content}.
+    """
+
+    results_dir: Path
+    worker: Callable[[dict, object], dict[str, str | bytes]] | None = None
+    max_workers: int = 4
+    _executor: ThreadPoolExecutor = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.results_dir = Path(self.results_dir)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def send(self, design: dict, metadata: dict | None = None, study_params: object = None) -> LocalMessage:
+        message = LocalMessage(message_id=str(uuid.uuid4()))
+        self._executor.submit(self._process, message, design, metadata, study_params)
+        return message
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _process(self, message: LocalMessage, design: dict, metadata: dict | None, study_params: object):
+        files = self.worker(design, study_params) if self.worker is not None else {}
+        archive_metadata = dict(metadata) if metadata is not None else {}
+        archive_metadata["message_info"] = {"message_id": message.message_id}
+        date = datetime.now().strftime("%Y-%m-%d")
+        archive_path = self.results_dir / f"process_design-{date}-{message.message_id}.zip"
+        """Write under a temporary name first so that the archive appears atomically"""
+        tmp_path = archive_path.with_suffix(".part")
+        with zipfile.ZipFile(tmp_path, "w") as archive:
+            archive.writestr("metadata.json", json.dumps(archive_metadata))
+            for name, content in files.items():
+                archive.writestr(name, content)
+        os.replace(tmp_path, archive_path)
+
+
+def _send_process_design(design: dict, metadata: dict, study_params: object) -> object:
+    from simple_uam.direct2cad.actions.actors import process_design
+
+    return process_design.send(design, metadata=metadata, compile_args={"srcs": None}, study_params=study_params)
+
+
+def _load_study_params(study_params: Path | None | list[dict[str, str]]) -> object:
+    if study_params is not None and not isinstance(study_params, Path):
+        return study_params
+    from simple_uam.client.inputs import load_study_params
+
+    if study_params is None:
+        study_params = default_study_params_path
+    return load_study_params(study_params=study_params)
+
+
+def evaluate_designs(
+    batch: Iterable[Path | BatchItem],
+    study_params: Path | None | list[dict[str, str]] = None,
+    timeout: float = 800,
+    max_in_flight: int = 8,
+    interval: float = 1.0,
+    results_dir: Path | None = None,
+    send: Callable[[dict, dict, object], object] | None = None,
+    control_opt: bool = False,
+    cache: EvaluationCache | None = evaluation_cache,
+) -> Iterator[tuple[Path, dict]]:
+    """
+    Evaluate a batch of design_swri.json files concurrently.
+    Yields (design_json_path, results) in the order in which the result archives arrive.
+    Designs without an archive after their timeout are yielded with status "TIMEOUT" instead of blocking the batch.
+
+    Arguments:
+      batch: design_swri.json paths, or BatchItem to give per-design metadata and timeout
+      study_params: study parameters shared by all designs
+      timeout: seconds to wait for each design, counted from the moment it is sent
+      max_in_flight: maximum number of designs sent to the broker and still waiting for results
+      interval: delay between two scans of the results_dir when inotify is not available
+      results_dir: folder where the worker stores the result archives
+      send: function (design, metadata, study_params) -> message with a `message_id`, e.g. `LocalBroker.send`
+      control_opt: run the control optimization on every result
+      cache: designs already evaluated are yielded from the cache without being sent (None to disable it)
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+    if results_dir is None:
+        results_dir = aws_folder / "d2c_results"
+    if send is None:
+        send = _send_process_design
+        study_params = _load_study_params(study_params)
+
+    pending: deque[BatchItem] = deque(
+        item if isinstance(item, BatchItem) else BatchItem(design_json_path=Path(item)) for item in batch
+    )
+    in_flight: dict[Future, _Job] = {}
+    watcher = get_results_watcher(results_dir, interval=interval)
+
+    while len(pending) > 0 or len(in_flight) > 0:
+        while len(pending) > 0 and len(in_flight) < max_in_flight:
+            item = pending.popleft()
+            design = load_design(item.design_json_path)
+            cache_key = design_swri_hash(design, study_params, control_opt=control_opt)
+            if cache is not None:
+                cached_results = cache.get(cache_key)
+                if cached_results is not None:
+                    yield item.design_json_path, cached_results
+                    continue
+            msg = send(design, load_metadata(item.metadata), study_params)
+            item_timeout = item.timeout if item.timeout is not None else timeout
+            deadline = time.monotonic() + item_timeout
+            in_flight[watcher.future(msg.message_id)] = _Job(item, msg.message_id, deadline, cache_key)
+            print(f"Sent {item.design_json_path} (message {msg.message_id}), {len(in_flight)} in flight")
+
+        if len(in_flight) == 0:
+            continue
+        next_deadline = min(job.deadline for job in in_flight.values())
+        remaining = max(0.0, next_deadline - time.monotonic())
+        done, _ = wait(in_flight.keys(), timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            job = in_flight.pop(future)
+            print(f"Results of {job.item.design_json_path} found at: {future.result()}")
+            results = extract_results(
+                future.result(), control_opt=control_opt, extract_folder=fdm_extract_folder / job.message_id
+            )
+            if cache is not None:
+                cache.put(job.cache_key, results)
+            yield job.item.design_json_path, results
+
+        now = time.monotonic()
+        for future in [f for f, job in in_flight.items() if job.deadline <= now]:
+            job = in_flight.pop(future)
+            future.cancel()
+            print(f"TIMEOUT: no results for {job.item.design_json_path} (message {job.message_id})")
+            yield job.item.design_json_path, {"status": "TIMEOUT"}
@@ -0,0 +1,213 @@
+"""
+Persistent, content-addressed cache of evaluation results.
+
+Entries are keyed by a canonical hash of the design_swri dictionary and of the study parameters, so the same design
+sent twice (e.g. re-visited by `generate_random` or `evaluate_random`) is evaluated only once.
+Each entry stores the output of `extract_results` together with the FDM artifacts it points to (Results folder,
+uav_gen.stl, uav_asm.stp).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+
+from sym_cps.shared.paths import evaluation_cache_folder
+
+"""Keys of the 'extract_results' output pointing to files that are copied inside the cache entry"""
+_artifacts_keys = {"results_path": "Results", "stl_file_path": "uav_gen.stl", "stp_file_path": "uav_asm.stp"}
+
+
+"""Lists of the design_swri whose order is irrelevant, the other lists (e.g. the study parameters, whose results are
+numbered after their position) keep their order"""
+_unordered_design_keys = ("parameters", "components", "connections")
+
+
+def _canonical(element: object, unordered: bool = False) -> object:
+    """Sorts dictionaries recursively, and the list 'element' itself if 'unordered', so that equal designs have the
+    same serialization"""
+    if isinstance(element, dict):
+        return {k: _canonical(element[k]) for k in sorted(element.keys())}
+    if isinstance(element, list):
+        elements = [_canonical(e) for e in element]
+        return sorted(elements, key=lambda e: json.dumps(e, sort_keys=True)) if unordered else elements
+    return element
+
+
+def design_swri_hash(design_swri: dict, study_params: object = None, **kwargs) -> str:
+    """
+    Canonical hash of a design_swri dictionary and of the study parameters.
+    The design name is ignored, the order of parameters, components and connections is irrelevant.
+    Additional keyword arguments (e.g. control_opt) become part of the key.
+    """
+    design = {k: _canonical(v, k in _unordered_design_keys) for k, v in design_swri.items() if k != "name"}
+    if isinstance(study_params, Path):
+        study_params = study_params.read_text()
+    key = {"design": design, "study_params": _canonical(study_params), "options": _canonical(kwargs)}
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def __str__(self):
+        return (
+            f"hits: {self.hits}, misses: {self.misses}, hit rate: {self.hit_rate:.2%}, "
+            f"stored: {self.stores}, evicted: {self.evictions}"
+        )
+
+
+class EvaluationCache:
+    """
+    On-disk cache folder with one sub-folder per entry, named after the key.
+    Entries older than 'max_age' seconds are discarded, the least recently used entries are evicted when the folder
+    exceeds 'max_size' bytes. The size of the folder is kept as a running total of the entries stored, so that 'put'
+    only scans the folder when it is over 'max_size' (or at its first call).
+    """
+
+    def __init__(self, folder: Path, max_size: int | None = 10 * 1024**3, max_age: float | None = None):
+        self.folder = Path(folder)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.stats = CacheStats()
+        """Total size of the entries in bytes, None until the folder is scanned by 'evict'"""
+        self._total_size: int | None = None
+
+    def _entry(self, key: str) -> Path:
+        return self.folder / key
+
+    def get(self, key: str) -> dict | None:
+        """Returns the cached results, with the artifacts paths pointing inside the cache, or None"""
+        entry = self._entry(key)
+        results_file = entry / "results.json"
+        if not results_file.is_file() or self._expired(entry):
+            self.stats.misses += 1
+            return None
+        with open(results_file) as f:
+            results = json.load(f)
+        for k, name in _artifacts_keys.items():
+            if k in results:
+                results[k] = str(entry / name)
+        if "results_path" in results:
+            results["results_path"] = Path(results["results_path"])
+        """Touching the entry keeps track of the last access for the LRU eviction"""
+        os.utime(entry)
+        self.stats.hits += 1
+        print(f"Evaluation cache hit: {key}")
+        return results
+
+    def put(self, key: str, results: dict) -> Path | None:
+        """Stores the results of 'extract_results' and copies the artifacts. Only successful evaluations are stored."""
+        if results is None or results.get("status", None) != "SUCCESS":
+            return None
+        self.folder.mkdir(parents=True, exist_ok=True)
+        tmp_entry = self.folder / f".tmp_{uuid.uuid4().hex}"
+        tmp_entry.mkdir()
+        stored = {}
+        for k, v in results.items():
+            if k in _artifacts_keys:
+                source = Path(v)
+                target = tmp_entry / _artifacts_keys[k]
+                if source.is_dir():
+                    shutil.copytree(source, target)
+                elif source.is_file():
+                    shutil.copy(source, target)
+                else:
+                    continue
+                stored[k] = _artifacts_keys[k]
+            else:
+                stored[k] = v
+        with open(tmp_entry / "results.json", "w") as f:
+            json.dump(stored, f, indent=4, default=str)
+        size = self._size(tmp_entry)
+        entry = self._entry(key)
+        if entry.is_dir() and (not (entry / "results.json").is_file() or self._expired(entry)):
+            self._remove_stale(entry)
+        try:
+            """Atomic publication, concurrent writers of the same key keep the first entry"""
+            os.rename(tmp_entry, entry)
+        except OSError:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return None
+        if self._total_size is not None:
+            self._total_size += size
+        self.stats.stores += 1
+        if self.max_size is not None and (self._total_size is None or self._total_size > self.max_size):
+            self.evict()
+        return entry
+
+    def _remove_stale(self, entry: Path):
+        """Removes an entry that 'get' reports as a miss, so that 'put' can replace it. The entry is first moved away,
+        the readers never see a partially deleted entry"""
+        stale = self.folder / f".tmp_{uuid.uuid4().hex}"
+        try:
+            os.rename(entry, stale)
+        except OSError:
+            """Already removed or replaced by another writer"""
+            return
+        if self._total_size is not None:
+            self._total_size -= self._size(stale)
+        shutil.rmtree(stale, ignore_errors=True)
+
+    def _expired(self, entry: Path) -> bool:
+        """The age is the one of results.json, the entry folder itself is touched at every hit"""
+        if self.max_age is None:
+            return False
+        results_file = entry / "results.json"
+        return not results_file.is_file() or time.time() - results_file.stat().st_mtime > self.max_age
+
+    def _entries(self) -> list[Path]:
+        if not self.folder.is_dir():
+            return []
+        return [e for e in self.folder.iterdir() if e.is_dir() and not e.name.startswith(".tmp_")]
+
+    @staticmethod
+    def _size(entry: Path) -> int:
+        return sum(f.stat().st_size for f in entry.rglob("*") if f.is_file())
+
+    def evict(self) -> int:
+        """Removes expired entries, then the least recently used ones until the cache fits in 'max_size'.
+        The running total is reset to the size found, e.g. with the entries stored by other processes"""
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        removed = 0
+        for entry in [e for e in entries if self._expired(e)]:
+            shutil.rmtree(entry, ignore_errors=True)
+            entries.remove(entry)
+            removed += 1
+        if self.max_size is not None:
+            sizes = {e: self._size(e) for e in entries}
+            total = sum(sizes.values())
+            while total > self.max_size and len(entries) > 0:
+                entry = entries.pop(0)
+                total -= sizes[entry]
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+            self._total_size = total
+        self.stats.evictions += removed
+        return removed
+
+    def clear(self):
+        for entry in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
+        self._total_size = 0
+
+    def __len__(self):
+        return len(self._entries())
+
+
+evaluation_cache = EvaluationCache(evaluation_cache_folder)
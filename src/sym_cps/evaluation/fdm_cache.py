@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+
+from sym_cps.evaluation.fdm_ret import FDMResult
+from sym_cps.shared.paths import fdm_run_cache_path
+
+
+class FDMRunCache(object):
+    """Memoization of fdm runs, persisted as one json line per run.
+    The key is the hash of the fdm input (non-control lines and control values rounded to 'digits' decimals) and of
+    the content of the fdm binary, so the same run is never repeated across flight paths, optimizer restarts and
+    processes, and a rebuilt binary does not reuse the results of the previous one."""
+
+    def __init__(self, file_path=fdm_run_cache_path, digits=6):
+        self._file_path = file_path
+        self._digits = digits
+        self._runs = None
+        """sha256 of the fdm binaries by (path, mtime, size), hashed again only when the file changes"""
+        self._binary_hashes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _round(self, val):
+        try:
+            return round(float(val), self._digits)
+        except (TypeError, ValueError):
+            return str(val).strip()
+
+    def binary_hash(self, fdm_path):
+        stat = os.stat(fdm_path)
+        signature = (str(fdm_path), stat.st_mtime_ns, stat.st_size)
+        if signature not in self._binary_hashes:
+            sha = hashlib.sha256()
+            with open(fdm_path, "rb") as file:
+                for chunk in iter(lambda: file.read(1 << 20), b""):
+                    sha.update(chunk)
+            self._binary_hashes[signature] = sha.hexdigest()
+        return self._binary_hashes[signature]
+
+    def key(self, fdm_path, fdm_data):
+        controls = {name: self._round(val) for name, val in fdm_data.data.items()}
+        content = {"fdm": self.binary_hash(fdm_path), "lines": fdm_data.lines, "control": controls}
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @property
+    def runs(self):
+        if self._runs is None:
+            self._runs = {}
+            if os.path.exists(self._file_path):
+                with open(self._file_path, "r") as file:
+                    for line in file:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            # truncated last line of an interrupted run
+                            continue
+                        self._runs[entry["key"]] = entry["result"]
+        return self._runs
+
+    def get(self, key):
+        if key in self.runs:
+            self.hits += 1
+            return FDMResult.from_dict(self.runs[key])
+        self.misses += 1
+        return None
+
+    def put(self, key, fdm_result):
+        if key in self.runs:
+            return
+        self.runs[key] = fdm_result.to_dict()
+        os.makedirs(os.path.dirname(self._file_path), exist_ok=True)
+        with open(self._file_path, "a") as file:
+            file.write(json.dumps({"key": key, "result": self.runs[key]}) + "\n")
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __str__(self):
+        return f"fdm run cache: {len(self)} runs, {self.hits} hits, {self.misses} misses"
+
+
+fdm_run_cache = FDMRunCache()
@@ -15,6 +15,11 @@ class FDMData(object):
     def data(self):
         return self._data
 
+    @property
+    def lines(self):
+        """input lines that are not control values"""
+        return self._lines
+
     def read_input(self, file_path):
         part_names = set()
         with open(file_path, "r") as file:
@@ -1,21 +1,74 @@
 import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
 
 from sym_cps.evaluation.fdm_data import FDMData
 from sym_cps.evaluation.fdm_ret import FDMResult
 from sym_cps.shared.paths import fdm_bin_folder, fdm_root_folder, fdm_tmp_folder
 
 
+class FDMExecutionError(Exception):
+    pass
+
+
+def run_fdm(fdm_path, fdm_data, tmp_path, timeout=None, keep_files=False):
+    """Runs the fdm binary on the data in a scratch directory of its own, so that several runs can happen at once.
+    The binary is executed inside the scratch directory, any file it writes next to its output stays isolated.
+    The scratch directory is removed once the output is parsed, unless keep_files is set."""
+    os.makedirs(tmp_path, exist_ok=True)
+    scratch_path = tempfile.mkdtemp(prefix="fdm_", dir=tmp_path)
+    inp_file_path = os.path.join(scratch_path, "tmp.inp")
+    out_file_path = os.path.join(scratch_path, "tmp.out")
+    fdm_data.write_input(inp_file_path)
+    try:
+        with open(inp_file_path, "r") as inp_file, open(out_file_path, "w") as out_file:
+            process = subprocess.run(
+                [str(fdm_path)],
+                stdin=inp_file,
+                stdout=out_file,
+                stderr=subprocess.PIPE,
+                cwd=scratch_path,
+                timeout=timeout,
+            )
+        if process.returncode != 0:
+            print("FDM execution error!")
+            raise FDMExecutionError(f"{fdm_path} exited with status {process.returncode}: {process.stderr.decode()}")
+        return FDMResult(out_file_path)
+    except subprocess.TimeoutExpired:
+        print("FDM execution timeout!")
+        raise FDMExecutionError(f"{fdm_path} did not terminate within {timeout}s")
+    finally:
+        if not keep_files:
+            shutil.rmtree(scratch_path, ignore_errors=True)
+
+
 class FDMInterface(object):
-    def __init__(self, fdm_path=None, table_path=None, tmp_path=None):
+    def __init__(
+        self,
+        fdm_path=None,
+        table_path=None,
+        tmp_path=None,
+        timeout=None,
+        max_workers=None,
+        keep_files=False,
+        cache=None,
+    ):
         self._fdm_path = fdm_path
         if fdm_path is None:
             # self._fdm_path = r"D:\JWork\Agents\workspace\UAM_Workflows\FlightDynamics\new_fdm.exe"
             self._fdm_path = fdm_bin_folder / "new_fdm.exe"
+        if os.path.dirname(self._fdm_path) != "":
+            self._fdm_path = os.path.abspath(self._fdm_path)
 
         self._table_path = table_path
         if table_path is None:
             # self._table_path = r"D:\JWork\Agents\workspace\UAM_Workflows\Tables\PropData"
             self._table_path = fdm_root_folder / "Tables" / "PropData"
+        # the fdm runs inside its scratch directory, relative table paths would not resolve
+        self._table_path = os.path.abspath(self._table_path)
 
         self._tmp_path = tmp_path
         if tmp_path is None:
@@ -23,16 +76,85 @@ class FDMInterface(object):
             # self._tmp_path = os.path.join(os.path.dirname(__file__), "..", "fdm")
             self._tmp_path = fdm_tmp_folder
 
+        # seconds before a single fdm run is killed, None waits forever
+        self._timeout = timeout
+        # size of the process pool used by execute_many, None uses the number of cores
+        self._max_workers = max_workers
+        self._keep_files = keep_files
+        # FDMRunCache memoizing the runs, None runs the fdm every time
+        self._cache = cache
+        self._pool = None
+
+    @property
+    def cache(self):
+        return self._cache
+
     def execute_from_data(self, fdm_data, fdm_args=None):
         """execute the fdm with the data.
         If fdm_args is provided, data will be changed"""
         if fdm_args is not None:
             self.set_fdm_Data(fdm_data, fdm_args)
         # print(fdm_data.data)
-        inp_file_path = os.path.join(self._tmp_path, "tmp.inp")
-        out_file_path = os.path.join(self._tmp_path, "tmp.out")
-        fdm_data.write_input(inp_file_path)
-        return self.executeFDM(inp_file_path, out_file_path)
+        if self._cache is None:
+            return run_fdm(self._fdm_path, fdm_data, self._tmp_path, timeout=self._timeout, keep_files=self._keep_files)
+        key = self._cache.key(self._fdm_path, fdm_data)
+        fdm_result = self._cache.get(key)
+        if fdm_result is None:
+            fdm_result = run_fdm(self._fdm_path, fdm_data, self._tmp_path, self._timeout, self._keep_files)
+            self._cache.put(key, fdm_result)
+        return fdm_result
+
+    def execute_many(self, fdm_data, fdm_args_list, return_exceptions=False):
+        """execute the fdm once for each FDMArgs in fdm_args_list, in parallel over the process pool.
+        fdm_data is not modified. Results are returned in the order of fdm_args_list.
+        If return_exceptions is set, a failed run returns its exception instead of raising it."""
+        results = [None] * len(fdm_args_list)
+        keys = [None] * len(fdm_args_list)
+        futures = {}
+        for i, fdm_args in enumerate(fdm_args_list):
+            run_data = deepcopy(fdm_data)
+            self.set_fdm_Data(run_data, fdm_args)
+            if self._cache is not None:
+                keys[i] = self._cache.key(self._fdm_path, run_data)
+                results[i] = self._cache.get(keys[i])
+                if results[i] is not None:
+                    continue
+            futures[i] = self.pool.submit(
+                run_fdm, self._fdm_path, run_data, self._tmp_path, self._timeout, self._keep_files
+            )
+        for i, future in futures.items():
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                if not return_exceptions:
+                    raise e
+                results[i] = e
+                continue
+            if self._cache is not None:
+                self._cache.put(keys[i], results[i])
+        return results
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
 
     def execute_from_file(self, file_name, fdm_args):
         fdm_data = FDMData(self._table_path, file_name)
@@ -49,12 +171,15 @@ class FDMInterface(object):
                 raise Exception(f"Cannot set new argument in the fdm data: {arg_name}")
 
     def executeFDM(self, inp_path, out_path):
-        cmd = "{} <{}> {}".format(self._fdm_path, inp_path, out_path)
-        # print(cmd)
-        status = os.system(cmd)
-        if status != 0:
+        with open(inp_path, "r") as inp_file, open(out_path, "w") as out_file:
+            try:
+                status = subprocess.run([self._fdm_path], stdin=inp_file, stdout=out_file, timeout=self._timeout)
+            except subprocess.TimeoutExpired:
+                print("FDM execution timeout!")
+                raise FDMExecutionError(f"{self._fdm_path} did not terminate within {self._timeout}s")
+        if status.returncode != 0:
             print("FDM execution error!")
-            raise Exception()
+            raise FDMExecutionError(f"{self._fdm_path} exited with status {status.returncode}")
         return FDMResult(out_path)
 
     def getFDMArgs(self, **kwargs):
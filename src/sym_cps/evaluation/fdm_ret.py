@@ -13,7 +13,19 @@
 class FDMResult:
     def __init__(self, file_path=None):
         self._path = file_path
-        self.read()
+        if file_path is not None:
+            self.read()
+
+    @classmethod
+    def from_dict(cls, data):
+        """rebuild a result without the output file, from the dictionary returned by to_dict"""
+        result = cls()
+        result._steady_state = [tuple(state) for state in data["steady_state"]]
+        result._metrics = data["metrics"]
+        return result
+
+    def to_dict(self):
+        return {"steady_state": self._steady_state, "metrics": self._metrics}
 
     def read(self):
         self._steady_state = self.readSteadyState()
@@ -141,49 +141,20 @@ def match_msg_to_zip(msg: dramatiq.Message, zip_file: Path) -> bool:
     return metadata and ("message_info" in metadata) and msg_id == metadata["message_info"]["message_id"]
 
 
-def watch_results_dir(msg: dramatiq.Message, results_dir: Path, interval: int = 10, timeout: int = 600) -> Path:
+def watch_results_dir(msg: dramatiq.Message, results_dir: Path, interval: int = 1, timeout: int = 600) -> Path:
     """
-    Checks directory every interval to see if any of the zip files match the
-    provided message.
-
-    EXAMPLE ONLY: DO NOT USE IN PRODUCTION
+    Waits for the zip file matching the provided message, using the watcher shared by all the callers waiting on
+    the same results_dir.
 
     Arguments:
       msg: The message we sent to the broker
       results_dir: dir to look for results archive in
-      interval: delay between each check of the results_dir
+      interval: delay between each check of the results_dir when inotify is not available
       timeout: time to search for archive before giving up
     """
+    from sym_cps.evaluation.watcher import get_results_watcher
 
-    elapsed = 0
-    seen = dict()
-
-    # Wait till we're out of time or have a result
-    while elapsed <= timeout:
-        print(f"Checking for result @ {elapsed}s")
-        for zip_file in results_dir.iterdir():
-
-            # Check if file is a valid zip
-            valid_zip = zip_file.is_file()
-            valid_zip = valid_zip and ".zip" == zip_file.suffix
-            valid_zip = valid_zip and zip_file not in seen
-
-            # Skip further checks if not zip
-            if not valid_zip:
-                continue
-
-            # return file if match found, else mark as seen.
-            print(f"Checking zip file: {str(zip_file)}")
-            if match_msg_to_zip(msg, zip_file):
-                return zip_file
-            else:
-                seen[zip_file] = True  # Using seen as set
-
-        # Wait for next interval
-        elapsed += interval
-        time.sleep(interval)
-
-    raise RuntimeError(f"No result found by {elapsed}s")
+    return get_results_watcher(results_dir, interval=interval).wait(msg.message_id, timeout=timeout)
 
 
 def polling_results(msg, timeout: int = 800):
@@ -196,7 +167,7 @@ def polling_results(msg, timeout: int = 800):
     return result_archive
 
 
-def extract_results(result_archive_path: Path, control_opt: bool = False) -> dict:
+def extract_results(result_archive_path: Path, control_opt: bool = False, extract_folder: Path | None = None) -> dict:
 
     print("Extracting results from result zip file...")
     fdm_extract_info = {}  # the object for collecting the score and stl files
@@ -213,7 +184,8 @@ def extract_results(result_archive_path: Path, control_opt: bool = False) -> dic
         # Check the Results folder
         folders = [fdm_test for fdm_test in fdm_folder.iterdir()]
 
-        extract_folder = fdm_extract_folder
+        if extract_folder is None:
+            extract_folder = fdm_extract_folder
 
         # result_zip_file.extract(str(fdm_folder), extract_folder)
         files = [n for n in result_zip_file.namelist() if n.startswith("Results/") and not n.endswith("/")]
@@ -276,7 +248,10 @@ def extract_results(result_archive_path: Path, control_opt: bool = False) -> dic
         from sym_cps.optimizers.control_opt.optimizer import ControlOptimizer
 
         cont_opt = ControlOptimizer(library=None)
-        ret = cont_opt.optimize(d_concrete=None)
+        """The folder of this archive: the shared one may hold the files of another design of the batch"""
+        if extract_folder is None:
+            extract_folder = fdm_extract_folder
+        ret = cont_opt.optimize(d_concrete=None, extract_folder=extract_folder)
         best_args = None
         for path_ret in ret["result"]:
             if path_ret["Path"] == 9:
@@ -0,0 +1,255 @@
+"""
+Shared watcher of the results folder.
+
+The worker drops one zip archive per message in the results folder. Instead of every caller re-listing the folder and
+re-opening every archive, one `ResultsWatcher` per folder indexes each archive by the `message_id` stored in its
+metadata.json exactly once. New archives are detected with inotify when available (Linux), otherwise with an incremental
+scan that only lists the folder when its mtime changes.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+from sym_cps.evaluation.tools import get_zip_metadata
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = os.O_NONBLOCK
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify binding through ctypes, raises OSError where inotify is not supported"""
+
+    def __init__(self, folder: Path):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify not supported")
+        self.fd = libc.inotify_init1(_IN_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self.fd, str(folder).encode(), _IN_CLOSE_WRITE | _IN_MOVED_TO)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed on {folder}")
+
+    def read_names(self, timeout: float) -> list[str]:
+        """Returns the names of the files written or moved in the folder, waiting at most 'timeout' seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset < len(buffer):
+            _, _, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset : offset + length].rstrip(b"\0").decode()
+            offset += length
+            if name != "":
+                names.append(name)
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ResultsWatcher:
+    """
+    Indexes the result archives of 'results_dir' by message_id.
+    Use `lookup` for an immediate answer, `future` or `wait` to be notified when the archive arrives.
+    """
+
+    def __init__(self, results_dir: Path, interval: float = 1.0, use_inotify: bool = True):
+        self.results_dir = Path(results_dir)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._index: dict[str, Path] = {}
+        self._futures: dict[str, list[Future]] = {}
+        """Files already read (or not results archives) are never opened again"""
+        self._known: set[str] = set()
+        """Archives that could not be read yet because they are still being written"""
+        self._incomplete: set[str] = set()
+        """Archives present before the watcher started, indexed only if an unknown message_id is looked up"""
+        self._backlog: set[str] = set()
+        self._dir_mtime: float | None = None
+        self._inotify: _Inotify | None = None
+        self._use_inotify = use_inotify
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify is not None else "scan"
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> ResultsWatcher:
+        if self.running:
+            return self
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        if self._use_inotify:
+            try:
+                self._inotify = _Inotify(self.results_dir)
+            except OSError as e:
+                print(f"inotify not available ({e}), scanning {self.results_dir} every {self.interval}s")
+                self._inotify = None
+        with self._lock:
+            self._dir_mtime = os.stat(self.results_dir).st_mtime
+            names = self._list_archives()
+            self._backlog = names - self._known
+            self._known |= names
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"ResultsWatcher({self.results_dir})", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def lookup(self, message_id: str) -> Path | None:
+        """Returns the archive produced by the message, if it is already in the results folder"""
+        with self._lock:
+            if message_id not in self._index and len(self._backlog) > 0:
+                self._index_backlog()
+            return self._index.get(message_id, None)
+
+    def future(self, message_id: str) -> Future:
+        """Returns a Future that is resolved with the archive path as soon as it appears"""
+        future: Future = Future()
+        archive = self.lookup(message_id)
+        if archive is not None:
+            future.set_result(archive)
+            return future
+        with self._lock:
+            """Could have been indexed in the meantime by the watcher thread"""
+            if message_id in self._index:
+                future.set_result(self._index[message_id])
+                return future
+            self._futures.setdefault(message_id, []).append(future)
+        """Outside the lock: the callback runs at once if the future is already done"""
+        future.add_done_callback(lambda f: self._discard(message_id, f))
+        return future
+
+    def _discard(self, message_id: str, future: Future):
+        """Drops a cancelled future, e.g. of a timed out design, so that a message never answered does not keep it"""
+        if not future.cancelled():
+            return
+        with self._lock:
+            futures = self._futures.get(message_id, [])
+            if future in futures:
+                futures.remove(future)
+            if len(futures) == 0:
+                self._futures.pop(message_id, None)
+
+    def wait(self, message_id: str, timeout: float = 600) -> Path:
+        future = self.future(message_id)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise RuntimeError(f"No result found by {timeout}s")
+
+    def refresh(self):
+        """Incremental scan, the folder is listed only if its mtime changed since the last scan"""
+        with self._lock:
+            mtime = os.stat(self.results_dir).st_mtime
+            if mtime != self._dir_mtime:
+                self._dir_mtime = mtime
+                for name in self._list_archives() - self._known:
+                    self._add(name)
+            for name in list(self._incomplete):
+                self._add(name)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._inotify is not None:
+                names = self._inotify.read_names(timeout=self.interval)
+                with self._lock:
+                    for name in names:
+                        if name.endswith(".zip") and name not in self._known:
+                            self._add(name)
+                """Safety net for files not notified, e.g. on network file systems"""
+                self.refresh()
+            else:
+                self.refresh()
+                self._stop.wait(self.interval)
+
+    def _list_archives(self) -> set[str]:
+        return {entry.name for entry in os.scandir(self.results_dir) if entry.name.endswith(".zip") and entry.is_file()}
+
+    def _index_backlog(self):
+        print(f"Indexing {len(self._backlog)} archives in {self.results_dir}")
+        for name in self._backlog:
+            self._read(name)
+        self._backlog.clear()
+
+    def _add(self, name: str):
+        """Reads the archive and resolves the futures waiting for it"""
+        message_id = self._read(name)
+        if message_id is None:
+            return
+        for future in self._futures.pop(message_id, []):
+            """Atomic check: 'wait' may cancel the future from another thread without the lock"""
+            if future.set_running_or_notify_cancel():
+                future.set_result(self._index[message_id])
+
+    def _read(self, name: str) -> str | None:
+        path = self.results_dir / name
+        if not path.is_file():
+            self._incomplete.discard(name)
+            self._known.add(name)
+            return None
+        try:
+            metadata = get_zip_metadata(path)
+        except Exception as e:
+            print(f"Cannot read the metadata of {path}: {e}")
+            self._incomplete.discard(name)
+            self._known.add(name)
+            return None
+        if metadata is None:
+            self._incomplete.add(name)
+            return None
+        self._incomplete.discard(name)
+        self._known.add(name)
+        if "message_info" not in metadata:
+            return None
+        message_id = metadata["message_info"]["message_id"]
+        self._index[message_id] = path
+        return message_id
+
+
+_watchers: dict[Path, ResultsWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def get_results_watcher(results_dir: Path, interval: float = 1.0) -> ResultsWatcher:
+    """Returns the running watcher shared by all the callers waiting on 'results_dir'"""
+    key = Path(results_dir).resolve()
+    with _watchers_lock:
+        if key not in _watchers:
+            _watchers[key] = ResultsWatcher(key, interval=interval)
+        return _watchers[key].start()
@@ -0,0 +1,47 @@
+"""
+Canonical form of the topologies, to recognize the same UAV in different grids.
+
+A topology is the graph of the components labelled with their type, at their positions in the grid. Its canonical form
+is translated so that the components start at the origin, and reflected left/right (along x) if the reflection gives a
+smaller serialization. The edges are sorted, so the order of the adjacency lists does not matter.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Callable, Iterable
+
+"""Symbols of the grid cells without a component"""
+free_symbols = {"", "UNOCCUPIED", "EMPTY"}
+
+Position = tuple[int, int, int]
+
+
+def _transforms(positions: list[Position]) -> list[Callable[[Position], Position]]:
+    """Translation of the positions to the origin, without and with the left/right reflection"""
+    min_x, min_y, min_z = (min(p[axis] for p in positions) for axis in range(3))
+    max_x = max(p[0] for p in positions)
+    return [
+        lambda p: (p[0] - min_x, p[1] - min_y, p[2] - min_z),
+        lambda p: (max_x - p[0], p[1] - min_y, p[2] - min_z),
+    ]
+
+
+def canonical_form(
+    labels: dict[Position, str], edges: Iterable[tuple[Position, Position]]
+) -> tuple[str, Callable[[Position], Position]]:
+    """Serialization of the labelled graph in canonical form and the transformation of the positions giving it"""
+    edges = list(edges)
+    if len(labels) == 0:
+        return json.dumps([[], sorted(edges)]), lambda p: p
+    forms = []
+    for transform in _transforms(list(labels.keys())):
+        nodes = sorted((transform(position), label) for position, label in labels.items())
+        transformed_edges = sorted((transform(a), transform(b)) for a, b in edges)
+        forms.append((json.dumps([nodes, transformed_edges]), transform))
+    return min(forms, key=lambda form: form[0])
+
+
+def canonical_hash(labels: dict[Position, str], edges: Iterable[tuple[Position, Position]]) -> str:
+    return hashlib.sha1(canonical_form(labels, edges)[0].encode("utf-8")).hexdigest()
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-import hashlib
 from dataclasses import dataclass, field
 
 from sym_cps.grammar import Grammar, Symbol, SymbolConnection
+from sym_cps.grammar.canonical import canonical_form, canonical_hash, free_symbols
 
 
 @dataclass
@@ -13,11 +13,46 @@ class AbstractGrid:
     name: str = ""
 
     def __hash__(self):
-        return hashlib.sha1((str(self.nodes) + str(self.adjacencies)).encode("utf-8"))
+        return int(self.canonical_hash[:16], 16)
 
     @property
     def id(self):
-        return str(self.__hash__())
+        return self.canonical_hash
+
+    @property
+    def labels(self) -> dict[tuple, str]:
+        """Symbol of each cell with a component"""
+        return {
+            (x, y, z): symbol
+            for x, plane in enumerate(self.nodes)
+            for y, row in enumerate(plane)
+            for z, symbol in enumerate(row)
+            if symbol not in free_symbols
+        }
+
+    @property
+    def edges(self) -> list[tuple[tuple, tuple]]:
+        return [(tuple(a), tuple(b)) for a, bs in self.adjacencies.items() for b in bs]
+
+    @property
+    def canonical_hash(self) -> str:
+        """Same for the grids of the same topology, translated, reflected left/right or with reordered adjacencies"""
+        return canonical_hash(self.labels, self.edges)
+
+    def canonical(self) -> AbstractGrid:
+        """Grid of the canonical form: cropped around the components, reflected if needed, adjacencies sorted"""
+        labels = self.labels
+        _, transform = canonical_form(labels, self.edges)
+        labels = {transform(position): symbol for position, symbol in labels.items()}
+        shape = [max((p[axis] + 1 for p in labels), default=0) for axis in range(3)]
+        nodes = [[["" for _ in range(shape[2])] for _ in range(shape[1])] for _ in range(shape[0])]
+        for (x, y, z), symbol in labels.items():
+            nodes[x][y][z] = symbol
+        adjacencies = {}
+        for a, b in self.edges:
+            adjacencies.setdefault(transform(a), []).append(transform(b))
+        adjacencies = {a: sorted(bs) for a, bs in sorted(adjacencies.items())}
+        return AbstractGrid(nodes=nodes, adjacencies=adjacencies, name=self.name)
 
     @property
     def n_wings(self):
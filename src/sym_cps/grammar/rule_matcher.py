@@ -0,0 +1,131 @@
+"""
+Grammar rules of rules.py compiled for the random topology generation.
+
+The symbols are coded as integers and the grid is an int8 array with a border of BOUNDARY cells, so that the neighbour
+of a node in every direction is a cell of the array. For the node and each of its 6 neighbours a table gives the bitmask
+of the rules accepting each symbol code: the rules matching a node are the AND of the masks of its 7 cells, read from
+the grid with one lookup.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+"""Condition keys of the rules and offset of the cell they refer to"""
+condition_offsets = {
+    "S": (0, 0, 0),
+    "RS": (1, 0, 0),
+    "LS": (-1, 0, 0),
+    "T": (0, 0, 1),
+    "B": (0, 0, -1),
+    "F": (0, 1, 0),
+    "R": (0, -1, 0),
+}
+
+"""Symbols of the grids, the productions of the rules can add others"""
+grid_symbols = ["", "UNOCCUPIED", "EMPTY", "FUSELAGE", "ROTOR", "WING", "CONNECTOR", "HUB", "TUBE", "BOUNDARY"]
+
+
+class CompiledRules(object):
+    """Rules of a rule dict matched on int8 grids, equivalent to get_matching_rules on the grids of strings"""
+
+    def __init__(self, rule_dict: dict, symbol_groups: dict[str, list[str]]):
+        self.rules: list[dict] = list(rule_dict.values())
+        self.symbols: list[str] = list(grid_symbols)
+        for rule in self.rules:
+            symbol = rule["production"].get("S")
+            if symbol is not None and symbol not in self.symbols:
+                self.symbols.append(symbol)
+        if len(self.symbols) > np.iinfo(np.int8).max:
+            raise Exception(f"Too many symbols for an int8 grid: {len(self.symbols)}")
+        self.codes: dict[str, int] = {symbol: code for code, symbol in enumerate(self.symbols)}
+        self.unoccupied = self.codes["UNOCCUPIED"]
+        self.boundary = self.codes["BOUNDARY"]
+
+        """masks[c][code]: bitmask of the rules accepting the symbol 'code' in the cell of condition c"""
+        self.masks: list[list[int]] = [[0] * len(self.symbols) for _ in condition_offsets]
+        for r, rule in enumerate(self.rules):
+            for c, key in enumerate(condition_offsets):
+                conditions = rule["conditions"].get(key)
+                accepted = set(conditions) if conditions is not None else set(self.symbols)
+                for condition in conditions or []:
+                    accepted.update(symbol_groups.get(condition, []))
+                for code, symbol in enumerate(self.symbols):
+                    if code == self.boundary and conditions is not None:
+                        """Cells out of the grid only match the BOUNDARY condition itself, not the groups having it"""
+                        accepted_symbol = key != "S" and "BOUNDARY" in conditions
+                    else:
+                        accepted_symbol = symbol in accepted
+                    if accepted_symbol:
+                        self.masks[c][code] |= 1 << r
+        self.rotor_rules = sum(1 << r for r, rule in enumerate(self.rules) if "ROTOR" in rule["production"].values())
+        self.wing_rules = sum(1 << r for r, rule in enumerate(self.rules) if "WING" in rule["production"].values())
+        """Offsets of the cells of the conditions in the flattened grids, by grid shape"""
+        self._flat_offsets: dict[tuple, np.ndarray] = {}
+
+    def new_grid(self, width: int, length: int, depth: int) -> np.ndarray:
+        """UNOCCUPIED grid, node (i, j, k) is the cell (i + 1, j + 1, k + 1) of the array"""
+        grid = np.full((width + 2, length + 2, depth + 2), self.boundary, dtype=np.int8)
+        grid[1:-1, 1:-1, 1:-1] = self.unoccupied
+        return grid
+
+    def get(self, grid: np.ndarray, node) -> str:
+        return self.symbols[grid[node[0] + 1, node[1] + 1, node[2] + 1]]
+
+    def set(self, grid: np.ndarray, node, symbol: str):
+        grid[node[0] + 1, node[1] + 1, node[2] + 1] = self.codes[symbol]
+
+    def encode(self, state: list[list[list[str]]]) -> np.ndarray:
+        """int8 grid of a grid of strings"""
+        grid = self.new_grid(len(state), len(state[0]), len(state[0][0]))
+        grid[1:-1, 1:-1, 1:-1] = [[[self.codes[symbol] for symbol in row] for row in plane] for plane in state]
+        return grid
+
+    def decode(self, grid: np.ndarray) -> list[list[list[str]]]:
+        """Grid of strings without the border"""
+        symbols = np.array(self.symbols, dtype=object)
+        return symbols[grid[1:-1, 1:-1, 1:-1]].tolist()
+
+    def matching_rules(self, node, grid: np.ndarray, remaining_rotors: int, remaining_wings: int) -> list[int]:
+        """Indices of the rules matching the node"""
+        _, length, depth = grid.shape
+        if grid.shape not in self._flat_offsets:
+            self._flat_offsets[grid.shape] = np.array(
+                [(i * length + j) * depth + k for i, j, k in condition_offsets.values()], dtype=np.intp
+            )
+        center = ((node[0] + 1) * length + node[1] + 1) * depth + node[2] + 1
+        cells = grid.ravel().take(self._flat_offsets[grid.shape] + center).tolist()
+        accepted = -1
+        for masks, code in zip(self.masks, cells):
+            accepted &= masks[code]
+        if not remaining_rotors:
+            accepted &= ~self.rotor_rules
+        if not remaining_wings:
+            accepted &= ~self.wing_rules
+        ret = []
+        while accepted:
+            lowest = accepted & -accepted
+            ret.append(lowest.bit_length() - 1)
+            accepted ^= lowest
+        return ret
+
+    def get_children(self, node, grid: np.ndarray, adjacency_dict: dict) -> list:
+        """get_children on the int8 grid"""
+        children = []
+        if tuple(node) in adjacency_dict:
+            for child in adjacency_dict[tuple(node)]:
+                symbol = self.get(grid, child)
+                if symbol != "EMPTY" and symbol != "UNOCCUPIED":
+                    children.append(tuple(child))
+                elif symbol == "UNOCCUPIED" and node not in children:
+                    children.append(node)
+        else:
+            """The border is not UNOCCUPIED, the neighbours out of the grid are never added"""
+            i, j, k = node[0] + 1, node[1] + 1, node[2] + 1
+            for key in ["RS", "LS", "F", "R", "T", "B"]:
+                di, dj, dk = condition_offsets[key]
+                if grid[i + di, j + dj, k + dk] == self.unoccupied:
+                    children.append((node[0] + di, node[1] + dj, node[2] + dk))
+            if children:
+                children.append((node[0], node[1], node[2]))
+        return children
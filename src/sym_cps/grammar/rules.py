@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 import copy
+import itertools
 import json
 import random
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
 
 from sym_cps.grammar import AbstractGrid
+from sym_cps.grammar.rule_matcher import CompiledRules
 from sym_cps.representation.design.abstract import AbstractDesign
 from sym_cps.shared.paths import data_folder, random_topologies_generated_path, best_component_choices_path, \
     random_topologies_all_path
@@ -12,6 +17,18 @@ from sym_cps.tools.my_io import save_to_file
 
 rule_dict_path_constant = data_folder / "reverse_engineering" / "grammar_rules.json"
 
+symbol_groups = {
+    "BODY": ["FUSELAGE", "HUB", "TUBE"],
+    "CONNECTOR": ["HUB", "TUBE"],
+    "ANYTHING": ["FUSELAGE", "HUB", "TUBE", "WING", "ROTOR", "CONNECTOR"],
+    "NON-WING": ["FUSELAGE", "HUB", "TUBE", "WING", "ROTOR", "CONNECTOR", "EMPTY", "UNOCCUPIED", "BOUNDARY"],
+    "FREE": ["UNOCCUPIED", "EMPTY", ""],
+    "WING-LEFT": ["FUSELAGE", "CONNECTOR", "ROTOR", "WING"],
+    "WING-RIGHT": ["EMPTY", "UNOCCUPIED", "CONNECTOR", "ROTOR", "BOUNDARY"],
+    "WING-TOP": ["EMPTY", "UNOCCUPIED", "CONNECTOR", "WING", "BOUNDARY"],
+    "WING_FRONT": ["EMPTY", "UNOCCUPIED", "CONNECTOR", "ROTOR", "BOUNDARY"],
+}
+
 
 def node_matches_rule_center(node, state, rule, symbol_groups, remaining_rotors, remaining_wings):
     rule_lhs = rule["conditions"]
@@ -167,6 +184,11 @@ def apply_rule(node, state, adjacency_dict, rule_rhs, remaining_rotors, remainin
         remaining_rotors -= 1
     if "WING" in rule_rhs["S"]:
         remaining_wings -= 1
+    adjacency_dict = add_rule_edges(node, adjacency_dict, rule_rhs)
+    return state, adjacency_dict, remaining_rotors, remaining_wings
+
+
+def add_rule_edges(node, adjacency_dict, rule_rhs):
     if "EDGES" in rule_rhs:
         if "LS" in rule_rhs["EDGES"]:
             if (node[0] - 1, node[1], node[2]) in adjacency_dict:
@@ -198,7 +220,7 @@ def apply_rule(node, state, adjacency_dict, rule_rhs, remaining_rotors, remainin
                 adjacency_dict[(node[0], node[1], node[2] - 1)].append((node[0], node[1], node[2]))
             else:
                 adjacency_dict[(node[0], node[1], node[2] - 1)] = [(node[0], node[1], node[2])]
-    return state, adjacency_dict, remaining_rotors, remaining_wings
+    return adjacency_dict
 
 
 def get_children(node, state, adjacency_dict):
@@ -319,27 +341,46 @@ def components_count(design):
     return num_fuselage, num_rotors, num_wings
 
 
+def optimized_n_propellers() -> set[int]:
+    """Numbers of propellers with optimized components, the only ones kept by generate_random_new_topology"""
+    with open(best_component_choices_path) as f:
+        return {int(k) for k in json.load(f).keys()}
+
+
 def generate_random_new_topology(
-        design_tag: str, design_index: int, max_right_num_rotors: int = -1, max_right_num_wings: int = -1
+        design_tag: str,
+        design_index: int,
+        max_right_num_rotors: int = -1,
+        max_right_num_wings: int = -1,
+        grids: Iterator[AbstractGrid] | None = None,
 ) -> AbstractDesign:
-    from sym_cps.scripts.general import get_all_stat
+    """'grids' is a stream of candidate topologies, e.g. RandomTopologyGenerator.generate(), by default the candidates
+    are generated one by one in this process. Raises an Exception if 'grids' ends without a new topology with optimized
+    components"""
     random_topologies_generated: dict = json.load(open(random_topologies_all_path))
 
-    n_propellers_optimized = [int(k) for k in list(json.load(open(best_component_choices_path)).keys())]
+    n_propellers_optimized = optimized_n_propellers()
     print(best_component_choices_path)
     print(n_propellers_optimized)
-    while True:
-        grid: AbstractGrid = generate_random_topology(
-            max_right_num_rotors=max_right_num_rotors, max_right_num_wings=max_right_num_wings
+    if grids is None:
+        grids = (
+            generate_random_topology(
+                max_right_num_rotors=max_right_num_rotors, max_right_num_wings=max_right_num_wings
+            )
+            for _ in itertools.count()
         )
+    for grid in grids:
+        """The number of propellers is known from the grid, before building the AbstractDesign"""
+        if grid.n_props not in n_propellers_optimized:
+            print(f"Optimized components for {grid.n_props} missing")
+            continue
         abstract_design: AbstractDesign = AbstractDesign("")
         abstract_design.parse_grid(grid)
         print(f"{abstract_design.id}")
-        if abstract_design.n_propellers not in n_propellers_optimized:
-            print(f"Optimized components for {abstract_design.n_propellers} missing")
-            continue
         if abstract_design.id not in random_topologies_generated.keys():
             break
+    else:
+        raise Exception("No new topology with optimized components left in the candidate topologies")
 
     design_id = f"{design_index}__{design_tag}_w{grid.n_wings}_p{grid.n_props}"
     abstract_design.name = design_id
@@ -350,6 +391,19 @@ def generate_random_new_topology(
     return abstract_design
 
 
+@lru_cache
+def load_rules(rule_dict_path: Path) -> dict:
+    """The rules are read once per process"""
+    with open(rule_dict_path) as f:
+        return json.load(f)
+
+
+@lru_cache
+def compile_rules(rule_dict_path: Path) -> CompiledRules:
+    """The rules are compiled once per process"""
+    return CompiledRules(load_rules(rule_dict_path), symbol_groups)
+
+
 def generate_random_topology(
         right_width=None,
         length=None,
@@ -359,17 +413,8 @@ def generate_random_topology(
         max_right_num_wings: int = -1,
         rule_dict_path=rule_dict_path_constant,
 ):
-    symbol_groups = {
-        "BODY": ["FUSELAGE", "HUB", "TUBE"],
-        "CONNECTOR": ["HUB", "TUBE"],
-        "ANYTHING": ["FUSELAGE", "HUB", "TUBE", "WING", "ROTOR", "CONNECTOR"],
-        "NON-WING": ["FUSELAGE", "HUB", "TUBE", "WING", "ROTOR", "CONNECTOR", "EMPTY", "UNOCCUPIED", "BOUNDARY"],
-        "FREE": ["UNOCCUPIED", "EMPTY", ""],
-        "WING-LEFT": ["FUSELAGE", "CONNECTOR", "ROTOR", "WING"],
-        "WING-RIGHT": ["EMPTY", "UNOCCUPIED", "CONNECTOR", "ROTOR", "BOUNDARY"],
-        "WING-TOP": ["EMPTY", "UNOCCUPIED", "CONNECTOR", "WING", "BOUNDARY"],
-        "WING_FRONT": ["EMPTY", "UNOCCUPIED", "CONNECTOR", "ROTOR", "BOUNDARY"],
-    }
+    """The grid is an int8 array of symbol codes while the rules are applied, see CompiledRules"""
+    rules = compile_rules(rule_dict_path)
 
     while True:
         if right_width is None:
@@ -387,37 +432,33 @@ def generate_random_topology(
             fuselage_position_z = random.choice(range(depth))
             origin = [0, fuselage_position_y, fuselage_position_z]
         traversal_stack = [origin]
-        state = []
-        rule_dict = json.load(open(rule_dict_path))
+        grid = rules.new_grid(right_width, length, depth)
         remaining_rotors = max_right_num_rotors
         remaining_wings = max_right_num_wings
-        for i in range(right_width):
-            state.append([])
-            for j in range(length):
-                state[-1].append([])
-                for k in range(depth):
-                    state[-1][-1].append("UNOCCUPIED")
         adjacency_dict = {}
         while traversal_stack:
             node = traversal_stack.pop()
-            if (node[0] == origin[0] or node[1] == origin[1] or node[2] == origin[2]) and state[origin[0]][origin[1]][
-                origin[2]
-            ] == "UNOCCUPIED":
-                state[origin[0]][origin[1]][origin[2]] = "FUSELAGE"
+            if (node[0] == origin[0] or node[1] == origin[1] or node[2] == origin[2]) and (
+                rules.get(grid, origin) == "UNOCCUPIED"
+            ):
+                rules.set(grid, origin, "FUSELAGE")
             else:
-                matching_rules = get_matching_rules(
-                    node, state, rule_dict, symbol_groups, remaining_rotors, remaining_wings
-                )
+                matching_rules = rules.matching_rules(node, grid, remaining_rotors, remaining_wings)
                 if not matching_rules:
                     continue
-                rule_to_apply = random.choice(matching_rules)
-                state, adjacency_dict, remaining_rotors, remaining_wings = apply_rule(
-                    node, state, adjacency_dict, rule_to_apply["production"], remaining_rotors, remaining_wings
-                )
-            children = get_children(node, state, adjacency_dict)
+                rule_rhs = rules.rules[random.choice(matching_rules)]["production"]
+                if "S" in rule_rhs:
+                    rules.set(grid, node, rule_rhs["S"])
+                if "ROTOR" in rule_rhs["S"]:
+                    remaining_rotors -= 1
+                if "WING" in rule_rhs["S"]:
+                    remaining_wings -= 1
+                adjacency_dict = add_rule_edges(node, adjacency_dict, rule_rhs)
+            children = rules.get_children(node, grid, adjacency_dict)
             for child in children:
                 if child not in traversal_stack:
                     traversal_stack.append(child)
+        state = rules.decode(grid)
         state, adjacency_dict = trim_loose_ends(state, adjacency_dict, symbol_groups)
         left_state, left_adjacency_dict = reflect_state_and_edges(state, adjacency_dict)
         design, joint_adjacency_dict = concatenate_state_and_edges(
@@ -425,7 +466,8 @@ def generate_random_topology(
         )
         num_fuselage, num_rotors, num_wings = components_count(design)
         if num_fuselage and num_rotors:  # and num_wings
-            return AbstractGrid(nodes=design, adjacencies=joint_adjacency_dict)
+            """In canonical form, the same topology always gives the same AbstractDesign and design_swri"""
+            return AbstractGrid(nodes=design, adjacencies=joint_adjacency_dict).canonical()
 
 
 def get_seed_design_topo(design_name: str):
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import math
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator
+
+from sym_cps.grammar import AbstractGrid
+from sym_cps.grammar.rules import generate_random_topology, rule_dict_path_constant
+from sym_cps.tools.topology_index import TopologyIndex
+
+
+def grid_hash(grid: AbstractGrid) -> str:
+    """Canonical hash of the topology of the grid, see AbstractGrid.canonical_hash"""
+    return grid.canonical_hash
+
+
+def _generate_batch(
+    seed: int,
+    n: int,
+    max_right_num_rotors: int,
+    max_right_num_wings: int,
+    n_props_allowed: set[int] | None,
+    rule_dict_path: Path,
+) -> list[tuple[str, AbstractGrid]]:
+    """Runs in the worker processes: generates 'n' grids from its own seed and returns them with their hash"""
+    random.seed(seed)
+    grids = []
+    for _ in range(n):
+        grid = generate_random_topology(
+            max_right_num_rotors=max_right_num_rotors,
+            max_right_num_wings=max_right_num_wings,
+            rule_dict_path=rule_dict_path,
+        )
+        if n_props_allowed is not None and grid.n_props not in n_props_allowed:
+            continue
+        grids.append((grid_hash(grid), grid))
+    return grids
+
+
+class RandomTopologyGenerator:
+    """
+    Generates unique random topologies from the grammar rules on a pool of processes.
+    Every batch runs with an independent seed drawn from 'seed'; the grids are deduplicated against 'index', which can be
+    shared across runs to never produce the same topology twice.
+    'n_props_allowed' discards in the workers the grids whose number of propellers is not in the set, it can be updated
+    between two grids and applies to the batches submitted after the update.
+    'prefetch' is the number of batches running or waiting to be consumed, two per worker by default: a slow consumer
+    (e.g. evaluating each design) should keep it low so that the workers do not compete with it.
+    """
+
+    def __init__(
+        self,
+        index: TopologyIndex | None = None,
+        max_workers: int | None = None,
+        batch_size: int = 50,
+        seed: int | None = None,
+        max_right_num_rotors: int = -1,
+        max_right_num_wings: int = -1,
+        n_props_allowed: set[int] | None = None,
+        rule_dict_path: Path = rule_dict_path_constant,
+        prefetch: int | None = None,
+    ):
+        self.index = index if index is not None else TopologyIndex()
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._seeds = random.Random(seed)
+        self.max_right_num_rotors = max_right_num_rotors
+        self.max_right_num_wings = max_right_num_wings
+        self.n_props_allowed = n_props_allowed
+        self.rule_dict_path = rule_dict_path
+        self.prefetch = prefetch
+        self.n_generated = 0
+        self.n_duplicates = 0
+
+    def _submit(self, executor: ProcessPoolExecutor):
+        return executor.submit(
+            _generate_batch,
+            self._seeds.getrandbits(64),
+            self.batch_size,
+            self.max_right_num_rotors,
+            self.max_right_num_wings,
+            self.n_props_allowed,
+            self.rule_dict_path,
+        )
+
+    def generate(self, n: int | None = None) -> Iterator[AbstractGrid]:
+        """Yields 'n' topologies (endlessly if None) that are not in the index, adding them to it"""
+        if n is None:
+            n = math.inf
+        n_yielded = 0
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            """By default two batches per worker keep the pool busy while the results are consumed"""
+            n_batches = self.prefetch
+            if n_batches is None:
+                n_batches = 2 * (self.max_workers if self.max_workers is not None else os.cpu_count() or 1)
+            running = {self._submit(executor) for _ in range(n_batches)}
+            try:
+                while n_yielded < n:
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for topology_hash, grid in future.result():
+                            self.n_generated += 1
+                            if n_yielded >= n:
+                                break
+                            if not self.index.add(topology_hash):
+                                self.n_duplicates += 1
+                                continue
+                            n_yielded += 1
+                            yield grid
+                        if n_yielded < n:
+                            running.add(self._submit(executor))
+            finally:
+                for future in running:
+                    future.cancel()
+                self.index.flush()
+
+    def __str__(self):
+        return (
+            f"{self.n_generated} topologies generated, {self.n_duplicates} duplicates, "
+            f"{len(self.index)} topologies in the index"
+        )
@@ -0,0 +1,207 @@
+"""
+Index of the isomorphism classes of design (sub)graphs, e.g. of the decompositions of find_isos.
+
+Two graphs are in the same class if an isomorphism maps nodes to nodes of the same component type and edges to edges
+with the same label, as with weak_node_comparison and weak_edge_comparison. The graphs are put in buckets by invariants
+that isomorphic graphs share: the histograms of node and edge labels, the degree sequence and a Weisfeiler-Lehman hash.
+VF2 then only runs against the classes of the same bucket, and only checks that an isomorphism exists.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import Counter
+
+from igraph import Graph
+
+
+def node_labels(graph: Graph) -> list[str]:
+    return [c_type.id for c_type in graph.vs["c_type"]] if graph.vcount() > 0 else []
+
+
+def edge_labels(graph: Graph) -> list[str]:
+    return [str(label) for label in graph.es["label"]] if graph.ecount() > 0 else []
+
+
+def _digest(element: object) -> str:
+    return hashlib.sha1(json.dumps(element).encode("utf-8")).hexdigest()
+
+
+def wl_hash(graph: Graph, nodes: list[str], edges: list[str], iterations: int = 3) -> str:
+    """Weisfeiler-Lehman hash of the labelled graph, following the direction of the edges if it is directed"""
+    out_edges: list[list] = [[] for _ in range(graph.vcount())]
+    in_edges: list[list] = [[] for _ in range(graph.vcount())]
+    for label, (source, target) in zip(edges, graph.get_edgelist()):
+        out_edges[source].append((label, target))
+        in_edges[target].append((label, source))
+        if not graph.is_directed():
+            out_edges[target].append((label, source))
+    labels = list(nodes)
+    for _ in range(iterations):
+        labels = [
+            _digest(
+                [
+                    labels[v],
+                    sorted((label, labels[u]) for label, u in out_edges[v]),
+                    sorted((label, labels[u]) for label, u in in_edges[v]),
+                ]
+            )[:16]
+            for v in range(graph.vcount())
+        ]
+    return _digest(sorted(labels))
+
+
+def invariants_key(graph: Graph, iterations: int = 3) -> str:
+    """Key of the bucket of the graph, equal for isomorphic graphs"""
+    nodes, edges = node_labels(graph), edge_labels(graph)
+    degrees = sorted(zip(graph.indegree(), graph.outdegree())) if graph.is_directed() else sorted(graph.degree())
+    return _digest(
+        [
+            graph.vcount(),
+            graph.ecount(),
+            sorted(Counter(nodes).items()),
+            sorted(Counter(edges).items()),
+            degrees,
+            wl_hash(graph, nodes, edges, iterations),
+        ]
+    )
+
+
+class IsomorphismIndex(object):
+    """Isomorphism classes of the graphs added, each represented by the first graph of the class"""
+
+    def __init__(self, iterations: int = 3):
+        self.iterations = iterations
+        """Representatives of the classes in each bucket, with their node and edge colors"""
+        self._buckets: dict[str, list[tuple[Graph, list[int], list[int]]]] = {}
+        """Labels as integer colors, so that VF2 compares them without calling back into Python"""
+        self._colors: dict[str, int] = {}
+        """Class of the graphs already added, by object id (the graphs are kept alive here)"""
+        self._added: dict[int, tuple[Graph, str]] = {}
+        self.n_vf2 = 0
+
+    def _to_colors(self, labels: list[str]) -> list[int]:
+        return [self._colors.setdefault(label, len(self._colors)) for label in labels]
+
+    def add(self, graph: Graph) -> tuple[str, bool]:
+        """Class id of the graph, True if the graph is the first of its class"""
+        if id(graph) in self._added and self._added[id(graph)][0] is graph:
+            return self._added[id(graph)][1], False
+        key = invariants_key(graph, self.iterations)
+        bucket = self._buckets.setdefault(key, [])
+        colors, edge_colors = self._to_colors(node_labels(graph)), self._to_colors(edge_labels(graph))
+        for i, (representative, representative_colors, representative_edge_colors) in enumerate(bucket):
+            self.n_vf2 += 1
+            if representative.isomorphic_vf2(
+                graph,
+                color1=representative_colors,
+                color2=colors,
+                edge_color1=representative_edge_colors or None,
+                edge_color2=edge_colors or None,
+            ):
+                class_id, is_new = f"{key}_{i}", False
+                break
+        else:
+            class_id, is_new = f"{key}_{len(bucket)}", True
+            bucket.append((graph, colors, edge_colors))
+        self._added[id(graph)] = (graph, class_id)
+        return class_id, is_new
+
+    def __contains__(self, graph: Graph) -> bool:
+        """Whether a graph of the same class has been added, without adding it"""
+        key = invariants_key(graph, self.iterations)
+        colors, edge_colors = self._to_colors(node_labels(graph)), self._to_colors(edge_labels(graph))
+        return any(
+            representative.isomorphic_vf2(
+                graph,
+                color1=representative_colors,
+                color2=colors,
+                edge_color1=representative_edge_colors or None,
+                edge_color2=edge_colors or None,
+            )
+            for representative, representative_colors, representative_edge_colors in self._buckets.get(key, [])
+        )
+
+    @property
+    def representatives(self) -> list[Graph]:
+        return [representative for bucket in self._buckets.values() for representative, _, _ in bucket]
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def __str__(self):
+        return f"{len(self)} isomorphism classes in {len(self._buckets)} buckets, {self.n_vf2} VF2 checks"
+
+
+class ClassMembership(object):
+    """Isomorphism classes of the decompositions of several designs, by number of nodes, with the designs having each.
+
+    Gives the classes that find_isos found by comparing every combination of one decomposition per design (among the
+    designs with decompositions of that size), from the designs of each class only:
+    - global: a combination of the class only, i.e. every design has the class;
+    - local: a combination with two members of the class and another decomposition with the same node types (different
+      node types are not comparable), i.e. a design without the class or with another class of the same node types.
+    """
+
+    def __init__(self):
+        self._indexes: dict[int, IsomorphismIndex] = {}
+        """Designs having each class, and the node types and size of the class"""
+        self.designs: dict[str, set] = {}
+        self.types: dict[str, frozenset] = {}
+        self.size: dict[str, int] = {}
+        """Classes of each design, by size"""
+        self.classes_of: dict[int, dict[object, set[str]]] = {}
+
+    def add(self, design: object, graph: Graph) -> tuple[str, bool]:
+        """Class id of the graph, True if it is the first graph of its class in the design"""
+        size = graph.vcount()
+        class_id, _ = self._indexes.setdefault(size, IsomorphismIndex()).add(graph)
+        if class_id not in self.designs:
+            self.designs[class_id] = set()
+            self.types[class_id] = frozenset(graph.vs["label"])
+            self.size[class_id] = size
+        is_new = design not in self.designs[class_id]
+        self.designs[class_id].add(design)
+        self.classes_of.setdefault(size, {}).setdefault(design, set()).add(class_id)
+        return class_id, is_new
+
+    def _comparable(self, class_id: str) -> bool:
+        """Every design with decompositions of the size has one with the node types of the class"""
+        types = self.types[class_id]
+        return all(
+            any(self.types[other] == types for other in classes)
+            for classes in self.classes_of[self.size[class_id]].values()
+        )
+
+    def global_classes(self) -> dict[str, set]:
+        """{class id: designs}"""
+        ret = {}
+        for class_id, designs in self.designs.items():
+            all_designs = self.classes_of[self.size[class_id]].keys()
+            if len(all_designs) > 1 and len(designs) == len(all_designs):
+                ret[class_id] = set(designs)
+        return ret
+
+    def local_classes(self) -> dict[str, set]:
+        """{class id: designs whose decompositions of the class are in a combination where it is local}"""
+        ret = {}
+        for class_id, designs in self.designs.items():
+            if len(designs) < 2 or not self._comparable(class_id):
+                continue
+            all_designs = self.classes_of[self.size[class_id]]
+            if len(designs) < len(all_designs):
+                """A design without the class completes the combinations of all the designs of the class"""
+                ret[class_id] = set(designs)
+                continue
+            reported = set()
+            for design in designs:
+                others = all_designs[design] - {class_id}
+                if len(designs) > 2 and any(self.types[other] == self.types[class_id] for other in others):
+                    reported |= designs - {design}
+            if len(reported) > 0:
+                ret[class_id] = reported
+        return ret
+
+    def __len__(self) -> int:
+        return len(self.designs)
@@ -0,0 +1,101 @@
+"""
+Checkpoint of the structure mining of random_sampling_for_n.
+
+Each subset of node types is mined once: its structures are appended as a json line to the checkpoint file as soon as
+its shard completes, so an interrupted run resumes with the subsets not mined yet. Each line records the designs it was
+mined in and only the lines of the same designs are read, so a run on other designs mines every subset again.
+The summary of all the structures (structure_summary.json) is the merge of these lines in order, rebuilt when resuming.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+from pathlib import Path
+from typing import Iterable, Iterator
+
+
+def subset_key(node_types: Iterable[str]) -> str:
+    return "-".join(sorted(set(node_types)))
+
+
+def read_mined_subsets(file_path: Path, design_ids: Iterable[str]) -> dict[str, dict]:
+    """{subset key: summary} of the json lines in file_path mined in the designs 'design_ids', in the order they were
+    mined. A line truncated by an interrupted run is ignored, so its subset is mined again."""
+    designs = sorted(design_ids)
+    mined = {}
+    if not file_path.exists():
+        return mined
+    with open(file_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("designs") == designs:
+                mined[record["key"]] = record["summary"]
+    return mined
+
+
+def append_mined_subsets(file_path: Path, design_ids: Iterable[str], records: list[dict]):
+    """Appends the records {"key": subset key, "summary": summary} mined in the designs 'design_ids'"""
+    designs = sorted(design_ids)
+    if len(records) == 0:
+        return
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(file_path, "a") as f:
+        """A truncated last line (interrupted run) must not swallow the first new record"""
+        if f.tell() > 0:
+            with open(file_path, "rb") as r:
+                r.seek(-1, 2)
+                if r.read(1) != b"\n":
+                    f.write("\n")
+        for record in records:
+            f.write(json.dumps({**record, "designs": designs}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def merge_summary(total_summary: dict, key: str, summary: dict) -> dict:
+    """Adds the LOCAL and GLOBAL structures found with the node types 'key' to 'total_summary'"""
+    for scope in ["LOCAL", "GLOBAL"]:
+        for structure_key, structures in summary[scope].items():
+            if structure_key not in total_summary[scope].keys():
+                total_summary[scope][structure_key] = {
+                    "VARIATIONS": list(structures),
+                    "KEYS": [key],
+                    "COUNT": len(structures),
+                }
+                continue
+            entry = total_summary[scope][structure_key]
+            if key not in entry["KEYS"]:
+                entry["KEYS"].append(key)
+            for elem in structures:
+                if elem not in entry["VARIATIONS"]:
+                    entry["VARIATIONS"].append(elem)
+                    entry["COUNT"] += 1
+    return total_summary
+
+
+def random_subsets(
+    node_types: list[str], visited: set[str], rng: random.Random, first: Iterable[list[str]] = ()
+) -> Iterator[list[str]]:
+    """Subsets of node types whose key is not in 'visited', adding it: the 'first' ones, then random ones (a random size,
+    then random types) until every subset of 'node_types' has been drawn"""
+    for subset in first:
+        key = subset_key(subset)
+        if key not in visited:
+            visited.add(key)
+            yield sorted(set(subset))
+    node_types = sorted(set(node_types))
+    n_subsets = 2 ** len(node_types) - 1
+    n_drawn = sum(1 for key in visited if set(key.split("-")) <= set(node_types))
+    while n_drawn < n_subsets:
+        subset = rng.sample(node_types, rng.randint(1, len(node_types)))
+        key = subset_key(subset)
+        if key in visited:
+            continue
+        visited.add(key)
+        n_drawn += 1
+        yield sorted(subset)
@@ -2,87 +2,65 @@ from __future__ import annotations
 
 import json
 import random
-from itertools import product
-
-from sym_cps.isomorphisms.tools import find_isomorphisms, get_subgraph, is_isomorphism_present
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+from igraph import Graph
+
+from sym_cps.isomorphisms.index import ClassMembership
+from sym_cps.isomorphisms.mining import (
+    append_mined_subsets,
+    merge_summary,
+    random_subsets,
+    read_mined_subsets,
+    subset_key,
+)
+from sym_cps.isomorphisms.tools import get_subgraph
 from sym_cps.representation.design.concrete import DConcrete
 from sym_cps.shared.designs import designs
-from sym_cps.shared.paths import output_folder, popular_nodes_keys_path
-from sym_cps.tools.graphs import graph_to_pdf
+from sym_cps.shared.paths import mined_subsets_path, output_folder, popular_nodes_keys_path
+from sym_cps.tools.graphs import graph_to_dict, graph_to_pdf
 from sym_cps.tools.my_io import save_to_file
 
 
 def find_isos(
     designs_to_decompose: list[DConcrete], key_nodes: list[str] | None = None
 ) -> tuple[dict[str, list[dict]], dict[str, list[dict]], dict, dict]:
+    """Structures shared by the designs decomposed at 'key_nodes', by the node types of the structure:
+    local ones (shared by some designs) and global ones (shared by every design with decompositions of that size).
+    The decompositions are grouped in isomorphism classes as they are produced, one design at a time, and the
+    structures are found from the designs of each class, see ClassMembership"""
     if key_nodes is None:
         key_nodes = ["BatteryController", "Tube", "Hub2", "Hub3", "Hub4", "Hub5", "Hub6"]
 
-    subgraphs = []
-
-    for design in designs_to_decompose:
-
-        dec_designs: dict[int, list] = {}
-        decompositions = get_subgraph(design, key_nodes).graph.decompose()
-        for dec in decompositions:
-            size = len(dec.vs)
-            if size > 1:
-                if size in dec_designs.keys():
-                    if not is_isomorphism_present(list(dec_designs[size]), dec):
-                        dec_designs[size].append(dec)
-                else:
-                    dec_designs[size] = [dec]
-        if len(dec_designs.keys()) > 0:
-            subgraphs.append(dec_designs)
-
-    if len(subgraphs) <= 1:
-        return {}, {}, {}, {}
-
-    n_nodes_min = 100
-    n_nodes_max = 1
-    for elem in subgraphs:
-        loc_min = min(elem.keys())
-        loc_max = max(elem.keys())
-        if loc_min <= n_nodes_min:
-            n_nodes_min = loc_min
-        if loc_max >= n_nodes_max:
-            n_nodes_max = loc_max
-
-    candiates = {}
-    for i in range(n_nodes_min, n_nodes_max + 1):
-        proposals = []
-        for elem in subgraphs:
-            if i in elem.keys():
-                proposals.append(elem[i])
-        if len(proposals) > 0:
-            candiates[i] = list(product(*proposals))
-
-    global_iso_graphs = {}
-    local_iso_graphs = {}
-    global_iso = {}
-    local_iso = {}
-    for n_nodes, combinations in candiates.items():
-        if len(combinations) <= 1:
-            print("no combinations same length")
-            return {}, {}, {}, {}
-        for combination in combinations:
-            isomorphisms_summary, iso_graphs, all_elements = find_isomorphisms(combination)
-            if all_elements:
-                global_iso_graphs.update(iso_graphs)
-                for iso_key, structures in isomorphisms_summary.items():
-                    if iso_key not in global_iso.keys():
-                        global_iso[iso_key] = structures
-                    for elem in isomorphisms_summary[iso_key]:
-                        if elem not in global_iso[iso_key]:
-                            global_iso[iso_key].append(elem)
-            else:
-                local_iso_graphs.update(iso_graphs)
-                for iso_key, structures in isomorphisms_summary.items():
-                    if iso_key not in local_iso.keys():
-                        local_iso[iso_key] = structures
-                    for elem in isomorphisms_summary[iso_key]:
-                        if elem not in local_iso[iso_key]:
-                            local_iso[iso_key].append(elem)
+    membership = ClassMembership()
+    """Structures of the decompositions of each class in each design, and a graph of each class"""
+    class_structures: dict[tuple[str, int], tuple[str, dict]] = {}
+    class_graphs: dict[str, Graph] = {}
+    for n_design, design in enumerate(designs_to_decompose):
+        for dec in get_subgraph(design, list(key_nodes)).graph.decompose():
+            if len(dec.vs) <= 1:
+                continue
+            class_id, is_new = membership.add(n_design, dec)
+            if is_new:
+                class_structures[(class_id, n_design)] = graph_to_dict(dec)
+                class_graphs.setdefault(class_id, dec)
+
+    def structures_of(classes: dict[str, set]) -> tuple[dict[str, list[dict]], dict]:
+        iso, iso_graphs = {}, {}
+        for class_id, class_designs in classes.items():
+            for n_design in sorted(class_designs):
+                iso_key, structure = class_structures[(class_id, n_design)]
+                iso_graphs.setdefault(iso_key, class_graphs[class_id])
+                if structure not in iso.setdefault(iso_key, []):
+                    iso[iso_key].append(structure)
+        return iso, iso_graphs
+
+    global_iso, global_iso_graphs = structures_of(membership.global_classes())
+    local_iso, local_iso_graphs = structures_of(membership.local_classes())
 
     print(f"Found {len(local_iso)} local isomorphisms and {len(global_iso)} global ones")
     return local_iso, global_iso, global_iso_graphs, local_iso_graphs
@@ -131,14 +109,59 @@ popular_nodes: dict = json.load(open(popular_nodes_keys_path))
 popular_nodes_list: list = list(popular_nodes.keys())
 
 
-def random_sampling_for_n(iterations: int = 10000000):
-    designs_chosen = []
-    for did, (dc, dt) in designs.items():
-        if did in ["NewAxe_Cargo", "PickAxe", "TestQuad_Cargo"]:
-            designs_chosen.append(dc)
-    nodes_types = set()
-    for d in designs_chosen:
-        nodes_types |= d.all_comp_types_ids
+"""Designs of each worker process, set up once by '_init_worker'"""
+_worker_designs: list[DConcrete] = []
+
+
+def _init_worker(design_ids: tuple[str, ...]):
+    global _worker_designs
+    _worker_designs = [designs[did][0] for did in design_ids]
+
+
+def _mine_shard(shard: list[list[str]]) -> list[dict]:
+    return [mine_subset(_worker_designs, nodes_types_set) for nodes_types_set in shard]
+
+
+def mine_subset(designs_chosen: list[DConcrete], nodes_types_set: list[str]) -> dict:
+    """Structures of the designs decomposed at the node types, as a json line of the checkpoint.
+    The graphs of the structures are exported here, so they do not go back to the main process"""
+    key = subset_key(nodes_types_set)
+    summary, global_iso_graphs, local_iso_graphs = explore_structures(designs_chosen, list(nodes_types_set))
+    for folder, graphs in [("global", global_iso_graphs), ("local", local_iso_graphs)]:
+        for graph_key, graph in graphs.items():
+            graph_file = output_folder / f"analysis/isomorphisms/graphs/{folder}/{graph_key}.pdf"
+            if not graph_file.is_file():
+                graph_to_pdf(graph, graph_key, f"analysis/isomorphisms/graphs/{folder}")
+    """As read back from the checkpoint, so the structures compare equal when resuming"""
+    return {"key": key, "summary": json.loads(json.dumps(summary))}
+
+
+def _mine_shards(
+    shards: list[list[list[str]]], design_ids: tuple[str, ...], max_workers: int | None
+) -> Iterator[list[dict]]:
+    if max_workers == 1:
+        designs_chosen = [designs[did][0] for did in design_ids]
+        for shard in shards:
+            yield [mine_subset(designs_chosen, nodes_types_set) for nodes_types_set in shard]
+        return
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(design_ids,)) as executor:
+        futures = [executor.submit(_mine_shard, shard) for shard in shards]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def random_sampling_for_n(
+    iterations: int = 10000000,
+    max_workers: int | None = None,
+    shard_size: int = 10,
+    output_file: Path = mined_subsets_path,
+    seed: int | None = None,
+    design_ids: tuple[str, ...] = ("NewAxe_Cargo", "PickAxe", "TestQuad_Cargo"),
+):
+    """Mines the structures of up to 'iterations' subsets of node types in shards of 'shard_size' on a pool of
+    'max_workers' processes (in this process if 1). The subsets already in 'output_file' are not mined again, so an
+    interrupted run resumes where it stopped; the structure summary is updated after every shard.
+    The structures are searched in the designs 'design_ids', e.g. tuple(designs.keys()) for the whole library"""
     node_types_default = {
         "SensorRpmTemp",
         "SensorVariometer",
@@ -172,75 +195,38 @@ def random_sampling_for_n(iterations: int = 10000000):
         else:
             node_types_grouped.add(node)
 
-    summary_file = output_folder / "analysis/isomorphisms/structure_summary.json"
-    if summary_file.is_file():
-        total_summary: dict = json.load(open(output_folder / "analysis/isomorphisms/structure_summary.json"))
-    else:
-        total_summary = {"LOCAL": {}, "GLOBAL": {}}
-
-    global_graphs_dict_total = {}
-    local_graphs_dict_total = {}
-
-    iteration = 1
-    nodes_types_set_visited = []
-    while iteration < iterations:
-        print(f"Iteration: {iteration}")
-        if iteration < 1:
-            nodes_types_set = popular_nodes_list[iteration].split("-")
-            print("Choosing popular node types:")
-        else:
-            print("Choosing randomly:")
-            nodes_types_set = random.sample(node_types_grouped, random.randint(1, len(node_types_grouped)))
-        print(nodes_types_set)
-        nodes_types_set_list = sorted(list(nodes_types_set))
-        nodes_types_str = "-".join(nodes_types_set_list)
-        if nodes_types_set_list in nodes_types_set_visited:
-            continue
-        summary, global_iso_graphs, local_iso_graphs = explore_structures(designs_chosen, nodes_types_set)
-        global_graphs_dict_total.update(global_iso_graphs)
-        local_graphs_dict_total.update(local_iso_graphs)
-
-        for structure_key, structures in summary["LOCAL"].items():
-            if structure_key not in total_summary["LOCAL"].keys():
-                total_summary["LOCAL"][structure_key] = {"VARIATIONS": [], "KEYS": [], "COUNT": 0}
-                total_summary["LOCAL"][structure_key]["VARIATIONS"] = structures
-                total_summary["LOCAL"][structure_key]["KEYS"] = [nodes_types_str]
-                total_summary["LOCAL"][structure_key]["COUNT"] = len(structures)
-            else:
-                for elem in structures:
-                    if elem not in total_summary["LOCAL"][structure_key]["VARIATIONS"]:
-                        total_summary["LOCAL"][structure_key]["VARIATIONS"].append(elem)
-                        total_summary["LOCAL"][structure_key]["COUNT"] += 1
-        for structure_key, structures in summary["GLOBAL"].items():
-            if structure_key not in total_summary["GLOBAL"].keys():
-                total_summary["GLOBAL"][structure_key] = {"VARIATIONS": [], "KEYS": [], "COUNT": 0}
-                total_summary["GLOBAL"][structure_key]["VARIATIONS"] = structures
-                total_summary["GLOBAL"][structure_key]["KEYS"] = [nodes_types_str]
-                total_summary["GLOBAL"][structure_key]["COUNT"] = len(structures)
-            else:
-                for elem in structures:
-                    if elem not in total_summary["GLOBAL"][structure_key]["VARIATIONS"]:
-                        total_summary["GLOBAL"][structure_key]["VARIATIONS"].append(elem)
-                        total_summary["GLOBAL"][structure_key]["COUNT"] += 1
-
+    mined = read_mined_subsets(output_file, design_ids)
+    print(f"{len(mined)} node types subsets already mined in {output_file}")
+    total_summary: dict = {"LOCAL": {}, "GLOBAL": {}}
+    for key, summary in mined.items():
+        merge_summary(total_summary, key, summary)
+
+    """The most popular node types first, then random subsets"""
+    visited = set(mined.keys())
+    subsets = list(
+        islice(
+            random_subsets(
+                sorted(node_types_grouped),
+                visited,
+                random.Random(seed),
+                first=[key.split("-") for key in popular_nodes_list[:1]],
+            ),
+            iterations,
+        )
+    )
+    shards = [subsets[i : i + shard_size] for i in range(0, len(subsets), shard_size)]
+    print(f"Mining {len(subsets)} node types subsets in {len(shards)} shards")
+    n_mined = 0
+    start = time.time()
+    for records in _mine_shards(shards, design_ids, max_workers):
+        append_mined_subsets(output_file, design_ids, records)
+        for record in records:
+            merge_summary(total_summary, record["key"], record["summary"])
         save_to_file(total_summary, "structure_summary.json", f"analysis/isomorphisms/")
-
-        for key, graph in global_graphs_dict_total.items():
-            graph_file = output_folder / f"analysis/isomorphisms/graphs/global/{key}.pdf"
-            if not graph_file.is_file():
-                graph_to_pdf(graph, key, "analysis/isomorphisms/graphs/global")
-        for key, graph in local_graphs_dict_total.items():
-            graph_file = output_folder / f"analysis/isomorphisms/graphs/local/{key}.pdf"
-            if not graph_file.is_file():
-                graph_to_pdf(graph, key, "analysis/isomorphisms/graphs/local")
-
-        iteration += 1
-        nodes_types_set_list.append(nodes_types_str)
+        n_mined += len(records)
+        elapsed = time.time() - start
+        print(f"{n_mined}/{len(subsets)} subsets mined, {n_mined / elapsed:.2f} subsets/s")
 
 
 if __name__ == "__main__":
-    designs_chosen = []
-    for did, (dc, dt) in designs.items():
-        if did in ["NewAxe_Cargo", "PickAxe", "TestQuad_Cargo"]:
-            designs_chosen.append(dc)
     random_sampling_for_n()
@@ -6,20 +6,15 @@ from itertools import combinations, product
 
 from igraph import Edge, Graph, Vertex
 
+from sym_cps.isomorphisms.index import IsomorphismIndex
 from sym_cps.representation.design.concrete import DConcrete
 from sym_cps.tools.graphs import graph_to_dict
 
 
 def is_isomorphism_present(graphs: list[Graph], graph_to_add: Graph):
+    """Only checks that an isomorphism exists, without enumerating the mappings"""
     for g in graphs:
-        if (
-            len(
-                g.get_isomorphisms_vf2(
-                    graph_to_add, node_compat_fn=weak_node_comparison, edge_compat_fn=weak_edge_comparison
-                )
-            )
-            > 0
-        ):
+        if g.isomorphic_vf2(graph_to_add, node_compat_fn=weak_node_comparison, edge_compat_fn=weak_edge_comparison):
             return True
     return False
 
@@ -32,12 +27,14 @@ def is_isomorphism_present(graphs: list[Graph], graph_to_add: Graph):
 
 
 def strong_mapping(graph_a: Graph, graph_b: Graph) -> bool:
-    mappings = graph_a.get_isomorphisms_vf2(graph_b, node_compat_fn=node_comparison, edge_compat_fn=edge_comparison)
-    return len(mappings) > 0
+    return graph_a.isomorphic_vf2(graph_b, node_compat_fn=node_comparison, edge_compat_fn=edge_comparison)
 
 
 # def strong_mapping_dict(gra)
-def find_isomorphisms(elements: list[Graph]) -> tuple[dict[str, list[dict]], dict[str, Graph], bool]:
+def find_isomorphisms(
+    elements: list[Graph], index: IsomorphismIndex | None = None
+) -> tuple[dict[str, list[dict]], dict[str, Graph], bool]:
+    """'index' can be shared by the calls on combinations of the same graphs, the class of each graph is found once"""
     set_of_types_a = set([vs["label"] for vs in elements[0].vs])
     for e in elements[1:]:
         set_of_types_b = set([vs["label"] for vs in e.vs])
@@ -49,12 +46,13 @@ def find_isomorphisms(elements: list[Graph]) -> tuple[dict[str, list[dict]], dic
     isomorphisms_graphs_summary = {}
     iso_graphs = {}
     all_elements_with_same_nodes_types_are_isomorphic = True
-    pairs = combinations(elements, 2)
-    for pair in pairs:
-        mappings = pair[0].get_isomorphisms_vf2(
-            pair[1], node_compat_fn=weak_node_comparison, edge_compat_fn=weak_edge_comparison
-        )
-        if len(mappings) > 0:
+    if index is None:
+        index = IsomorphismIndex()
+    """Two elements are isomorphic if they are in the same isomorphism class, VF2 is not run on every pair"""
+    classes = [index.add(element)[0] for element in elements]
+    for i, j in combinations(range(len(elements)), 2):
+        pair = (elements[i], elements[j])
+        if classes[i] == classes[j]:
             iso_a_key, iso_a_struct = graph_to_dict(pair[0])
             iso_b_key, iso_b_struct = graph_to_dict(pair[1])
             iso_graphs[iso_a_key] = pair[0]
@@ -1,11 +1,15 @@
 import math
 
+from sym_cps.evaluation.fdm_cache import fdm_run_cache
 from sym_cps.evaluation.fdm_interface import FDMArgs, FDMInterface
 
 
 class ControlOptimizer(object):
-    def __init__(self, fdm_input_path, fdm_exec=None, table_path=None):
-        self._fdm_interface = FDMInterface(fdm_path=fdm_exec, table_path=table_path)
+    def __init__(self, fdm_input_path, fdm_exec=None, table_path=None, max_workers=None, fdm_cache=fdm_run_cache):
+        # runs are memoized in fdm_cache, shared by all paths and optimizer instances (None disables it)
+        self._fdm_interface = FDMInterface(
+            fdm_path=fdm_exec, table_path=table_path, max_workers=max_workers, cache=fdm_cache
+        )
         self._fdm_data = self._fdm_interface.read_fdm_input(fdm_input_path)
         self._fdm_args = FDMArgs(self._fdm_data)
         # constraints in the domain
@@ -86,14 +90,27 @@ class ControlOptimizer(object):
         ret = []
         print("Search Space: ")
         print(self._speed_spaces)
-        for path in self._paths:
-            path_ret = self._method(path, **kwargs)
-            if path_ret["best_score"] <= 0 and path == 4:
-                break
-            ret.append(path_ret)
-        ret, total_score = self.output_collection(ret)
+        try:
+            for path in self._paths:
+                path_ret = self._method(path, **kwargs)
+                if path_ret["best_score"] <= 0 and path == 4:
+                    break
+                ret.append(path_ret)
+            ret, total_score = self.output_collection(ret)
+        finally:
+            self.close()
         return {"result": ret, "total_score": total_score}
 
+    def close(self):
+        """Stops the process pool of the fdm runs, started again by the next parallel runs if any"""
+        self._fdm_interface.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def output_collection(self, ret):
         total_score = 0
         for path_ret in ret:
@@ -107,6 +124,8 @@ class ControlOptimizer(object):
             path_ret["best_score"] = score
             path_ret["best_args"] = fdm_args.args
             total_score += score
+        if self._fdm_interface.cache is not None:
+            print(self._fdm_interface.cache)
         return ret, total_score
 
     # def _pack_args(self, **kwargs):
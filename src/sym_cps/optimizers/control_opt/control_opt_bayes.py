@@ -4,13 +4,22 @@ import os
 import numpy as np
 from bayes_opt import BayesianOptimization
 
+from sym_cps.evaluation.fdm_cache import fdm_run_cache
 from sym_cps.evaluation.fdm_interface import FDMArgs
 from sym_cps.optimizers.control_opt.control_opt_base import ControlOptimizer
 
 
 class ControlBayesOptimizer(ControlOptimizer):
-    def __init__(self, fdm_input_path, method="all_bayes", fdm_exec=None, num_grids=None, table_path=None):
-        super().__init__(fdm_input_path, fdm_exec=fdm_exec, table_path=table_path)
+    def __init__(
+        self,
+        fdm_input_path,
+        method="all_bayes",
+        fdm_exec=None,
+        num_grids=None,
+        table_path=None,
+        fdm_cache=fdm_run_cache,
+    ):
+        super().__init__(fdm_input_path, fdm_exec=fdm_exec, table_path=table_path, fdm_cache=fdm_cache)
 
         if method == "grid_speed":
             self._method = self.optimize_path_grid_speed
@@ -44,23 +53,26 @@ class ControlBayesOptimizer(ControlOptimizer):
 
     def optimize(self, **kwargs):
         ret = []
-        for path in self._paths:
-            if "best_trim" in kwargs:
-                best_trim = kwargs["best_trim"]
-                if path == 1:
-                    lspeed = best_trim["Level"]
-                    self.set_speed_bounds("requested_lateral_speed", max_val=lspeed, min_val=lspeed - 1)
-                elif path == 3:
-                    lspeed = best_trim["Turning500"]
-                    self.set_speed_bounds("requested_lateral_speed", max_val=lspeed, min_val=lspeed - 1)
-                elif path == 5:
-                    lspeed = best_trim["Level"]  # best_trim["Turning300"]
-                    self.set_speed_bounds("requested_lateral_speed", max_val=lspeed, min_val=lspeed - 1)
-            path_ret = self._method(path, **kwargs)
-            if path_ret["best_score"] <= 0 and path == 4:
-                break
-            ret.append(path_ret)
-        ret, total_score = self.output_collection(ret)
+        try:
+            for path in self._paths:
+                if "best_trim" in kwargs:
+                    best_trim = kwargs["best_trim"]
+                    if path == 1:
+                        lspeed = best_trim["Level"]
+                        self.set_speed_bounds("requested_lateral_speed", max_val=lspeed, min_val=lspeed - 1)
+                    elif path == 3:
+                        lspeed = best_trim["Turning500"]
+                        self.set_speed_bounds("requested_lateral_speed", max_val=lspeed, min_val=lspeed - 1)
+                    elif path == 5:
+                        lspeed = best_trim["Level"]  # best_trim["Turning300"]
+                        self.set_speed_bounds("requested_lateral_speed", max_val=lspeed, min_val=lspeed - 1)
+                path_ret = self._method(path, **kwargs)
+                if path_ret["best_score"] <= 0 and path == 4:
+                    break
+                ret.append(path_ret)
+            ret, total_score = self.output_collection(ret)
+        finally:
+            self.close()
         return {"result": ret, "total_score": total_score}
 
     def optimize_path_grid_speed(self, path=1, **kwargs):
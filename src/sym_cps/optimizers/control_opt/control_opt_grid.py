@@ -3,13 +3,14 @@ import os
 
 import numpy as np
 
+from sym_cps.evaluation.fdm_cache import fdm_run_cache
 from sym_cps.evaluation.fdm_interface import FDMArgs
 from sym_cps.optimizers.control_opt.control_opt_base import ControlOptimizer
 
 
 class ControlGridOptimizer(ControlOptimizer):
-    def __init__(self, fdm_input_path, fdm_exec=None, num_grids=None):
-        super().__init__(fdm_input_path, fdm_exec)
+    def __init__(self, fdm_input_path, fdm_exec=None, num_grids=None, max_workers=None, fdm_cache=fdm_run_cache):
+        super().__init__(fdm_input_path, fdm_exec, max_workers=max_workers, fdm_cache=fdm_cache)
         self._method = self.optimize_path
         # default_grids
         _num_grids = {
@@ -60,6 +61,7 @@ class ControlGridOptimizer(ControlOptimizer):
         else:
             speeds = self._speed_spaces["requested_lateral_speed"]
 
+        fdm_args_list = []
         for speed in speeds:
             vspeed = speed if path == 4 else 0
             lspeed = 0 if path == 4 else speed
@@ -81,16 +83,21 @@ class ControlGridOptimizer(ControlOptimizer):
                                         "R": R,
                                     },
                                 )
-                                print(
-                                    f"path = {path}, vs = {vspeed}, ls = {lspeed}, Q_postion = {Q_position}, Q_velocity = {Q_velocity}, Q_angular_velocity = {Q_angular_velocity}, Q_angles = {Q_angles}, R = {R}"
-                                )
-                                fdm_output = self._fdm_interface.execute_from_data(self._fdm_data, fdm_args)
-                                score = fdm_output.get_metrics("Score")
-                                raw_score = self.raw_score(path, fdm_output)
-                                print(f"score = {score}, raw_score = {raw_score}")
-                                if score > best_score:
-                                    best_score = score
-                                    best_args = fdm_args
+                                fdm_args_list.append(fdm_args)
+
+        # grid points are independent, they are evaluated in parallel over the fdm process pool
+        fdm_outputs = self._fdm_interface.execute_many(self._fdm_data, fdm_args_list)
+        for fdm_args, fdm_output in zip(fdm_args_list, fdm_outputs):
+            args = fdm_args.args
+            print(
+                f"path = {path}, vs = {args['requested_vertical_speed']}, ls = {args['requested_lateral_speed']}, Q_postion = {args['Q_position']}, Q_velocity = {args['Q_velocity']}, Q_angular_velocity = {args['Q_angular_velocity']}, Q_angles = {args['Q_angles']}, R = {args['R']}"
+            )
+            score = fdm_output.get_metrics("Score")
+            raw_score = self.raw_score(path, fdm_output)
+            print(f"score = {score}, raw_score = {raw_score}")
+            if score > best_score:
+                best_score = score
+                best_args = fdm_args
         return {"Path": path, "best_score": best_score, "best_args": best_args}
 
 
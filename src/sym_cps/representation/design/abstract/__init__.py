@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import base64
-import hashlib
 import random
 from dataclasses import dataclass, field
 
@@ -10,6 +8,7 @@ import networkx as nx
 import numpy as np
 
 from sym_cps.grammar import AbstractGrid
+from sym_cps.grammar.canonical import canonical_hash
 from sym_cps.grammar.tools import get_direction_of_tube
 from sym_cps.representation.design.abstract.elements import (
     AbstractComponent,
@@ -31,6 +30,9 @@ from sym_cps.tools.strings import (
     get_instance_name,
 )
 
+"""Symbol of the grid of each type of abstract component"""
+_grid_symbols = {"Fuselage": "FUSELAGE", "Propeller": "ROTOR", "Wing": "WING", "Connector": "CONNECTOR"}
+
 
 @dataclass
 class AbstractDesign:
@@ -46,12 +48,12 @@ class AbstractDesign:
 
     @property
     def id(self):
-        connections_ids = ""
-        for connection in self.abstract_connections:
-            connections_ids += connection.type_id
-            d = hashlib.md5(connections_ids.encode("utf-8")).digest()
-            d = base64.urlsafe_b64encode(d).decode("ascii")
-            return str(d[:-2])
+        """Canonical hash of the topology, see AbstractGrid.canonical_hash"""
+        if self.abstract_grid is not None:
+            return self.abstract_grid.canonical_hash
+        labels = {position: _grid_symbols.get(type(c).__name__, c.base_name) for position, c in self.grid.items()}
+        edges = [(c.component_a.grid_position, c.component_b.grid_position) for c in self.abstract_connections]
+        return canonical_hash(labels, edges)
 
     def optimize_and_evaluate_script(self, no_optimization: bool = False):
         self.save()
@@ -427,10 +427,9 @@ class DConcrete:
         from sym_cps.isomorphisms.tools import edge_comparison, node_comparison
 
         if isinstance(other, DConcrete):
-            mappings = self._graph.get_isomorphisms_vf2(
+            isomorphic = self._graph.isomorphic_vf2(
                 other.graph, node_compat_fn=node_comparison, edge_compat_fn=edge_comparison
             )
-            isomorphic = len(mappings) > 0
             if not isomorphic:
                 components_self: dict = {}
                 for component in self.components:
@@ -3,6 +3,7 @@ import os
 from copy import deepcopy
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable
 
 from sym_cps.representation.library.elements.c_connector import CConnector
 from sym_cps.representation.library.elements.c_parameter import CParameter
@@ -12,6 +13,50 @@ from sym_cps.representation.tools.parsers.parsing_library import fill_parameters
 from sym_cps.shared.paths import component_library_root_path_default, component_selection_path, data_folder
 
 
+class JsonIndex:
+    """Lookup structure built by 'build' from the content of a json file.
+    The file is parsed once and parsed again only when its modification time or size change."""
+
+    enabled: bool = True
+
+    def __init__(self, file_path: Path, build: Callable[[dict], dict]):
+        self.file_path = file_path
+        self.build = build
+        self._signature = None
+        self._index = None
+
+    def get(self) -> dict:
+        stat = os.stat(self.file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if not JsonIndex.enabled or self._index is None or signature != self._signature:
+            with open(self.file_path) as f:
+                self._index = self.build(json.load(f))
+            self._signature = signature
+        return self._index
+
+
+def _build_default_components(default: dict) -> dict[str, str]:
+    """{component_type_id: default component_id}"""
+    return {c_type: components[0] for c_type, components in default["ALL_COMPONENTS"].items()}
+
+
+def _build_connectors_mapping(connections: dict) -> dict:
+    """{type_a: set of connectable type_b} and {(type_a, type_b, direction): (connector_a, connector_b)}"""
+    index = {}
+    for name_a, types_b in connections.items():
+        index[name_a] = set(types_b.keys())
+        for name_b, directions in types_b.items():
+            for direction, connector_names in directions.items():
+                index[(name_a, name_b, direction)] = (connector_names[0], connector_names[1])
+    return index
+
+
+default_components = JsonIndex(component_selection_path, _build_default_components)
+connectors_mapping = JsonIndex(
+    data_folder / "reverse_engineering" / "connectors_components_mapping.json", _build_connectors_mapping
+)
+
+
 @dataclass
 class Library:
     components: dict[str, LibraryComponent] = field(default_factory=dict)
@@ -45,34 +90,27 @@ class Library:
     ) -> LibraryComponent:
         if component_type_id not in self.component_types.keys():
             raise Exception(f"{component_type_id}\nComponent Type not present in the library")
-        f = open(component_selection_path)
-        default = json.load(f)
         # if design_name in default["SEED_DESIGNS"].keys():
         #     return self.components[default["SEED_DESIGNS"][design_name]["COMPONENTS"][component_type_id]]
         # else:
-        return self.components[default["ALL_COMPONENTS"][component_type_id][0]]
+        return self.components[default_components.get()[component_type_id]]
 
     def get_connectors(
         self, component_type_a: CType, component_type_b: CType, direction: str
     ) -> (CConnector, CConnector):
         """TODO"""
-        connectors_components_path = data_folder / "reverse_engineering" / "connectors_components_mapping.json"
-        f = open(connectors_components_path)
-        connections = json.load(f)
+        connections = connectors_mapping.get()
 
         name_a = component_type_a.id
         name_b = component_type_b.id
         results = ()
 
-        available_components_a = list(connections[name_a].keys())
-        if name_b in available_components_a:
+        if name_b in connections[name_a]:
             if direction == "":
                 direction = "NONE"
 
-            if direction in list(connections[name_a][name_b].keys()):
-                connector_names = connections[name_a][name_b][direction]
-                a_connector_name = connector_names[0]
-                b_connector_name = connector_names[1]
+            if (name_a, name_b, direction) in connections:
+                a_connector_name, b_connector_name = connections[(name_a, name_b, direction)]
 
                 connector_a = self.connectors[a_connector_name]
                 connector_b = self.connectors[b_connector_name]
@@ -1,5 +1,7 @@
 from enum import Enum, auto
 
+import numpy as np
+
 from sym_cps.representation.library.elements.library_component import LibraryComponent
 from sym_cps.shared.paths import prop_table_folder
 
@@ -16,26 +18,90 @@ class PerfTable(object):
 
     """2 dimensioned data - (RPM, V)"""
 
+    """After parsing, the table is also stored as dense arrays for vectorized queries:
+    rpms: (n_rpm,) sorted RPM values
+    table: (n_rpm, max_n_v, n_columns) values, rows of RPM with less V entries are padded with NaN
+    n_v: (n_rpm,) number of valid V entries for each RPM"""
+
     def __init__(self, propeller: LibraryComponent | None = None):
         self.rpm_list = []
         self.columns = []
         self.rpm_table = []
 
+        self.rpms = np.empty(0)
+        self.table = np.empty((0, 0, 0))
+        self.n_v = np.empty(0, dtype=int)
+        self.bounds: dict[str, tuple[float, float]] = {}
+
         if propeller is not None:
             self.parse_prop_table(propeller=propeller)
 
+    def _build_arrays(self):
+        """Builds the dense arrays and the bounds of every column from the parsed lists"""
+        n_v = [len(v_entries) for v_entries in self.rpm_table]
+        table = np.full((len(self.rpm_table), max(n_v, default=0), len(self.columns)), np.nan)
+        for rpm_id, v_entries in enumerate(self.rpm_table):
+            for v_id, entry in enumerate(v_entries):
+                table[rpm_id, v_id, : len(entry)] = entry[: len(self.columns)]
+        self._set_arrays(np.array(self.rpm_list, dtype=float), table, np.array(n_v, dtype=int))
+
+    @classmethod
+    def from_arrays(
+        cls,
+        columns: list[str],
+        rpms: np.ndarray,
+        table: np.ndarray,
+        n_v: np.ndarray,
+        bounds: dict[str, tuple[float, float]] | None = None,
+    ) -> "PerfTable":
+        """Builds a table on arrays that are already parsed, e.g. views of a memory-mapped file.
+        With 'bounds' provided, no value of 'table' is read until the table is queried."""
+        perf_table = cls()
+        perf_table.columns = list(columns)
+        perf_table.rpm_list = [int(rpm) for rpm in rpms]
+        perf_table._set_arrays(np.asarray(rpms, dtype=float), table, np.asarray(n_v, dtype=int), bounds)
+        return perf_table
+
+    def _set_arrays(
+        self,
+        rpms: np.ndarray,
+        table: np.ndarray,
+        n_v: np.ndarray,
+        bounds: dict[str, tuple[float, float]] | None = None,
+    ):
+        self.rpms = rpms
+        self.table = table
+        self.n_v = n_v
+        if bounds is not None:
+            self.bounds = {label: (float(b[0]), float(b[1])) for label, b in bounds.items()}
+            return
+        self.bounds = {}
+        for idx, label in enumerate(self.columns):
+            column = table[:, :, idx]
+            if np.all(np.isnan(column)):
+                continue
+            self.bounds[label] = (float(np.nanmin(column)), float(np.nanmax(column)))
+
+    @property
+    def rpm_range(self) -> tuple[float, float]:
+        return float(self.rpms[0]), float(self.rpms[-1])
+
+    @property
+    def v_range(self) -> tuple[float, float]:
+        return self.bounds[self.columns[0]]
+
     def _update_columns(self, columns: list[str]):
         self.columns = columns
 
     def print_table(self):
         print("RPM list: ")
         print(self.rpm_list)
-        for rpm, table in zip(self.rpm_list, self.rpm_table):
+        for rpm_id, rpm in enumerate(self.rpm_list):
             print(f"RPM = {rpm}:")
             for label in self.columns:
                 print(f"{label: >8}", end="")
             print("")
-            for v_entry in table:
+            for v_entry in self.table[rpm_id, : self.n_v[rpm_id]]:
                 for entry in v_entry:
                     print(f"{entry: >8}", end="")
                 print("")
@@ -82,6 +148,7 @@ class PerfTable(object):
                     rpm_table.append(values)
             # last table
             self.rpm_table.append(rpm_table)
+        self._build_arrays()
 
     def parse_prop_table(self, propeller: LibraryComponent):
         file_name = propeller.properties["Performance_File"].value
@@ -116,7 +183,8 @@ class PerfTable(object):
                 last_v = midpoint + 1
         return first_v, last_v
 
-    def get_range(self, rpm1, rpm2, v1, v2, label: str):
+    def _get_range_reference(self, rpm1, rpm2, v1, v2, label: str):
+        """Loop implementation on the parsed lists, kept as reference for the vectorized get_range"""
         try:
             idx = self.columns.index(label)
         except ValueError:
@@ -146,7 +214,8 @@ class PerfTable(object):
                     min_val = val
         return min_val, max_val
 
-    def get_value(self, rpm: float, v: float, label: str):
+    def _get_value_reference(self, rpm: float, v: float, label: str):
+        """Scalar implementation on the parsed lists, kept as reference for the vectorized get_values"""
         # locate the rpm list, return the smaller one
         # using the four values to get the estimation
         try:
@@ -229,6 +298,85 @@ class PerfTable(object):
 
         # return rpm_list[i]
 
+    def _column_index(self, label: str) -> int | None:
+        try:
+            return self.columns.index(label)
+        except ValueError:
+            print("The column label does not exist!")
+            return None
+
+    def _v_brackets(self, rpm_ids: np.ndarray, vs: np.ndarray) -> np.ndarray:
+        """Index of the V entry, in each RPM row, at the left of the interval used to interpolate vs"""
+        v_grid = self.table[rpm_ids, :, 0]
+        # NaN padding compares as False, so only the valid entries are counted
+        below = np.sum(v_grid <= vs[..., None], axis=-1) - 1
+        return np.clip(below, 0, np.maximum(self.n_v[rpm_ids] - 2, 0))
+
+    def _interpolate_v(self, rpm_ids: np.ndarray, vs: np.ndarray, idx: int) -> np.ndarray:
+        """Linear interpolation (extrapolation outside of the table) along V in the given RPM rows"""
+        v_ids = self._v_brackets(rpm_ids, vs)
+        v_next = np.minimum(v_ids + 1, self.n_v[rpm_ids] - 1)
+        v1 = self.table[rpm_ids, v_ids, 0]
+        v2 = self.table[rpm_ids, v_next, 0]
+        val1 = self.table[rpm_ids, v_ids, idx]
+        val2 = self.table[rpm_ids, v_next, idx]
+        dv = v2 - v1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(dv != 0, (vs - v1) / dv, 0.0)
+        return val1 + t * (val2 - val1)
+
+    def get_values(self, rpms, vs, label: str) -> np.ndarray | None:
+        """Bilinear interpolation of the column 'label' at all the (rpm, v) points, rpms and vs are broadcast together.
+        Along V the values are extrapolated outside of the table, along RPM they are clamped to the closest RPM."""
+        idx = self._column_index(label)
+        if idx is None:
+            return None
+        rpms, vs = np.broadcast_arrays(np.asarray(rpms, dtype=float), np.asarray(vs, dtype=float))
+        n_rpm = len(self.rpms)
+        rpm_ids = np.clip(np.searchsorted(self.rpms, rpms, side="right") - 1, 0, max(n_rpm - 2, 0))
+        rpm_next = np.minimum(rpm_ids + 1, n_rpm - 1)
+        val1 = self._interpolate_v(rpm_ids, vs, idx)
+        val2 = self._interpolate_v(rpm_next, vs, idx)
+        rpm1 = self.rpms[rpm_ids]
+        rpm2 = self.rpms[rpm_next]
+        drpm = rpm2 - rpm1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(np.where(drpm != 0, (rpms - rpm1) / drpm, 0.0), 0.0, 1.0)
+        return val1 + t * (val2 - val1)
+
+    def get_value(self, rpm: float, v: float, label: str) -> float | None:
+        values = self.get_values(rpm, v, label)
+        if values is None:
+            return None
+        return float(values)
+
+    def get_range(self, rpm1, rpm2, v1, v2, label: str) -> tuple[float, float] | None:
+        """Minimum and maximum of the column 'label' over the table entries enclosing [rpm1, rpm2] x [v1, v2]"""
+        idx = self._column_index(label)
+        if idx is None:
+            return None
+        rpm_min, rpm_max = self.rpm_range
+        v_min, v_max = self.v_range
+        if rpm1 <= rpm_min and rpm2 >= rpm_max and v1 <= v_min and v2 >= v_max:
+            return self.bounds.get(label, (float("inf"), -float("inf")))
+
+        # the range includes the entries bracketing the bounds on both sides, as the interpolation does
+        n_rpm = len(self.rpms)
+        first_rpm_id = int(np.clip(np.searchsorted(self.rpms, rpm1, side="right") - 1, 0, max(n_rpm - 2, 0)))
+        last_rpm_id = int(np.clip(np.searchsorted(self.rpms, rpm2, side="right"), 1, n_rpm - 1))
+        rpm_ids = np.arange(first_rpm_id, last_rpm_id + 1)
+        n_v = self.n_v[rpm_ids]
+        v_grid = self.table[rpm_ids, :, 0]
+        first_v_ids = np.clip(np.sum(v_grid <= v1, axis=-1) - 1, 0, np.maximum(n_v - 2, 0))
+        last_v_ids = np.clip(np.sum(v_grid <= v2, axis=-1), 1, n_v - 1)
+        v_ids = np.arange(self.table.shape[1])
+        mask = (v_ids >= first_v_ids[:, None]) & (v_ids <= last_v_ids[:, None])
+        values = self.table[rpm_ids, :, idx][mask]
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return float("inf"), -float("inf")
+        return float(np.min(values)), float(np.max(values))
+
 
 if __name__ == "__main__":
     from sym_cps.representation.tools.parsers.parse import parse_library_and_seed_designs
@@ -1,50 +1,65 @@
 import json
 
-from sym_cps.contract.tester.simplified_selector import SimplifiedSelector
+from sym_cps.contract.component_choices import ComponentChoiceCache, ComponentSignature
+from sym_cps.contract.tester.simplified_selector import ComponentAssignment, SimplifiedSelector
 from sym_cps.representation.design.concrete import DConcrete
 from sym_cps.shared.library import c_library
 from sym_cps.shared.paths import best_component_choices_path
 from sym_cps.tools.my_io import save_to_file
 
 
-def find_components(design: DConcrete):
+def find_components(
+    design: DConcrete,
+    n_restarts: int = 20,
+    max_workers: int | None = None,
+    time_budget: float | None = None,
+    body_weight: float = 2.0,
+    cache: ComponentChoiceCache | None = None,
+):
+    """Components from the component choice cache if the signature of the design (component counts, propeller
+    directions and body weight) was already searched, otherwise from the parallel random local search of
+    SimplifiedSelector, see its arguments, warm started from the choice of the nearest signature"""
     # design.name += "_comp_opt"
-    selector = SimplifiedSelector()
-    selector.set_library(library=c_library)
-    print(type(design))
-    print("Helloe")
+    cache = cache if cache is not None else ComponentChoiceCache()
     print(len(design.components))
     for comp in design.components:
         print(comp.id, comp.library_component.id)
+    assignment = ComponentAssignment.from_design(design)
+    signature = ComponentSignature.build(assignment.counts, assignment.propeller_direction, body_weight)
+    choice = cache.get(signature)
+    if choice is not None:
+        print(f"Optimized components found for {signature.key}")
+        design.replace_all_components(choice.components)
+        return
+
     if best_component_choices_path.is_file():
         best_component_choices = json.load(open(best_component_choices_path))
     else:
         best_component_choices: dict[str, dict[str]] = {}
     n = str(design.n_propellers)
-    if n in best_component_choices.keys():
-        print(f"Optimized components found for {n} propellers")
-        new_components = {}
-        if "Motor" in best_component_choices[n].keys():
-            new_components["Motor"] = best_component_choices[n]["Motor"]
-        if "Battery" in best_component_choices[n].keys():
-            new_components["Battery"] = best_component_choices[n]["Battery"]
-        if "Propeller" in best_component_choices[n].keys():
-            new_components["Propeller"] = best_component_choices[n]["Propeller"]
-        design.replace_all_components(new_components)
-        return
-    best_motor, best_batt, best_prop = selector.random_local_search(d_concrete=design)
+    nearest = cache.nearest(signature)
+    """Choices made before the signatures were cached only know the number of propellers"""
+    start_components = nearest.components if nearest is not None else best_component_choices.get(n)
+    selector = SimplifiedSelector()
+    selector.set_library(library=c_library)
+    best_motor, best_batt, best_prop = selector.random_local_search(
+        d_concrete=design,
+        n_restarts=n_restarts,
+        max_workers=max_workers,
+        time_budget=time_budget,
+        body_weight=body_weight,
+        start_components=start_components,
+    )
     print(f"N={n}")
-    print(f"BEST-Motor={best_motor.id}")
-    print(f"BEST-Battery={best_batt.id}")
-    print(f"BEST-Propeller={best_prop.id}")
-    best_component_choices[n] = {}
-    if best_motor is not None:
-        best_component_choices[n]["Motor"] = best_motor.id
-    if best_batt is not None:
-        best_component_choices[n]["Battery"] = best_batt.id
-    if best_prop is not None:
-        best_component_choices[n]["Propeller"] = best_prop.id
-    save_to_file(best_component_choices, absolute_path=best_component_choices_path)
+    for c_type, best in [("Motor", best_motor), ("Battery", best_batt), ("Propeller", best_prop)]:
+        print(f"BEST-{c_type}={best.id if best is not None else None}")
+    if selector.local_search_result is None:
+        return
+    cache.put(signature, selector.local_search_result.components, selector.local_search_result.score)
+    """The number of propellers with optimized components is read by generate_random_new_topology"""
+    if n not in best_component_choices:
+        best_component_choices[n] = selector.local_search_result.components
+        save_to_file(best_component_choices, absolute_path=best_component_choices_path)
 
 
 def set_direction(design: DConcrete):
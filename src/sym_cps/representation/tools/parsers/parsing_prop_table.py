@@ -1,12 +1,125 @@
 # from sym_cps.representation.tools.parsers.parsing_prop_table import parsing_prop_table
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
 from sym_cps.representation.library import Library
 from sym_cps.representation.library.elements.library_component import LibraryComponent
 from sym_cps.representation.library.elements.perf_table import PerfTable
+from sym_cps.shared.paths import prop_table_folder, prop_tables_store_path
+
+"""Binary store of all the propeller tables of the library:
+<store>.bin: float64 values of every table, one (rpm, v, column) block after the other
+<store>.json: header with, for each Performance_File, the offset and shape of its block, columns, rpms, n_v, bounds and
+the mtime and size of the text table it was parsed from"""
+_store_version = 1
+_store_dtype = "<f8"
+
+
+def _store_files(store_path: Path) -> tuple[Path, Path]:
+    return store_path.with_suffix(".bin"), store_path.with_suffix(".json")
+
+
+def _source_stat(table_path: Path) -> list[int]:
+    stat = os.stat(table_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def compile_prop_tables(
+    library: Library, store_path: Path = prop_tables_store_path, tables_folder: Path = prop_table_folder
+) -> Path:
+    """Parses the text table of every propeller in the library once and packs them in the binary store"""
+    bin_path, header_path = _store_files(store_path)
+    os.makedirs(bin_path.parent, exist_ok=True)
+    header = {
+        "version": _store_version,
+        "dtype": _store_dtype,
+        "tables": {},
+    }
+    offset = 0
+    with open(bin_path, "wb") as bin_file:
+        for propeller in sorted(library.components_in_type["Propeller"], key=lambda p: p.id):
+            file_name = propeller.properties["Performance_File"].value
+            if file_name in header["tables"]:
+                continue
+            perf_table = PerfTable()
+            perf_table.parse_from_file(tables_folder / file_name)
+            values = np.ascontiguousarray(perf_table.table, dtype=_store_dtype)
+            bin_file.write(values.tobytes())
+            header["tables"][file_name] = {
+                "offset": offset,
+                "shape": list(values.shape),
+                "columns": perf_table.columns,
+                "rpms": perf_table.rpm_list,
+                "n_v": perf_table.n_v.tolist(),
+                "bounds": perf_table.bounds,
+                "source": _source_stat(tables_folder / file_name),
+            }
+            offset += values.size
+    with open(header_path, "w") as header_file:
+        json.dump(header, header_file)
+    print(f"{len(header['tables'])} propeller tables compiled in {bin_path}")
+    return bin_path
+
+
+class PerfTableStore:
+    """Memory-mapped access to the compiled propeller tables.
+    Pages are loaded by the OS only when a table is queried, and are shared among processes reading the same store."""
+
+    def __init__(self, store_path: Path = prop_tables_store_path):
+        self.bin_path, self.header_path = _store_files(store_path)
+        with open(self.header_path, "r") as header_file:
+            self.header = json.load(header_file)
+        if self.header["version"] != _store_version:
+            raise Exception(f"Propeller table store version {self.header['version']} is not supported")
+        self._values = None
+
+    @property
+    def values(self) -> np.memmap:
+        if self._values is None:
+            self._values = np.memmap(self.bin_path, dtype=self.header["dtype"], mode="r")
+        return self._values
+
+    def is_up_to_date(self, tables_folder: Path = prop_table_folder) -> bool:
+        """Every stored table has the mtime and size of its text table, which is edited in place by library updates"""
+        for file_name, entry in self.header["tables"].items():
+            table_path = tables_folder / file_name
+            if not table_path.is_file() or _source_stat(table_path) != entry.get("source"):
+                return False
+        return True
+
+    def __contains__(self, file_name: str) -> bool:
+        return file_name in self.header["tables"]
+
+    def get(self, file_name: str) -> PerfTable:
+        entry = self.header["tables"][file_name]
+        size = int(np.prod(entry["shape"]))
+        table = self.values[entry["offset"] : entry["offset"] + size].reshape(entry["shape"])
+        return PerfTable.from_arrays(entry["columns"], entry["rpms"], table, entry["n_v"], entry["bounds"])
+
+
+def load_prop_table_store(store_path: Path = prop_tables_store_path) -> PerfTableStore | None:
+    """Returns the compiled store if it exists and matches the tables folder, None otherwise"""
+    bin_path, header_path = _store_files(store_path)
+    if not bin_path.is_file() or not header_path.is_file():
+        return None
+    store = PerfTableStore(store_path)
+    if not store.is_up_to_date():
+        print("The compiled propeller tables are outdated, run 'init' to compile them again")
+        return None
+    return store
 
 
 def parsing_prop_table(library: Library) -> dict[LibraryComponent, PerfTable]:
+    store = load_prop_table_store()
     table_dict = {}
     for propeller in library.components_in_type["Propeller"]:
-        table = PerfTable(propeller=propeller)
+        file_name = propeller.properties["Performance_File"].value
+        if store is not None and file_name in store:
+            table = store.get(file_name)
+        else:
+            table = PerfTable(propeller=propeller)
         table_dict[propeller] = table
     return table_dict
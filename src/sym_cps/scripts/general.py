@@ -96,12 +96,13 @@ def generate_random_instance_id() -> str:
     return "".join(random.choice(string.ascii_lowercase + string.digits) for _ in range(4))
 
 
-def get_random_new_topology(design_tag, design_index, n_wings_max=-1, n_props_max=-1) -> AbstractDesign:
+def get_random_new_topology(design_tag, design_index, n_wings_max=-1, n_props_max=-1, grids=None) -> AbstractDesign:
     new_design: AbstractDesign = generate_random_new_topology(
         design_tag=design_tag,
         design_index=design_index,
         max_right_num_wings=n_wings_max,
         max_right_num_rotors=n_props_max,
+        grids=grids,
     )
     return new_design
 
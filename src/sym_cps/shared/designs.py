@@ -1,5 +1,12 @@
-from sym_cps.representation.design.concrete import DConcrete
-from sym_cps.representation.design.topology import DTopology
-from sym_cps.tools.persistance import load
+from __future__ import annotations
 
-designs: dict[str, tuple[DConcrete, DTopology]] = load("designs.dat")
+from typing import TYPE_CHECKING
+
+from sym_cps.tools.persistance import LazyObject, load
+
+if TYPE_CHECKING:
+    from sym_cps.representation.design.concrete import DConcrete
+    from sym_cps.representation.design.topology import DTopology
+
+"""Loaded from designs.dat at the first access"""
+designs: dict[str, tuple[DConcrete, DTopology]] = LazyObject(lambda: load("designs.dat"))
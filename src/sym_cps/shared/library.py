@@ -1,4 +1,5 @@
 from sym_cps.representation.library import Library
-from sym_cps.tools.persistance import load
+from sym_cps.tools.persistance import LazyObject, load
 
-c_library: Library = load("library.dat")
+"""Loaded from library.dat at the first access"""
+c_library: Library = LazyObject(lambda: load("library.dat"))
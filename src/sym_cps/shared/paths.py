@@ -29,6 +29,8 @@ library_folder: Path = output_folder / "library"
 fdm_bin_folder: Path = fdm_root_folder / "bin" / "bin" / "bin"
 fdm_tmp_folder: Path = fdm_root_folder / "tmp"
 fdm_extract_folder: Path = fdm_root_folder / "extract"
+evaluation_cache_folder: Path = output_folder / "evaluation_cache"
+fdm_run_cache_path: Path = output_folder / "fdm_run_cache.jsonl"
 prop_table_folder: Path = fdm_root_folder / "Tables" / "PropData"
 
 component_library_root_path_default: Path = data_folder / "ComponentLibrary" / "results_json"
@@ -41,6 +43,7 @@ upper_bound_file = component_library_root_path_default.parent / "upper_bounds_ch
 design_library_root_path_default: Path = data_folder / "DesignLibrary"
 
 persistence_path: Path = output_folder / "persistence"
+prop_tables_store_path: Path = persistence_path / "prop_tables"
 
 reverse_engineering_folder = data_folder / "reverse_engineering"
 
@@ -56,17 +59,20 @@ stats_folder = output_folder / "stats"
 designs_generated_stats_path = lambda tag: stats_folder / f"{tag}_random_designs_stats.json"
 random_topologies_generated_path = lambda tag: stats_folder / f"{tag}_random_topologies_generated.json"
 random_topologies_all_path = output_folder / f"random_topologies_generated.json"
+random_topologies_index_path = output_folder / "random_topologies_index.txt"
 stats_file_path = output_folder / "stats.json"
 stats_file_txt_path = output_folder / "stats.txt"
 stats_speeds_file_path = output_folder / "stats_speeds.json"
 
 structures_path = reverse_engineering_folder / "analysis" / "structure.json"
 best_component_choices_path = output_folder / "reverse_engineering" / "best_component_choices.json"
+component_choices_path = output_folder / "reverse_engineering" / "component_choices.jsonl"
 manual_default_parameters_path = output_folder / "reverse_engineering" / "shared_parameters_manual.json"
 learned_default_params_path = output_folder / "reverse_engineering" / "shared_parameters.json"
 component_selection_path = output_folder / "reverse_engineering" / "component_choice.json"
 
 summary_structure_path = output_folder / "analysis" / "isomorphisms" / "structure_summary.json"
 isomorphisms_data_path = output_folder / "analysis" / "isomorphisms" / "isomorphisms_data.json"
+mined_subsets_path = output_folder / "analysis" / "isomorphisms" / "mined_subsets.jsonl"
 
 popular_nodes_keys_path = output_folder / "analysis" / "popular_node_keys.json"
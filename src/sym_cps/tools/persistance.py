@@ -1,9 +1,16 @@
 # type: ignore
 import os
 import pickle
+from typing import Callable
 
 from sym_cps.shared.paths import persistence_path
 
+"""Files written by 'dump' start with a header: magic bytes + format version, followed by the pickle.
+Files without the header are legacy pickles and are still loaded."""
+_magic = b"SYMCPS"
+format_version = 2
+_header = _magic + format_version.to_bytes(2, "little")
+
 
 def dump(obj: object, file: str) -> str:
     file_path = persistence_path / file
@@ -13,18 +20,28 @@ def dump(obj: object, file: str) -> str:
 
     with open(file_path, "wb") as f:
         try:
-            pickle.dump(obj=obj, file=f)
+            f.write(_header)
+            pickle.dump(obj=obj, file=f, protocol=pickle.HIGHEST_PROTOCOL)
         except Exception as e:
             raise e
     print(f"Object saved in: {str(file_path)}")
     return str(file_path)
 
 
+def _read(file_path) -> object:
+    with open(file_path, "rb") as f:
+        header = f.read(len(_header))
+        if header[: len(_magic)] != _magic:
+            f.seek(0)
+        elif header != _header:
+            raise Exception(f"{file_path} has format version {int.from_bytes(header[len(_magic):], 'little')}")
+        return pickle.load(f)
+
+
 def load(file: str) -> object | None:
     file_path = persistence_path / file
     try:
-        with open(file_path, "rb") as f:
-            obj = pickle.load(f)
+        obj = _read(file_path)
         print(f"Object loaded from: {str(file_path)}")
         return obj
     except Exception:
@@ -39,3 +56,82 @@ def load(file: str) -> object | None:
             print("returning empty dict")
             return dict()
         return None
+
+
+"""Value of '_obj' before the first access: the loader may return None (e.g. 'load' of a missing file)"""
+_not_loaded = object()
+
+
+class LazyObject:
+    """Proxy that calls 'loader' at the first access and then forwards everything to the loaded object.
+    Module level objects such as 'c_library' or 'designs' can be imported everywhere without paying the loading cost
+    until they are actually used."""
+
+    __slots__ = ("_loader", "_obj")
+
+    def __init__(self, loader: Callable[[], object]):
+        object.__setattr__(self, "_loader", loader)
+        object.__setattr__(self, "_obj", _not_loaded)
+
+    def _load(self) -> object:
+        obj = object.__getattribute__(self, "_obj")
+        if obj is _not_loaded:
+            obj = object.__getattribute__(self, "_loader")()
+            object.__setattr__(self, "_obj", obj)
+        return obj
+
+    @property
+    def is_loaded(self) -> bool:
+        return object.__getattribute__(self, "_obj") is not _not_loaded
+
+    """'isinstance' falls back to '__class__', so the proxy passes the type checks of the loaded object"""
+
+    @property
+    def __class__(self):
+        return type(self._load())
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self._load(), name)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, value):
+        self._load()[key] = value
+
+    def __delitem__(self, key):
+        del self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __contains__(self, item):
+        return item in self._load()
+
+    def __bool__(self):
+        return bool(self._load())
+
+    def __eq__(self, other):
+        return self._load() == other
+
+    def __hash__(self):
+        return hash(self._load())
+
+    def __str__(self):
+        return str(self._load())
+
+    def __repr__(self):
+        return repr(self._load())
+
+    def __reduce_ex__(self, protocol):
+        """Pickling and copying the proxy act on the loaded object"""
+        return self._load().__reduce_ex__(protocol)
@@ -0,0 +1,41 @@
+import os
+from pathlib import Path
+
+
+class TopologyIndex:
+    """Set of the hashes of the topologies already generated, persisted as one hash per line.
+    New hashes are kept in memory and appended to the file every 'flush_every' additions."""
+
+    def __init__(self, file_path: Path | None = None, flush_every: int = 1000):
+        self.file_path = file_path
+        self.flush_every = flush_every
+        self._hashes: set[str] = set()
+        self._pending: list[str] = []
+        if file_path is not None and os.path.exists(file_path):
+            with open(file_path, "r") as f:
+                self._hashes.update(line.strip() for line in f if line.strip() != "")
+
+    def add(self, topology_hash: str) -> bool:
+        """Returns False if the hash was already in the index"""
+        if topology_hash in self._hashes:
+            return False
+        self._hashes.add(topology_hash)
+        self._pending.append(topology_hash)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        return True
+
+    def flush(self):
+        if self.file_path is None or len(self._pending) == 0:
+            self._pending.clear()
+            return
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        with open(self.file_path, "a") as f:
+            f.write("".join(f"{h}\n" for h in self._pending))
+        self._pending.clear()
+
+    def __contains__(self, topology_hash: str) -> bool:
+        return topology_hash in self._hashes
+
+    def __len__(self) -> int:
+        return len(self._hashes)
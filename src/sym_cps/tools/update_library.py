@@ -7,6 +7,16 @@ def update_dat_files_library():
     c_library, designs = parse_library_and_seed_designs()
     dump(c_library, "library.dat")
     dump(designs, "designs.dat")
+    update_prop_tables(c_library)
+
+
+def update_prop_tables(c_library=None):
+    """Compiles the propeller tables of the library in the memory-mapped binary store"""
+    from sym_cps.representation.tools.parsers.parsing_prop_table import compile_prop_tables
+
+    if c_library is None:
+        from sym_cps.shared.library import c_library
+    compile_prop_tables(c_library)
 
 
 def update_dat_designs():
@@ -18,7 +28,7 @@ def update_dat_designs():
 def export_all_designs():
     from sym_cps.shared.designs import designs
 
-    for (d_concrete, d_topology) in designs.values():
+    for d_concrete, d_topology in designs.values():
         d_concrete.export_all()
         d_topology.export_all()
 
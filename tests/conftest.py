@@ -0,0 +1,39 @@
+import pytest
+
+
+class FakeProperty:
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeComponentType:
+    def __init__(self, id):
+        self.id = id
+
+
+class FakeComponent:
+    """Library component with only what the code under test reads: id, comp_type.id and the property values"""
+
+    def __init__(self, id, comp_type, **properties):
+        self.id = id
+        self.comp_type = FakeComponentType(comp_type)
+        self.properties = {name: FakeProperty(value) for name, value in properties.items()}
+
+
+class FakeLibrary:
+    """Library without parsing: the components are added one by one, in order"""
+
+    def __init__(self):
+        self.components: dict[str, FakeComponent] = {}
+        self.components_in_type: dict[str, list[FakeComponent]] = {}
+
+    def add(self, id, comp_type, **properties) -> FakeComponent:
+        component = FakeComponent(id, comp_type, **properties)
+        self.components[id] = component
+        self.components_in_type.setdefault(comp_type, []).append(component)
+        return component
+
+
+@pytest.fixture
+def fake_library() -> FakeLibrary:
+    return FakeLibrary()
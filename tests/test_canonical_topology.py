@@ -0,0 +1,50 @@
+from sym_cps.grammar import AbstractGrid
+
+
+def quad_grid() -> AbstractGrid:
+    """Fuselage with a connector on the right carrying two rotors, in a 3x3x2 grid with empty cells"""
+    nodes = [
+        [["", ""], ["", ""], ["", ""]],
+        [["", "FUSELAGE"], ["", "CONNECTOR"], ["", "ROTOR"]],
+        [["", ""], ["", "ROTOR"], ["", "EMPTY"]],
+    ]
+    adjacencies = {(1, 0, 1): [(1, 1, 1)], (1, 1, 1): [(2, 1, 1), (1, 2, 1)]}
+    return AbstractGrid(nodes=nodes, adjacencies=adjacencies)
+
+
+def test_hash_is_invariant_to_translation_reflection_and_order():
+    grid = quad_grid()
+    translated = AbstractGrid(
+        nodes=[[["", ""], ["", ""], ["", ""]]] + [plane + [["", ""]] for plane in grid.nodes],
+        adjacencies={
+            (a[0] + 1, a[1], a[2]): [(b[0] + 1, b[1], b[2]) for b in bs] for a, bs in grid.adjacencies.items()
+        },
+    )
+    reflected = AbstractGrid(
+        nodes=list(reversed(grid.nodes)),
+        adjacencies={
+            (2 - a[0], a[1], a[2]): [(2 - b[0], b[1], b[2]) for b in bs] for a, bs in grid.adjacencies.items()
+        },
+    )
+    reordered = AbstractGrid(nodes=grid.nodes, adjacencies={(1, 1, 1): [(1, 2, 1), (2, 1, 1)], (1, 0, 1): [(1, 1, 1)]})
+    for other in [translated, reflected, reordered]:
+        assert other.canonical_hash == grid.canonical_hash
+        assert hash(other) == hash(grid)
+        assert other.canonical() == grid.canonical()
+
+    """Rotors in other positions, or components of other types, are other topologies"""
+    moved = quad_grid()
+    moved.nodes[2][1][1], moved.nodes[2][2][1] = "", "ROTOR"
+    assert moved.canonical_hash != grid.canonical_hash
+    winged = quad_grid()
+    winged.nodes[2][1][1] = "WING"
+    assert winged.canonical_hash != grid.canonical_hash
+
+
+def test_canonical_grid():
+    grid = quad_grid()
+    canonical = grid.canonical()
+    assert canonical.nodes == [[["FUSELAGE"], ["CONNECTOR"], ["ROTOR"]], [[""], ["ROTOR"], [""]]]
+    assert canonical.adjacencies == {(0, 0, 0): [(0, 1, 0)], (0, 1, 0): [(0, 2, 0), (1, 1, 0)]}
+    assert canonical.canonical() == canonical
+    assert canonical.id == grid.id and (canonical.n_props, canonical.n_wings) == (grid.n_props, grid.n_wings)
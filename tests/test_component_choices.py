@@ -0,0 +1,47 @@
+from sym_cps.contract.component_choices import ComponentChoiceCache, ComponentSignature
+
+quad = {"Propeller": 4, "Motor": 4, "Battery": 1, "BatteryController": 1}
+
+
+def test_signatures_distinguish_designs():
+    signature = ComponentSignature.build(quad, [1.0, 1.0, 1.0, 1.0], 2.0)
+    assert signature.key == ComponentSignature.build(dict(reversed(quad.items())), (1, 1, 1, 1), 2).key
+    assert ComponentSignature.from_dict(signature.to_dict()) == signature
+    for other in [
+        ComponentSignature.build({**quad, "Wing": 2}, [1.0, 1.0, 1.0, 1.0], 2.0),
+        ComponentSignature.build({**quad, "Battery": 2}, [1.0, 1.0, 1.0, 1.0], 2.0),
+        ComponentSignature.build(quad, [1.0, 1.0, 0.5, 0.5], 2.0),
+        ComponentSignature.build(quad, None, 2.0),
+        ComponentSignature.build(quad, [1.0, 1.0, 1.0, 1.0], 1.0),
+    ]:
+        assert other.key != signature.key
+        assert signature.distance(other) > 0
+    assert signature.distance(signature) == 0
+
+
+def test_cache_is_shared_between_processes(tmp_path):
+    file_path = tmp_path / "component_choices.jsonl"
+    cache, other_process = ComponentChoiceCache(file_path), ComponentChoiceCache(file_path)
+    quad_signature = ComponentSignature.build(quad, None, 2.0)
+    hexa_signature = ComponentSignature.build({**quad, "Propeller": 6, "Motor": 6}, None, 2.0)
+    assert cache.get(quad_signature) is None and cache.nearest(quad_signature) is None
+
+    cache.put(quad_signature, {"Motor": "m1", "Battery": "b1", "Propeller": "p1"}, 10.0)
+    assert other_process.get(quad_signature).components == {"Motor": "m1", "Battery": "b1", "Propeller": "p1"}
+    """The choice of the quadcopter is the warm start of the hexacopter"""
+    assert other_process.get(hexa_signature) is None
+    assert other_process.nearest(hexa_signature).signature == quad_signature
+
+    """Both processes searched the same signature, the best choice is kept"""
+    other_process.put(quad_signature, {"Motor": "m2", "Battery": "b2", "Propeller": "p2"}, 12.0)
+    cache.put(quad_signature, {"Motor": "m3", "Battery": "b3", "Propeller": "p3"}, 11.0)
+    assert cache.get(quad_signature).components["Motor"] == "m2"
+    assert ComponentChoiceCache(file_path).get(quad_signature).score == 12.0
+
+    """Line of a process interrupted while writing"""
+    with open(file_path, "a") as f:
+        f.write('{"signature": ')
+    assert len(cache) == 1
+    cache.put(hexa_signature, {"Motor": "m4"}, 5.0)
+    assert len(ComponentChoiceCache(file_path)) == 1 + 1
+    assert str(cache).startswith("component choice cache: 2 signatures")
@@ -0,0 +1,151 @@
+import numpy as np
+
+from sym_cps.contract.motor_propeller_analysis import MotorPropellerAnalysis
+from sym_cps.contract.prefilter import property_arrays
+from sym_cps.contract.tester.uav_contract import UAVContract
+from sym_cps.contract.tool.component_interface import ComponentInterface
+from sym_cps.contract.tool.contract_instance import ContractInstance
+from sym_cps.contract.tool.contract_system import ContractSystem
+from sym_cps.contract.tool.contract_template import ContractTemplate
+from sym_cps.contract.tool.solver.z3_interface import Z3Interface
+
+body_weight = 0.5
+num_motor = 4
+
+
+def random_candidates(rng, n):
+    propellers, motors = [], []
+    for i in range(n):
+        c_p = rng.uniform(0.01, 0.08)
+        c_t = rng.uniform(0.05, 0.15)
+        propellers.append(
+            {
+                "C_p": (c_p, c_p * 1.2),
+                "C_t": (c_t, c_t * 1.2),
+                "diameter": rng.uniform(0.1, 0.4),
+                "shaft_prop": rng.choice([3.0, 5.0, 8.0]),
+                "W_prop": rng.uniform(0.01, 0.1) * num_motor,
+                "name": f"prop_{i}",
+            }
+        )
+        motors.append(
+            {
+                "R_w": rng.uniform(0.01, 0.3),
+                "K_t": rng.uniform(0.005, 0.05),
+                "K_v": rng.uniform(300, 2000) * 2 * np.pi / 60,
+                "I_idle": rng.uniform(0.1, 1),
+                "W_motor": rng.uniform(0.02, 0.3) * num_motor,
+                "I_max_motor": rng.uniform(5, 60),
+                "P_max_motor": rng.uniform(50, 1500),
+                "shaft_motor": rng.choice([3.0, 5.0, 8.0]),
+                "name": f"motor_{i}",
+            }
+        )
+    battery = {"capacity": 5.0, "W_batt": 0.8, "V_battery": 22.2, "I_max": 150.0, "name": "battery"}
+    return propellers, motors, battery
+
+
+def max_voltage_refinement(contract, propeller, motor, battery):
+    """Same system as SimplifiedSelector.select_single_iterate"""
+
+    def system_assumption(vs):
+        weight_sum = (vs["W_batt"] + body_weight + vs["W_prop"] + vs["W_motor"]) * 9.81
+        return [vs["V_battery"] == vs["V_motor"], vs["rho"] == 1.225, vs["weight_sum"] == weight_sum]
+
+    ports = ["rho", "weight_sum", "I_battery", "W_motor", "W_prop", "W_batt", "thrust_sum", "V_motor", "V_battery"]
+    system = ContractTemplate(
+        name="System",
+        port_list=[ComponentInterface(name=p, sort="real") for p in ports],
+        property_list=[],
+        guarantee=lambda vs: [vs["thrust_sum"] >= vs["weight_sum"]],
+        assumption=system_assumption,
+    )
+    contract_system = ContractSystem(verbose=False)
+    contract_system.set_solver(Z3Interface())
+    for name, properties in [("Propeller", propeller), ("Motor", motor), ("Battery", battery)]:
+        contract_system.add_instance(ContractInstance(contract.get_contract(name), name, properties))
+    contract_system.add_instance(ContractInstance(contract.get_contract("BatteryController"), "BatteryController", {}))
+    get = contract_system.get_instance
+    contract_system.compose(
+        get("Propeller"),
+        get("Motor"),
+        [("torque_prop", "torque_motor"), ("omega_prop", "omega_motor"), ("shaft_motor", "shaft_motor")],
+    )
+    contract_system.compose(get("Motor"), get("BatteryController"), [("I_motor", "I_motor"), ("V_motor", "V_motor")])
+    contract_system.compose(
+        get("BatteryController"), get("Battery"), [("I_battery", "I_batt"), ("V_battery", "V_battery")]
+    )
+    sys_inst = ContractInstance(template=system, instance_name="System")
+    connection = {
+        "Propeller": [("thrust_sum", "thrust"), ("W_prop", "W_prop"), ("rho", "rho")],
+        "Motor": [("W_motor", "W_motor"), ("V_motor", "V_motor")],
+        "Battery": [("W_batt", "W_batt"), ("I_battery", "I_batt"), ("V_battery", "V_battery")],
+    }
+    return contract_system.check_refinement(sys_inst, connection)
+
+
+def add_candidates(fake_library, propellers, motors, battery) -> dict:
+    for c_type, properties in [("Propeller", propellers), ("Motor", motors), ("Battery", [battery])]:
+        for p in properties:
+            fake_library.add(p["name"], c_type)
+    return fake_library.components_in_type
+
+
+def test_selector_prefilter_never_drops_a_refining_candidate(monkeypatch, fake_library):
+    from sym_cps.contract.tester.simplified_selector import SimplifiedSelector
+
+    rng = np.random.default_rng(3)
+    propellers, motors, battery_props = random_candidates(rng, 12)
+    contract = UAVContract(table_dict={}, num_motor=num_motor, num_battery=1)
+    contract.set_contract_simplified()
+    properties = {p["name"]: p for p in propellers + motors + [battery_props]}
+    monkeypatch.setattr(
+        contract,
+        "property_arrays_aggregated",
+        lambda components, use_rpm_v_range=False: property_arrays([properties[c.id] for c in components]),
+    )
+    selector = SimplifiedSelector()
+    selector._uav_contract = contract
+    components = add_candidates(fake_library, propellers, motors, battery_props)
+
+    n_dropped = 0
+    for comp_type, other_type in [("Propeller", "Motor"), ("Motor", "Propeller")]:
+        for other in components[other_type]:
+            component_list = {other_type: {"lib": [other]}, "Battery": {"lib": components["Battery"]}}
+            candidates = components[comp_type]
+            kept = selector.prefilter(comp_type, component_list, candidates, num_motor, body_weight)
+            assert all(comp in candidates for comp in kept)
+            for comp in candidates:
+                if comp in kept:
+                    continue
+                n_dropped += 1
+                pair = {comp_type: properties[comp.id], other_type: properties[other.id]}
+                assert not max_voltage_refinement(contract, pair["Propeller"], pair["Motor"], battery_props)
+    assert 0 < n_dropped < 2 * 12 * 12
+
+
+class DictAnalysis(MotorPropellerAnalysis):
+    """Properties of the components given as dictionaries, instead of the tables and properties of the library"""
+
+    def __init__(self, properties: dict, c_library):
+        self._properties = properties
+        super().__init__(table_dict={}, c_library=c_library, run=False)
+
+    def hackathon_property_interface_fn(self, component):
+        return self._properties.get(component.id, {})
+
+
+def test_analysis_prefilter_never_drops_a_pair_that_can_fly(fake_library):
+    rng = np.random.default_rng(4)
+    propellers, motors, battery_props = random_candidates(rng, 8)
+    """The analysis reads the coefficients at a single rpm"""
+    propellers = [{**p, "C_p": p["C_p"][0], "C_t": p["C_t"][0]} for p in propellers]
+    properties = {p["name"]: p for p in propellers + motors + [battery_props]}
+    components = add_candidates(fake_library, propellers, motors, battery_props)
+    analysis = DictAnalysis(properties, fake_library)
+    feasible = analysis.prefilter(components["Propeller"], components["Motor"], add_weight=0.5)
+    assert feasible.shape == (8, 8)
+    assert 0 < np.count_nonzero(~feasible) < feasible.size
+    for i, j in zip(*np.nonzero(~feasible)):
+        record = analysis.analyze_pair(components["Propeller"][i], components["Motor"][j])
+        assert record["status"] == "incompatible"
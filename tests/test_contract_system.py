@@ -0,0 +1,85 @@
+import pytest
+
+from sym_cps.contract.tool.component_interface import ComponentInterface
+from sym_cps.contract.tool.contract_instance import ContractInstance
+from sym_cps.contract.tool.contract_system import ContractSystem
+from sym_cps.contract.tool.contract_template import ContractTemplate
+from sym_cps.contract.tool.solver.milp_interface import MilpInterface
+from sym_cps.contract.tool.solver.z3_interface import Z3Interface
+
+candidates = [{"name": f"motor_{k}", "gain": k, "mass": (0.5 * k, 0.6 * k)} for k in [0.5, 1, 2, 3, 5]]
+
+
+def build_system(properties, solver=Z3Interface):
+    motor = ContractTemplate(
+        name="Motor",
+        port_list=[ComponentInterface("V", "real"), ComponentInterface("thrust", "real")],
+        property_list=[ComponentInterface("gain", "real"), ComponentInterface("mass", "real")],
+        assumption=lambda vs: [vs["V"] >= 0, vs["V"] <= 10],
+        guarantee=lambda vs: [vs["thrust"] == vs["gain"] * vs["V"] * vs["V"] - vs["mass"]],
+    )
+    system = ContractTemplate(
+        name="System",
+        port_list=[ComponentInterface("V_sys", "real"), ComponentInterface("thrust_sum", "real")],
+        property_list=[],
+        assumption=lambda vs: [vs["V_sys"] == 4],
+        guarantee=lambda vs: [vs["thrust_sum"] >= 20],
+    )
+    contract_system = ContractSystem(verbose=False)
+    contract_system.set_solver(solver())
+    contract_system.add_instance(
+        ContractInstance(template=motor, instance_name="Motor", component_properties=properties)
+    )
+    sys_inst = ContractInstance(template=system, instance_name="System")
+    return contract_system, sys_inst, {"Motor": [("V_sys", "V"), ("thrust_sum", "thrust")]}
+
+
+@pytest.mark.parametrize("solver", [Z3Interface, MilpInterface])
+def test_incremental_checks_match_rebuilt_systems(solver):
+    refine_system, refine_inst, connection = build_system(None, solver)
+    refine_system.set_incremental(refine_inst, connection, swap_inst=refine_system.get_instance("Motor"))
+    behavior_system, behavior_inst, connection = build_system(None, solver)
+    behavior_system.set_incremental(
+        behavior_inst, connection, swap_inst=behavior_system.get_instance("Motor"), refinement=False
+    )
+    results = []
+    for candidate in candidates:
+        contract_system, sys_inst, connection = build_system(candidate)
+        is_refine = contract_system.check_refinement(sys_inst, connection)
+        contract_system, sys_inst, connection = build_system(candidate)
+        is_find = contract_system.find_behavior(sys_inst, connection)
+        assert refine_system.check_candidate(candidate) == is_refine
+        assert behavior_system.check_candidate(candidate) == is_find
+        if is_find:
+            thrust = behavior_system.get_metric_inst(behavior_inst, "thrust_sum")
+            assert (
+                16 * candidate["gain"] - candidate["mass"][1] <= thrust <= 16 * candidate["gain"] - candidate["mass"][0]
+            )
+        results.append(is_refine)
+    assert results == [False, False, True, True, True]
+
+
+@pytest.mark.parametrize("solver", [Z3Interface, MilpInterface])
+def test_check_refinement_all_matches_single_checks(solver):
+    contract_system, sys_inst, connection = build_system(None, solver)
+    motor = contract_system.get_instance("Motor")
+    refining, counterexamples = contract_system.check_refinement_all(sys_inst, connection, motor, candidates)
+    expected = []
+    for candidate in candidates:
+        single_system, single_inst, single_connection = build_system(candidate)
+        if single_system.check_refinement(single_inst, single_connection):
+            expected.append(candidate)
+    assert refining == expected
+    assert set(counterexamples) == {"motor_0.5", "motor_1"}
+    for name, behavior in counterexamples.items():
+        candidate = next(c for c in candidates if c["name"] == name)
+        assert behavior["Motor"]["gain"] == candidate["gain"]
+        assert candidate["mass"][0] <= behavior["Motor"]["mass"] <= candidate["mass"][1]
+        """The system guarantee is violated: the thrust of the motor at 4 V is below 20"""
+        assert behavior["System"]["V_sys"] == 4
+        assert behavior["System"]["thrust_sum"] == behavior["Motor"]["thrust"] < 20
+
+    """The solver is left as before the check, the system can be checked again"""
+    refining, counterexamples = contract_system.check_refinement_all(sys_inst, connection, motor, candidates[:3])
+    assert refining == candidates[2:3]
+    assert set(counterexamples) == {"motor_0.5", "motor_1"}
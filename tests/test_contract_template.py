@@ -0,0 +1,60 @@
+import z3
+
+from sym_cps.benchmarks.template_instantiation import analysis_templates, counting_templates
+from sym_cps.contract.tool.contract_tool import ContractTemplate
+
+
+def test_compiled_clauses_match_the_functions():
+    templates = analysis_templates()
+    functions, _ = counting_templates(templates, cache_clauses=False)
+    compiled, calls = counting_templates(templates, cache_clauses=True)
+    for i in range(3):
+        for name in templates:
+            expected = functions[name].instantiate(f"Inst_{i}")
+            instance = compiled[name].instantiate(f"Inst_{i}")
+            assert set(instance.port_name_list) == set(expected.port_name_list)
+            for v in expected.port_name_list + expected.property_name_list:
+                assert instance.get_var(v).eq(expected.get_var(v))
+            for clauses, expected_clauses in [
+                (instance.assumption, expected.assumption),
+                (instance.guarantee, expected.guarantee),
+            ]:
+                assert len(clauses) == len(expected_clauses)
+                assert all(clause.eq(expected_clause) for clause, expected_clause in zip(clauses, expected_clauses))
+    """The functions are only called for the first instance of each template"""
+    assert calls["n"] == 2 * len(templates)
+
+
+def test_keyword_arguments_are_compiled_separately():
+    calls = []
+
+    def guarantee(vs, scale):
+        calls.append(scale)
+        return [vs["x"] == vs["k"] * scale]
+
+    template = ContractTemplate(
+        name="Scaled",
+        port_name_list=["x"],
+        property_name_list=["k"],
+        guarantee=guarantee,
+        assumption=lambda vs, scale: [True],
+    )
+    one = template.instantiate("A", scale=1)
+    two = template.instantiate("B", scale=2)
+    one_again = template.instantiate("C", scale=1)
+    assert calls == [1, 2]
+    assert one.guarantee[0].eq(z3.Real("Scaled_0_A_x") == z3.Real("Scaled_0_A_k") * 1)
+    assert two.guarantee[0].eq(z3.Real("Scaled_1_B_x") == z3.Real("Scaled_1_B_k") * 2)
+    assert one_again.guarantee[0].eq(z3.Real("Scaled_2_C_x") == z3.Real("Scaled_2_C_k") * 1)
+    assert one_again.assumption == [True]
+
+    """Keyword arguments that cannot be hashed are passed to the functions at every instantiation"""
+    unhashable = ContractTemplate(
+        name="Listed",
+        port_name_list=["x"],
+        property_name_list=[],
+        guarantee=lambda vs, bounds: [vs["x"] <= b for b in bounds],
+        assumption=lambda vs, bounds: [],
+    )
+    assert len(unhashable.instantiate("A", bounds=[1, 2]).guarantee) == 2
+    assert unhashable.instantiate("B", bounds=[1]).guarantee[0].eq(z3.Real("Listed_1_B_x") <= 1)
@@ -0,0 +1,136 @@
+import json
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from sym_cps.evaluation import batch as batch_module
+from sym_cps.evaluation.batch import BatchItem, LocalBroker, evaluate_designs
+from sym_cps.evaluation.cache import EvaluationCache
+
+
+def write_designs(folder, n):
+    paths = []
+    for i in range(n):
+        path = folder / f"design_{i}.json"
+        path.write_text(json.dumps({"name": f"design_{i}", "parameters": [], "components": [], "connections": []}))
+        paths.append(path)
+    return paths
+
+
+def test_all_designs_are_evaluated(tmp_path):
+    designs = write_designs(tmp_path, 5)
+    broker = LocalBroker(results_dir=tmp_path / "results")
+    results = dict(
+        evaluate_designs(designs, results_dir=broker.results_dir, send=broker.send, interval=0.01, cache=None)
+    )
+    broker.shutdown()
+    assert set(results.keys()) == set(designs)
+    assert all(r["status"] == "FAIL" for r in results.values())
+
+
+def test_max_in_flight_is_respected(tmp_path):
+    designs = write_designs(tmp_path, 6)
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def worker(design, study_params):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return {}
+
+    broker = LocalBroker(results_dir=tmp_path / "results", worker=worker, max_workers=6)
+    results = list(
+        evaluate_designs(
+            designs, max_in_flight=2, results_dir=broker.results_dir, send=broker.send, interval=0.01, cache=None
+        )
+    )
+    broker.shutdown()
+    assert len(results) == 6
+    assert running[1] <= 2
+
+
+def test_stuck_design_times_out_without_blocking_others(tmp_path):
+    designs = write_designs(tmp_path, 3)
+
+    def worker(design, study_params):
+        if design["name"] == "design_0":
+            time.sleep(1)
+        return {}
+
+    broker = LocalBroker(results_dir=tmp_path / "results", worker=worker)
+    batch = [BatchItem(designs[0], timeout=0.2), designs[1], designs[2]]
+    results = list(
+        evaluate_designs(batch, timeout=5, results_dir=broker.results_dir, send=broker.send, interval=0.01, cache=None)
+    )
+    broker.shutdown()
+    assert [path for path, _ in results][-1] == designs[0]
+    assert results[-1][1]["status"] == "TIMEOUT"
+
+
+def test_evaluated_designs_are_not_sent_again(tmp_path):
+    designs = write_designs(tmp_path, 2)
+    sent = []
+
+    def worker(design, study_params):
+        sent.append(design["name"])
+        return {"Results/test_1/fdmTB/flightDynFast.inp": "&aircraft_data\n/\n"}
+
+    broker = LocalBroker(results_dir=tmp_path / "results", worker=worker)
+    cache = EvaluationCache(tmp_path / "cache")
+    for _ in range(2):
+        results = list(
+            evaluate_designs(designs, results_dir=broker.results_dir, send=broker.send, interval=0.01, cache=cache)
+        )
+        assert all(r["status"] == "SUCCESS" for _, r in results)
+    broker.shutdown()
+    assert sorted(sent) == ["design_0", "design_1"]
+    assert cache.stats.hits == 2
+
+
+def test_max_in_flight_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        next(evaluate_designs(write_designs(tmp_path, 1), max_in_flight=0, results_dir=tmp_path, cache=None))
+
+
+def test_control_opt_reads_the_files_of_its_design(tmp_path, monkeypatch):
+    designs = write_designs(tmp_path, 4)
+    optimized = {}
+
+    class ControlOptimizer(object):
+        def __init__(self, library):
+            pass
+
+        def optimize(self, d_concrete, file_path=None, extract_folder=None):
+            time.sleep(0.02)
+            design = (extract_folder / "Results" / "test_1" / "fdmTB" / "flightDynFast.inp").read_text()
+            return {"total_score": design, "result": []}
+
+    """The optimizer itself needs an fdm binary and bayes_opt"""
+    optimizer_module = types.ModuleType("sym_cps.optimizers.control_opt.optimizer")
+    optimizer_module.ControlOptimizer = ControlOptimizer
+    monkeypatch.setitem(sys.modules, "sym_cps.optimizers.control_opt.optimizer", optimizer_module)
+    monkeypatch.setattr(batch_module, "fdm_extract_folder", tmp_path / "extract")
+
+    def worker(design, study_params):
+        return {"Results/test_1/fdmTB/flightDynFast.inp": design["name"]}
+
+    broker = LocalBroker(results_dir=tmp_path / "results", worker=worker, max_workers=4)
+    for path, results in evaluate_designs(
+        designs,
+        max_in_flight=4,
+        results_dir=broker.results_dir,
+        send=broker.send,
+        interval=0.01,
+        control_opt=True,
+        cache=None,
+    ):
+        optimized[path.stem] = results["total_score"]
+    broker.shutdown()
+    assert optimized == {path.stem: path.stem for path in designs}
@@ -0,0 +1,90 @@
+import os
+import time
+
+from sym_cps.evaluation.cache import EvaluationCache, design_swri_hash
+
+design = {
+    "name": "design_a",
+    "parameters": [{"parameter_name": "Hub_0_Length", "value": "10"}],
+    "components": [
+        {"component_instance": "Hub_0", "component_type": "Hub4", "component_choice": "0394od_para_hub_4"},
+        {
+            "component_instance": "Battery_0",
+            "component_type": "Battery",
+            "component_choice": "TurnigyGraphene6000mAh6S75C",
+        },
+    ],
+    "connections": [],
+}
+
+
+def test_hash_ignores_name_and_order():
+    reordered = dict(design, name="design_b", components=list(reversed(design["components"])))
+    assert design_swri_hash(design) == design_swri_hash(reordered)
+    assert design_swri_hash(design) != design_swri_hash(design, control_opt=True)
+    assert design_swri_hash(design, [{"Requested_Lateral_Speed": "10"}]) != design_swri_hash(design)
+
+
+def test_hash_keeps_the_order_of_the_study_params():
+    """The results of the n-th study parameters are stored as test_n"""
+    study_params = [{"Requested_Lateral_Speed": "10"}, {"Requested_Lateral_Speed": "20"}]
+    assert design_swri_hash(design, study_params) != design_swri_hash(design, list(reversed(study_params)))
+
+
+def test_cache_stores_artifacts_and_evicts(tmp_path):
+    results_folder = tmp_path / "extract" / "Results"
+    results_folder.mkdir(parents=True)
+    (results_folder / "out.txt").write_text("x" * 100)
+    results = {"status": "SUCCESS", "results_path": results_folder, "test_1": 10.0}
+
+    cache = EvaluationCache(tmp_path / "cache", max_size=300)
+    assert cache.get("key_1") is None
+    cache.put("key_1", results)
+    cached = cache.get("key_1")
+    assert cached["test_1"] == 10.0
+    assert (cached["results_path"] / "out.txt").is_file()
+    assert cache.put("key_2", {"status": "FAIL"}) is None
+
+    old = time.time() - 100
+    os.utime(cache.folder / "key_1", (old, old))
+    cache.put("key_2", results)
+    assert cache.get("key_1") is None
+    assert cache.get("key_2") is not None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (2, 2, 1)
+
+
+def test_put_scans_the_folder_only_when_it_is_full(tmp_path, monkeypatch):
+    results_folder = tmp_path / "extract" / "Results"
+    results_folder.mkdir(parents=True)
+    (results_folder / "out.txt").write_text("x" * 100)
+    results = {"status": "SUCCESS", "results_path": results_folder}
+    cache = EvaluationCache(tmp_path / "cache", max_size=1000)
+    scans = []
+    evict = cache.evict
+    monkeypatch.setattr(cache, "evict", lambda: scans.append(1) or evict())
+
+    cache.put("key_0", results)
+    assert len(scans) == 1
+    """Each entry takes more than 100 bytes: the folder is full at the 9th one at most"""
+    for i in range(1, 9):
+        cache.put(f"key_{i}", results)
+    assert 1 < len(scans) < 9
+    assert cache._total_size == sum(cache._size(entry) for entry in cache._entries()) <= 1000
+    assert cache.get("key_8") is not None and cache.get("key_0") is None
+
+
+def test_expired_entries_are_replaced(tmp_path):
+    results = {"status": "SUCCESS", "test_1": 10.0}
+    cache = EvaluationCache(tmp_path / "cache", max_size=None, max_age=60)
+    entry = cache.put("key_1", results)
+    assert entry is not None
+    """A fresh entry is kept, the second result is not stored"""
+    assert cache.put("key_1", dict(results, test_1=20.0)) is None
+    assert cache.stats.stores == 1 and cache.get("key_1")["test_1"] == 10.0
+
+    old = time.time() - 100
+    os.utime(entry / "results.json", (old, old))
+    assert cache.get("key_1") is None
+    assert cache.put("key_1", dict(results, test_1=30.0)) == entry
+    assert cache.stats.stores == 2 and cache.get("key_1")["test_1"] == 30.0
+    assert not any(e.name.startswith(".tmp_") for e in cache.folder.iterdir())
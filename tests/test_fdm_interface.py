@@ -0,0 +1,118 @@
+import os
+import sys
+
+import pytest
+
+from sym_cps.evaluation.fdm_cache import FDMRunCache
+from sym_cps.evaluation.fdm_interface import FDMArgs, FDMExecutionError, FDMInterface
+
+fdm_input = """&aircraft_data
+   aircraft%cname = 'stub'
+   control%i_flight_path = 1
+   control%requested_lateral_speed = 10
+   control%requested_vertical_speed = 0
+   control%Q_position = 1.0
+   control%Q_velocity = 1.0
+   control%Q_angular_velocity = 0.0
+   control%Q_angles = 1.0
+   control%R = 1.0
+/
+"""
+
+"""Stub fdm binary: the score is the value of R, it hangs when R is negative"""
+stub_fdm = f"""#!{sys.executable}
+import re, sys, time
+r = float(re.search(r"control%R = (\\S+)", sys.stdin.read()).group(1))
+if r < 0:
+    time.sleep(10)
+print(f"Final score is : {{r}}")
+"""
+
+
+@pytest.fixture
+def fdm_interface(tmp_path):
+    fdm_path = tmp_path / "stub_fdm"
+    fdm_path.write_text(stub_fdm)
+    fdm_path.chmod(0o755)
+    interface = FDMInterface(fdm_path=fdm_path, table_path=tmp_path, tmp_path=tmp_path / "scratch", timeout=2)
+    yield interface
+    interface.close()
+
+
+@pytest.fixture
+def fdm_data(fdm_interface, tmp_path):
+    input_path = tmp_path / "flightDyn.inp"
+    input_path.write_text(fdm_input)
+    return fdm_interface.read_fdm_input(input_path)
+
+
+def test_execute_many_in_isolated_scratch_dirs(fdm_interface, fdm_data):
+    r_values = [0.1 * i for i in range(8)]
+    fdm_args_list = [FDMArgs(fdm_data, R=r) for r in r_values]
+    results = fdm_interface.execute_many(fdm_data, fdm_args_list)
+    assert [result.get_metrics("Score") for result in results] == pytest.approx(r_values)
+    assert fdm_data.data["R"] == " 1.0"
+    assert os.listdir(fdm_interface._tmp_path) == []
+
+
+def test_timeout(fdm_interface, fdm_data):
+    with pytest.raises(FDMExecutionError):
+        fdm_interface.execute_from_data(fdm_data, FDMArgs(fdm_data, R=-1))
+    results = fdm_interface.execute_many(
+        fdm_data, [FDMArgs(fdm_data, R=-1), FDMArgs(fdm_data, R=2)], return_exceptions=True
+    )
+    assert isinstance(results[0], FDMExecutionError)
+    assert results[1].get_metrics("Score") == 2
+
+
+def test_cached_runs_are_not_repeated(tmp_path, fdm_data):
+    fdm_path = tmp_path / "stub_fdm"
+    fdm_path.write_text(stub_fdm)
+    fdm_path.chmod(0o755)
+    cache_path = tmp_path / "fdm_run_cache.jsonl"
+    interface = FDMInterface(fdm_path=fdm_path, tmp_path=tmp_path / "scratch", cache=FDMRunCache(cache_path))
+    fdm_args_list = [FDMArgs(fdm_data, R=0.5), FDMArgs(fdm_data, R=0.25)]
+    interface.execute_many(fdm_data, fdm_args_list)
+    interface.close()
+
+    """Same binary: every result comes from the persisted cache"""
+    cache = FDMRunCache(cache_path)
+    interface = FDMInterface(fdm_path=fdm_path, tmp_path=tmp_path / "scratch", cache=cache)
+    result = interface.execute_from_data(fdm_data, FDMArgs(fdm_data, R=0.5 + 1e-9))
+    assert result.get_metrics("Score") == 0.5
+    assert interface.execute_many(fdm_data, [fdm_args_list[1]])[0].get_metrics("Score") == 0.25
+    assert (cache.hits, cache.misses) == (2, 0)
+    interface.close()
+
+    """A rebuilt binary at the same path runs again"""
+    fdm_path.write_text(stub_fdm.replace("{r}", "{2 * r}"))
+    cache = FDMRunCache(cache_path)
+    interface = FDMInterface(fdm_path=fdm_path, tmp_path=tmp_path / "scratch", cache=cache)
+    assert interface.execute_from_data(fdm_data, fdm_args_list[0]).get_metrics("Score") == 1.0
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_control_optimizer_stops_the_pool(fdm_interface, fdm_data):
+    from sym_cps.optimizers.control_opt.control_opt_base import ControlOptimizer
+
+    class PoolOptimizer(ControlOptimizer):
+        """Scores path 9 with a batch of runs on the process pool of the fdm interface"""
+
+        def __init__(self):
+            self._fdm_interface = fdm_interface
+            self._fdm_data = fdm_data
+            self._paths = [9]
+            self._speed_spaces = {}
+
+        def _method(self, path=1, **kwargs):
+            fdm_args_list = [FDMArgs(fdm_data, R=r) for r in [0.1, 0.2]]
+            results = fdm_interface.execute_many(fdm_data, fdm_args_list)
+            assert fdm_interface._pool is not None
+            return {"Path": path, "best_score": results[1].get_metrics("Score"), "best_args": fdm_args_list[1]}
+
+    ret = PoolOptimizer().optimize()
+    assert ret["total_score"] == pytest.approx(0.2)
+    assert fdm_interface._pool is None
+    with PoolOptimizer() as opt:
+        opt._method(9)
+    assert fdm_interface._pool is None
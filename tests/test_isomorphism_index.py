@@ -0,0 +1,94 @@
+import random
+from itertools import product
+
+from sym_cps.benchmarks.isomorphism_index import (
+    pairwise_classes,
+    random_decompositions,
+    random_subgraph,
+    shuffled,
+)
+from sym_cps.isomorphisms.index import ClassMembership, IsomorphismIndex, invariants_key
+
+
+def test_isomorphic_graphs_share_the_invariants():
+    rng = random.Random(1)
+    for _ in range(20):
+        graph = random_subgraph(7, rng)
+        assert invariants_key(graph) == invariants_key(shuffled(graph, rng))
+
+
+def test_index_finds_the_classes_of_pairwise_vf2():
+    graphs = random_decompositions(200, 30, n_nodes=6, seed=2)
+    index = IsomorphismIndex()
+    classes = [index.add(graph) for graph in graphs]
+    assert len(index) == len(pairwise_classes(graphs))
+    assert sum(is_new for _, is_new in classes) == len(index)
+    """Adding a graph again gives its class without a new check"""
+    n_vf2 = index.n_vf2
+    assert index.add(graphs[0]) == (classes[0][0], False)
+    assert index.n_vf2 == n_vf2
+    assert all(graph in index for graph in graphs)
+
+
+def test_edge_labels_and_directions_separate_classes():
+    rng = random.Random(3)
+    graph = random_subgraph(5, rng)
+    relabelled = graph.copy()
+    relabelled.es[0]["label"] = "Other"
+    reversed_edge = graph.copy()
+    source, target = reversed_edge.es[0].tuple
+    label = reversed_edge.es[0]["label"]
+    reversed_edge.delete_edges([0])
+    reversed_edge.add_edge(target, source, label=label)
+    index = IsomorphismIndex()
+    index.add(graph)
+    assert relabelled not in index
+    assert reversed_edge not in index
+
+
+def product_classes(design_graphs: list[list]) -> tuple[set, set]:
+    """(class, design) pairs reported global and local by the combinations of one decomposition per design, as
+    find_isos compared them before ClassMembership"""
+    index = IsomorphismIndex()
+    global_pairs, local_pairs = set(), set()
+    for size in {g.vcount() for graphs in design_graphs for g in graphs}:
+        proposals = []
+        for n_design, graphs in enumerate(design_graphs):
+            representatives = {}
+            for g in graphs:
+                if g.vcount() == size:
+                    representatives.setdefault(index.add(g)[0], (n_design, g))
+            if representatives:
+                proposals.append(list(representatives.items()))
+        if len(proposals) <= 1:
+            continue
+        for combination in product(*proposals):
+            if len({frozenset(g.vs["label"]) for _, (_, g) in combination}) > 1:
+                continue
+            classes = [class_id for class_id, _ in combination]
+            isomorphic = {
+                (class_id, n_design) for class_id, (n_design, _) in combination if classes.count(class_id) > 1
+            }
+            (global_pairs if len(set(classes)) == 1 else local_pairs).update(isomorphic)
+    return global_pairs, local_pairs
+
+
+def test_class_membership_matches_the_combinations():
+    rng = random.Random(4)
+    for _ in range(10):
+        """Classes with the same node types, differing only by an edge label"""
+        bases = []
+        for _ in range(2):
+            graph = random_subgraph(rng.randint(2, 4), rng)
+            relabelled = graph.copy()
+            relabelled.es[0]["label"] = "Other"
+            bases += [graph, relabelled]
+        design_graphs = [[shuffled(rng.choice(bases), rng) for _ in range(rng.randint(1, 3))] for _ in range(5)]
+        membership = ClassMembership()
+        for n_design, graphs in enumerate(design_graphs):
+            for g in graphs:
+                membership.add(n_design, g)
+        global_pairs, local_pairs = product_classes(design_graphs)
+        """Class ids are the same in both indexes, they only depend on the invariants and the order of the graphs"""
+        assert {(c, d) for c, designs in membership.global_classes().items() for d in designs} == global_pairs
+        assert {(c, d) for c, designs in membership.local_classes().items() for d in designs} == local_pairs
@@ -0,0 +1,25 @@
+import json
+import os
+
+from sym_cps.representation.library import JsonIndex
+
+
+def test_json_index_is_rebuilt_when_the_file_changes(tmp_path):
+    file_path = tmp_path / "mapping.json"
+    file_path.write_text(json.dumps({"a": 1}))
+    builds = []
+
+    def build(content):
+        builds.append(content)
+        return {k: v * 10 for k, v in content.items()}
+
+    index = JsonIndex(file_path, build)
+    assert index.get() == {"a": 10}
+    assert index.get() == {"a": 10}
+    assert len(builds) == 1
+
+    file_path.write_text(json.dumps({"a": 2, "b": 3}))
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert index.get() == {"a": 20, "b": 30}
+    assert len(builds) == 2
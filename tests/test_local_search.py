@@ -0,0 +1,116 @@
+import time
+from multiprocessing import Value
+from types import SimpleNamespace
+
+import pytest
+
+from sym_cps.contract.tester.simplified_selector import ComponentAssignment, SimplifiedSelector, search_types
+
+
+class RankSelector(SimplifiedSelector):
+    """Each type has a best component, the score of the motor step is the sum of the ranks of the components"""
+
+    def __init__(self, library=None):
+        super().__init__()
+        """The worker processes build the selector without arguments, then set the library"""
+        self._c_library = library
+        self._table_dict = {}
+        self._property_store = SimpleNamespace()
+        self.calls = []
+
+    def select_single_iterate_assignment(self, assignment, comp_type, verbose=True, body_weight=0):
+        self.calls.append((comp_type, assignment.ids[comp_type]))
+        best = self._c_library.components_in_type[comp_type][-1]
+        components = assignment.with_component(best).components.values()
+        score = sum(c.properties["rank"].value for c in components if c.comp_type.id != "Motor")
+        return best, score + best.properties["rank"].value
+
+
+class SlowRankSelector(RankSelector):
+    def select_single_iterate_assignment(self, assignment, comp_type, verbose=True, body_weight=0):
+        time.sleep(0.1)
+        return super().select_single_iterate_assignment(assignment, comp_type, verbose, body_weight)
+
+
+@pytest.fixture
+def rank_library(fake_library):
+    for c_type in search_types + ["BatteryController"]:
+        for i in range(5):
+            fake_library.add(f"{c_type}_{i}", c_type, rank=i)
+    return fake_library
+
+
+def fake_design(selector: RankSelector):
+    components = [
+        SimpleNamespace(
+            c_type=SimpleNamespace(id=c_type), library_component=selector._c_library.components[f"{c_type}_0"]
+        )
+        for c_type in ["Propeller"] * 4 + ["Motor"] * 4 + ["Battery", "BatteryController"]
+    ]
+    return SimpleNamespace(components=components)
+
+
+def test_restart_stops_at_a_fixed_point(rank_library):
+    selector = RankSelector(rank_library)
+    assignment = ComponentAssignment.from_design(fake_design(selector))
+    assert assignment.counts == {"Propeller": 4, "Motor": 4, "Battery": 1, "BatteryController": 1}
+    result = selector.run_restart(0, assignment, n_rounds=3, body_weight=2.0, deadline=None, best_score=Value("d", 0))
+    """The first round finds the best components, the second one finds them again and stops the restart"""
+    assert result.n_rounds == 2
+    assert result.components == {"Propeller": "Propeller_4", "Motor": "Motor_4", "Battery": "Battery_4"}
+    """The motor step of the second round also sees the battery chosen at the end of the first round"""
+    assert result.score == 4 + 4 + 4
+    assert [c_type for c_type, _ in selector.calls] == search_types * 2
+
+
+def test_random_local_search_updates_the_design(rank_library):
+    selector = RankSelector(rank_library)
+    design = fake_design(selector)
+    motor, battery, propeller = selector.random_local_search(design, n_restarts=4, max_workers=1)
+    assert (motor.id, battery.id, propeller.id) == ("Motor_4", "Battery_4", "Propeller_4")
+    assert {c.library_component.id for c in design.components if c.c_type.id == "Motor"} == {"Motor_4"}
+    """Restarts after the first one start from random components, the design is not changed meanwhile"""
+    assert len({ids for c_type, ids in selector.calls if c_type == "Propeller"}) > 1
+
+    assert selector.random_local_search(fake_design(selector), n_restarts=4, max_workers=1, time_budget=0) == (
+        None,
+        None,
+        None,
+    )
+
+
+def test_restarts_behind_the_best_stop_near_the_deadline(rank_library):
+    selector = SlowRankSelector(rank_library)
+    assignment = ComponentAssignment.from_design(fake_design(selector))
+    """A round takes 0.3 s: the second one would end after the deadline"""
+    result = selector.run_restart(0, assignment, 3, 2.0, deadline=time.time() + 0.4, best_score=Value("d", 100))
+    assert result.n_rounds == 1
+    """The best restart goes on, it may still improve the best score"""
+    result = selector.run_restart(0, assignment, 3, 2.0, deadline=time.time() + 0.4, best_score=Value("d", 0))
+    assert result.n_rounds == 2
+
+
+def test_random_local_search_on_a_process_pool(rank_library):
+    selector = RankSelector(rank_library)
+    design = fake_design(selector)
+    motor, battery, propeller = selector.random_local_search(design, n_restarts=4, max_workers=2)
+    assert (motor.id, battery.id, propeller.id) == ("Motor_4", "Battery_4", "Propeller_4")
+    assert selector.local_search_result.score == 4 + 4 + 4
+    """The restarts ran in the workers"""
+    assert selector.calls == []
+
+
+class NoBatterySelector(RankSelector):
+    """No battery is ever selected: the restarts keep the battery they start from"""
+
+    def select_single_iterate_assignment(self, assignment, comp_type, verbose=True, body_weight=0):
+        best, score = super().select_single_iterate_assignment(assignment, comp_type, verbose, body_weight)
+        return (None, score) if comp_type == "Battery" else (best, score)
+
+
+def test_unselected_types_keep_the_scored_component(rank_library):
+    selector = NoBatterySelector(rank_library)
+    start = ComponentAssignment.from_design(fake_design(selector))
+    assignment = start.with_component(rank_library.components["Battery_3"])
+    result = selector.run_restart(0, assignment, n_rounds=3, body_weight=2.0, deadline=None, best_score=Value("d", 0))
+    assert result.components == {"Propeller": "Propeller_4", "Motor": "Motor_4", "Battery": "Battery_3"}
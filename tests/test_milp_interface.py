@@ -0,0 +1,83 @@
+import pytest
+import z3
+
+from sym_cps.benchmarks.milp_backend import linear_selection_system, margin, random_candidates, select
+from sym_cps.benchmarks.refinement_batch import motor_system
+from sym_cps.contract.tool.solver.milp_interface import MilpInterface
+from sym_cps.contract.tool.solver.z3_interface import Z3Interface
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_linear_selection_matches_z3(seed):
+    propellers, batteries = random_candidates(12, seed)
+    for candidates in [(propellers, batteries), (propellers[:2], batteries[:2])]:
+        results = {}
+        for solver_interface in [Z3Interface(), MilpInterface()]:
+            contract_system, sys_inst, connection = linear_selection_system(solver_interface, *candidates)
+            is_sat = contract_system.find_behavior(sys_inst, connection)
+            results[type(solver_interface)] = is_sat
+            if is_sat:
+                """The model found satisfies the system with the selected components"""
+                selection = contract_system.get_component_selection()
+                prop = selection[contract_system.get_instance("Propeller")]
+                batt = selection[contract_system.get_instance("Battery")]
+                weight = contract_system.get_metric_inst(sys_inst, "weight_sum")
+                assert weight == pytest.approx((prop["W_prop"] * 4 + batt["W_batt"] + 1) * 9.81)
+                assert contract_system.get_metric_inst(sys_inst, "thrust_sum") >= 1.5 * weight - 1e-6
+                assert batt["capacity"] >= 4
+        assert results[Z3Interface] == results[MilpInterface]
+        if isinstance(solver_interface, MilpInterface):
+            assert solver_interface.n_milp_checks == 1 and solver_interface.n_z3_checks == 0
+
+
+def test_select_reaches_the_optimum():
+    propellers, batteries = random_candidates(15, 3)
+    optimum, best = max(
+        (margin(p, b), {"Propeller": p["name"], "Battery": b["name"]})
+        for p in propellers
+        for b in batteries
+        if b["capacity"] >= 4
+    )
+    milp_solver = MilpInterface()
+    milp_selection, milp_objective = select(milp_solver, propellers, batteries, max_iter=50)
+    z3_selection, z3_objective = select(Z3Interface(), propellers, batteries, max_iter=50)
+    assert milp_objective == pytest.approx(optimum, abs=1e-4)
+    assert milp_selection == best
+    """The objective hint gives the optimum at the first check, the second one proves it"""
+    assert milp_solver.n_milp_checks == 2
+    assert z3_objective <= optimum + 1e-6
+
+
+def test_nonlinear_and_refinement_fall_back_to_z3():
+    x, y = z3.Reals("x y")
+    solver = MilpInterface()
+    solver.add_conjunction_clause(x * y == 2, x >= 1, y >= 1)
+    assert solver.check()
+    assert solver.get_model_for_var(x) * solver.get_model_for_var(y) == pytest.approx(2)
+    solver.push()
+    solver.add_conjunction_clause(z3.Not(z3.And(x <= 2, y <= 2)))
+    assert not solver.check()
+    solver.pop()
+    assert solver.n_milp_checks == 0 and solver.n_z3_checks == 2
+
+    solver = MilpInterface()
+    solver.add_conjunction_clause(x + 2 * y == 4, x - y / 2 >= 1, y > 0)
+    assert solver.check()
+    assert solver.get_model_for_var(x) + 2 * solver.get_model_for_var(y) == pytest.approx(4)
+    solver.add_conjunction_clause(x > 10)
+    assert not solver.check()
+    assert solver.n_milp_checks == 2
+
+
+def test_contract_systems_pick_milp_for_linear_systems():
+    propellers, batteries = random_candidates(12, 0)
+    contract_system, sys_inst, connection = linear_selection_system(None, propellers, batteries)
+    assert contract_system.find_behavior(sys_inst, connection)
+    solver = contract_system._solver
+    assert isinstance(solver, MilpInterface)
+    assert (solver.n_milp_checks, solver.n_z3_checks) == (1, 0)
+
+    contract_system, sys_inst, connection = motor_system({"name": "motor", "gain": 2.0, "mass": (0.5, 0.6)})
+    assert contract_system.check_refinement(sys_inst, connection)
+    solver = contract_system._solver
+    assert solver.n_milp_checks == 0 and solver.n_z3_checks > 0
@@ -0,0 +1,25 @@
+import json
+
+from sym_cps.contract.motor_propeller_analysis import append_pair_results, export_pair_results, read_pair_results
+
+
+def test_pair_results_resume(tmp_path):
+    file_path = tmp_path / "motor_propeller_pair.jsonl"
+    assert read_pair_results(file_path) == {}
+
+    ok = {"propeller": "p1", "motor": "m1", "status": "ok", "min_fly": {"I": 2.0, "V": 10.0}, "max_v": 20.0}
+    append_pair_results(file_path, [ok, {"propeller": "p1", "motor": "m2", "status": "incompatible"}])
+    """Interrupted while writing a record"""
+    with open(file_path, "a") as f:
+        f.write('{"propeller": "p2", "mot')
+    assert set(read_pair_results(file_path).keys()) == {("p1", "m1"), ("p1", "m2")}
+
+    append_pair_results(file_path, [{"propeller": "p2", "motor": "m1", "status": "incompatible (pre-filter)"}])
+    results = read_pair_results(file_path)
+    assert set(results.keys()) == {("p1", "m1"), ("p1", "m2"), ("p2", "m1")}
+    assert results[("p1", "m1")] == ok
+
+    exported = export_pair_results(file_path, tmp_path / "motor_propeller_pair.json")
+    assert exported == [["p1", "m1", {"min_fly": {"I": 2.0, "V": 10.0}, "max_v": 20.0}]]
+    with open(tmp_path / "motor_propeller_pair.json") as f:
+        assert json.load(f) == exported
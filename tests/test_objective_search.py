@@ -0,0 +1,56 @@
+import pytest
+import z3
+
+from sym_cps.contract.tool.objective_search import maximize_objective
+
+
+def problem():
+    x, y = z3.Reals("x y")
+    clauses = [x >= 0, y >= 0, x * x + y * y <= 100, y >= 1]
+    objective = x + y
+
+    def on_model(model):
+        values = [model.eval(v) for v in [x, y]]
+        values = [v.approx(20) if z3.is_algebraic_value(v) else v for v in values]
+        return sum(v.numerator_as_long() / v.denominator_as_long() for v in values)
+
+    return clauses, objective, on_model
+
+
+@pytest.mark.parametrize("mode", ["iterate", "bisection"])
+def test_trajectory_is_increasing(mode):
+    clauses, objective, on_model = problem()
+    trace = maximize_objective(clauses, objective, on_model, mode=mode, max_iter=30, tolerance=1e-4, min_step=0.1)
+    assert trace.n_checks <= 31
+    assert trace.trajectory == sorted(trace.trajectory)
+    assert trace.best <= 200**0.5 + 1e-6
+    assert all(step.time >= 0 for step in trace.steps)
+
+
+def test_bisection_converges_in_bounded_checks():
+    clauses, objective, on_model = problem()
+    trace = maximize_objective(clauses, objective, on_model, mode="bisection", max_iter=40, tolerance=1e-4)
+    assert trace.best == pytest.approx(200**0.5, rel=1e-3)
+    """Bracketing and bisection down to the tolerance, well within the budget"""
+    assert trace.n_checks < 40
+
+
+def test_unsat_and_unknown_mode():
+    x = z3.Real("x")
+    trace = maximize_objective([x > 1, x < 0], x, lambda model: 0.0, mode="bisection", max_iter=10)
+    assert trace.n_checks == 1
+    assert trace.best is None
+    with pytest.raises(Exception):
+        maximize_objective([x > 1], x, lambda model: 0.0, mode="gradient")
+
+
+def test_optimize_mode():
+    x, y = z3.Reals("x y")
+    trace = maximize_objective(
+        [x >= 0, y >= 0, x + 2 * y <= 10, x <= 4],
+        x + y,
+        lambda model: float(model.eval(x + y).as_fraction()),
+        mode="optimize",
+    )
+    assert trace.n_checks == 1
+    assert trace.best == pytest.approx(7)
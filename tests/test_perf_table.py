@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from sym_cps.benchmarks.perf_table import write_synthetic_table
+from sym_cps.representation.library.elements.perf_table import PerfTable
+
+
+@pytest.fixture
+def table(tmp_path):
+    table_path = write_synthetic_table(
+        tmp_path / "synthetic.dat", rpms=list(range(1000, 10001, 1000)), vs=list(np.linspace(0, 60, 13))
+    )
+    perf_table = PerfTable()
+    perf_table.parse_from_file(table_path)
+    return perf_table
+
+
+def test_table_arrays(table):
+    assert table.table.shape == (10, 13, 8)
+    assert table.rpm_range == (1000, 10000)
+    assert table.v_range == (0, 60)
+
+
+def test_get_values_matches_reference(table):
+    rng = np.random.default_rng(1)
+    rpms = rng.uniform(500, 10500, 200)
+    vs = rng.uniform(-5, 65, 200)
+    values = table.get_values(rpms, vs, "Ct")
+    reference = [table._get_value_reference(rpm, v, "Ct") for rpm, v in zip(rpms, vs)]
+    assert values == pytest.approx(reference)
+    assert table.get_value(rpms[0], vs[0], "Ct") == pytest.approx(reference[0])
+    assert table.get_values(rpms, vs, "missing") is None
+
+
+def test_get_range_matches_reference(table):
+    for rpm1, rpm2, v1, v2 in [(0, 20000, -1, 100), (2500, 6100, 5, 22), (1000, 1000, 0, 0), (9000, 12000, 50, 70)]:
+        assert table.get_range(rpm1, rpm2, v1, v2, "Cp") == pytest.approx(
+            table._get_range_reference(rpm1, rpm2, v1, v2, "Cp")
+        )
+
+
+def test_memory_mapped_store_matches_parsed_table(tmp_path, table, fake_library):
+    from sym_cps.representation.tools.parsers.parsing_prop_table import PerfTableStore, compile_prop_tables
+
+    fake_library.add("prop", "Propeller", Performance_File="synthetic.dat")
+
+    compile_prop_tables(fake_library, store_path=tmp_path / "store" / "prop_tables", tables_folder=tmp_path)
+    store = PerfTableStore(tmp_path / "store" / "prop_tables")
+    assert store.is_up_to_date(tmp_path)
+    stored = store.get("synthetic.dat")
+    assert isinstance(stored.table, np.memmap)
+    assert stored.bounds == table.bounds
+    rng = np.random.default_rng(2)
+    rpms = rng.uniform(500, 10500, 50)
+    vs = rng.uniform(-5, 65, 50)
+    assert stored.get_values(rpms, vs, "Ct") == pytest.approx(table.get_values(rpms, vs, "Ct"))
+    assert stored.get_range(2500, 6100, 5, 22, "Cp") == pytest.approx(table.get_range(2500, 6100, 5, 22, "Cp"))
+
+
+def test_store_is_outdated_when_a_table_changes(tmp_path, table, fake_library):
+    from sym_cps.representation.tools.parsers.parsing_prop_table import PerfTableStore, compile_prop_tables
+
+    fake_library.add("prop", "Propeller", Performance_File="synthetic.dat")
+
+    store_path = tmp_path / "store" / "prop_tables"
+    compile_prop_tables(fake_library, store_path=store_path, tables_folder=tmp_path)
+    """Edited in place: the folder mtime does not change"""
+    table_path = tmp_path / "synthetic.dat"
+    folder_mtime = (tmp_path / ".").stat().st_mtime_ns
+    with open(table_path, "a") as table_file:
+        table_file.write("\n")
+    assert (tmp_path / ".").stat().st_mtime_ns == folder_mtime
+    assert not PerfTableStore(store_path).is_up_to_date(tmp_path)
+    compile_prop_tables(fake_library, store_path=store_path, tables_folder=tmp_path)
+    assert PerfTableStore(store_path).is_up_to_date(tmp_path)
+    table_path.unlink()
+    assert not PerfTableStore(store_path).is_up_to_date(tmp_path)
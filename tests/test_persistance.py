@@ -0,0 +1,44 @@
+import copy
+import pickle
+
+from sym_cps.tools import persistance
+from sym_cps.tools.persistance import LazyObject, dump, load
+
+
+def test_lazy_object_loads_at_first_access():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"a": 1}
+
+    lazy = LazyObject(loader)
+    assert calls == [] and not lazy.is_loaded
+    assert lazy["a"] == 1 and "a" in lazy and len(lazy) == 1
+    assert isinstance(lazy, dict)
+    assert copy.deepcopy(lazy) == {"a": 1}
+    assert pickle.loads(pickle.dumps(lazy)) == {"a": 1}
+    assert calls == [1]
+
+
+def test_versioned_dump_and_legacy_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistance, "persistence_path", tmp_path)
+    dump({"x": [1, 2]}, "obj.dat")
+    assert (tmp_path / "obj.dat").read_bytes().startswith(b"SYMCPS")
+    assert load("obj.dat") == {"x": [1, 2]}
+    with open(tmp_path / "legacy.dat", "wb") as f:
+        pickle.dump({"y": 3}, f)
+    assert load("legacy.dat") == {"y": 3}
+
+
+def test_lazy_object_loads_none_once():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return None
+
+    lazy = LazyObject(loader)
+    assert not lazy.is_loaded
+    assert not lazy and lazy == None
+    assert lazy.is_loaded and calls == [1]
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from sym_cps.benchmarks.perf_table import write_synthetic_table
+from sym_cps.contract.prefilter import property_arrays
+from sym_cps.contract.property_store import PropertyStore
+from sym_cps.contract.tester.uav_contract import UAVContract
+from sym_cps.representation.library.elements.perf_table import PerfTable
+
+
+@pytest.fixture
+def library(tmp_path, fake_library):
+    rng = np.random.default_rng(2)
+    table_dict = {}
+    for i in range(5):
+        propeller = fake_library.add(
+            f"prop_{i}", "Propeller", DIAMETER=rng.uniform(100, 400), SHAFT_DIAMETER=5.0, WEIGHT=rng.uniform(0.01, 0.1)
+        )
+        table_path = write_synthetic_table(
+            tmp_path / f"prop_{i}.dat", rpms=list(range(1000, 20001, 1000)), vs=list(np.linspace(0, 60, 13))
+        )
+        table_dict[propeller] = PerfTable()
+        table_dict[propeller].parse_from_file(table_path)
+        fake_library.add(
+            f"motor_{i}",
+            "Motor",
+            INTERNAL_RESISTANCE=rng.uniform(10, 300),
+            KT=rng.uniform(0.005, 0.05),
+            KV=rng.uniform(300, 2000),
+            IO_IDLE_CURRENT_10V=rng.uniform(0.1, 1),
+            WEIGHT=rng.uniform(0.02, 0.3),
+            MAX_CURRENT=rng.uniform(5, 60),
+            MAX_POWER=rng.uniform(50, 1500),
+            SHAFT_DIAMETER=5.0,
+        )
+        fake_library.add(
+            f"battery_{i}",
+            "Battery",
+            CAPACITY=rng.uniform(1000, 10000),
+            WEIGHT=rng.uniform(0.1, 2),
+            VOLTAGE=rng.uniform(7, 25),
+            CONT_DISCHARGE_RATE=rng.uniform(20, 75),
+        )
+    return fake_library, table_dict
+
+
+@pytest.mark.parametrize("use_rpm_v_range", [False, True])
+def test_store_matches_property_dicts(library, use_rpm_v_range):
+    c_library, table_dict = library
+    store = PropertyStore(c_library=c_library, table_dict=table_dict)
+    reference = UAVContract(table_dict=table_dict, num_motor=4, num_battery=2)
+    stored = UAVContract(table_dict=table_dict, num_motor=4, num_battery=2, property_store=store)
+    for contract in [reference, stored]:
+        contract.set_rpm(rpm=5000)
+        contract.set_rpm_upper(rpm=18000)
+        contract.set_speed(v=1)
+        contract.set_speed_upper(v=25)
+
+    for comp_type in ["Propeller", "Motor", "Battery"]:
+        components = sorted(c_library.components_in_type[comp_type], key=lambda c: c.id)
+        for component in components:
+            expected = reference.hackathon_property_interface_fn_aggregated(component, use_rpm_v_range)
+            assert stored.hackathon_property_interface_fn_aggregated(component, use_rpm_v_range) == pytest.approx(
+                expected
+            )
+        expected = property_arrays(
+            [reference.hackathon_property_interface_fn_aggregated(c, use_rpm_v_range) for c in components]
+        )
+        arrays = stored.property_arrays_aggregated(components, use_rpm_v_range)
+        assert arrays.keys() == expected.keys()
+        for name, (lower, upper) in expected.items():
+            assert arrays[name][0] == pytest.approx(lower.ravel())
+            assert arrays[name][1] == pytest.approx(upper.ravel())
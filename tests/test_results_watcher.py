@@ -0,0 +1,76 @@
+import json
+import zipfile
+from concurrent.futures import Future
+
+import pytest
+
+from sym_cps.evaluation.watcher import ResultsWatcher
+
+
+def write_archive(folder, name, message_id):
+    with zipfile.ZipFile(folder / name, "w") as archive:
+        archive.writestr("metadata.json", json.dumps({"message_info": {"message_id": message_id}}))
+    return folder / name
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_future_resolved_when_archive_arrives(tmp_path, use_inotify):
+    watcher = ResultsWatcher(tmp_path, interval=0.01, use_inotify=use_inotify).start()
+    future = watcher.future("msg_1")
+    assert not future.done()
+    archive = write_archive(tmp_path, "process_design-1.zip", "msg_1")
+    assert future.result(timeout=5) == archive
+    assert watcher.lookup("msg_1") == archive
+    watcher.stop()
+
+
+def test_existing_archives_are_indexed_on_lookup(tmp_path):
+    archive = write_archive(tmp_path, "process_design-0.zip", "msg_0")
+    watcher = ResultsWatcher(tmp_path, interval=0.01, use_inotify=False).start()
+    assert watcher.lookup("msg_0") == archive
+    assert watcher.lookup("unknown") is None
+    watcher.stop()
+
+
+def test_wait_times_out(tmp_path):
+    watcher = ResultsWatcher(tmp_path, interval=0.01).start()
+    with pytest.raises(RuntimeError):
+        watcher.wait("never_sent", timeout=0.1)
+    watcher.stop()
+
+
+def test_cancelled_futures_are_dropped(tmp_path):
+    watcher = ResultsWatcher(tmp_path, interval=0.01, use_inotify=False).start()
+    cancelled, waiting = watcher.future("msg_1"), watcher.future("msg_1")
+    assert cancelled.cancel()
+    assert watcher._futures == {"msg_1": [waiting]}
+    assert waiting.cancel()
+    assert watcher._futures == {}
+    """A cancelled future is not resolved when the archive arrives"""
+    future = watcher.future("msg_2")
+    future.cancel()
+    archive = write_archive(tmp_path, "process_design-2.zip", "msg_2")
+    assert watcher.future("msg_2").result(timeout=5) == archive
+    watcher.stop()
+
+
+class CancelledAfterCheck(Future):
+    """Cancelled by another thread right after its state is checked"""
+
+    def done(self):
+        done = super().done()
+        self.cancel()
+        return done
+
+
+def test_cancel_during_resolution_does_not_stop_the_watcher(tmp_path):
+    watcher = ResultsWatcher(tmp_path, interval=0.01, use_inotify=False).start()
+    racing = CancelledAfterCheck()
+    with watcher._lock:
+        watcher._futures["msg_1"] = [racing]
+    write_archive(tmp_path, "process_design-1.zip", "msg_1")
+    racing.result(timeout=5)
+    archive = write_archive(tmp_path, "process_design-2.zip", "msg_2")
+    assert watcher.future("msg_2").result(timeout=5) == archive
+    assert watcher.running
+    watcher.stop()
@@ -0,0 +1,50 @@
+import random
+
+from sym_cps.benchmarks.rule_matching import example_rule_dict
+from sym_cps.grammar.rule_matcher import CompiledRules
+from sym_cps.grammar.rules import get_children, get_matching_rules, symbol_groups
+
+symbols = ["", "UNOCCUPIED", "EMPTY", "FUSELAGE", "ROTOR", "WING", "CONNECTOR", "HUB", "TUBE"]
+
+
+def random_states(n: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(n):
+        shape = (rng.randint(1, 4), rng.randint(1, 4), rng.randint(1, 3))
+        state = [[[rng.choice(symbols) for _ in range(shape[2])] for _ in range(shape[1])] for _ in range(shape[0])]
+        nodes = [(i, j, k) for i in range(shape[0]) for j in range(shape[1]) for k in range(shape[2])]
+        adjacency_dict = {node: rng.sample(nodes, rng.randint(1, 2)) for node in rng.sample(nodes, len(nodes) // 2)}
+        yield state, nodes, adjacency_dict
+
+
+def test_compiled_rules_match_the_string_rules():
+    rule_dict = example_rule_dict()
+    rules = CompiledRules(rule_dict, symbol_groups)
+    for state, nodes, _ in random_states(200, seed=0):
+        grid = rules.encode(state)
+        assert rules.decode(grid) == state
+        for node in nodes:
+            for remaining_rotors, remaining_wings in [(1, 1), (0, 1), (1, 0), (-1, 0)]:
+                expected = get_matching_rules(node, state, rule_dict, symbol_groups, remaining_rotors, remaining_wings)
+                matching = rules.matching_rules(node, grid, remaining_rotors, remaining_wings)
+                assert [rules.rules[r] for r in matching] == expected
+
+
+def test_compiled_children_match_the_string_children():
+    rules = CompiledRules(example_rule_dict(), symbol_groups)
+    for state, nodes, adjacency_dict in random_states(200, seed=1):
+        grid = rules.encode(state)
+        for node in nodes:
+            assert rules.get_children(node, grid, adjacency_dict) == get_children(node, state, adjacency_dict)
+        assert rules.get_children(list(nodes[0]), grid, {}) == get_children(list(nodes[0]), state, {})
+
+
+def test_many_rules():
+    """More rules than bits of a machine word"""
+    rule_dict = {f"r{i}": {"conditions": {"S": ["FREE"]}, "production": {"S": "ROTOR"}} for i in range(100)}
+    rule_dict["r100"] = {"conditions": {"S": ["UNOCCUPIED"], "T": ["BOUNDARY"]}, "production": {"S": "WING"}}
+    rules = CompiledRules(rule_dict, symbol_groups)
+    grid = rules.new_grid(2, 2, 2)
+    assert rules.matching_rules((0, 0, 1), grid, 1, 1) == list(range(101))
+    assert rules.matching_rules((0, 0, 0), grid, 1, 1) == list(range(100))
+    assert rules.matching_rules((0, 0, 1), grid, 0, 1) == [100]
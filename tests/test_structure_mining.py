@@ -0,0 +1,47 @@
+import random
+
+from sym_cps.isomorphisms.mining import (
+    append_mined_subsets,
+    merge_summary,
+    random_subsets,
+    read_mined_subsets,
+    subset_key,
+)
+
+node_types = ["Battery", "Hub", "Motor", "Propeller", "Sensor", "Tube"]
+
+
+def test_random_subsets_are_drawn_once_until_exhausted():
+    visited = {subset_key(["Motor", "Tube"])}
+    subsets = list(random_subsets(node_types, visited, random.Random(0), first=[["Tube", "Hub"], ["Tube", "Motor"]]))
+    assert subsets[0] == ["Hub", "Tube"]
+    keys = [subset_key(subset) for subset in subsets]
+    assert len(set(keys)) == len(keys) == 2 ** len(node_types) - 2
+    assert subset_key(["Motor", "Tube"]) not in keys
+    assert len(visited) == 2 ** len(node_types) - 1
+
+
+def test_checkpoint_resumes_and_merges_summaries(tmp_path):
+    file_path = tmp_path / "mined_subsets.jsonl"
+    structure = {"Motor-Propeller": [{"Motor": 1}]}
+    designs = ["PickAxe", "NewAxe_Cargo"]
+    append_mined_subsets(file_path, designs, [{"key": "Tube", "summary": {"LOCAL": structure, "GLOBAL": {}}}])
+    """Line of a run interrupted while writing"""
+    with open(file_path, "a") as f:
+        f.write('{"key": "Hub", "summ')
+    append_mined_subsets(file_path, designs, [{"key": "Hub-Tube", "summary": {"LOCAL": structure, "GLOBAL": {}}}])
+    """Subsets mined in other designs are not read"""
+    append_mined_subsets(file_path, ["PickAxe"], [{"key": "Motor", "summary": {"LOCAL": structure, "GLOBAL": {}}}])
+    mined = read_mined_subsets(file_path, reversed(designs))
+    assert list(mined.keys()) == ["Tube", "Hub-Tube"]
+    assert list(read_mined_subsets(file_path, ["PickAxe"]).keys()) == ["Motor"]
+
+    total_summary = {"LOCAL": {}, "GLOBAL": {}}
+    for key, summary in mined.items():
+        merge_summary(total_summary, key, summary)
+    assert total_summary["LOCAL"]["Motor-Propeller"] == {
+        "VARIATIONS": [{"Motor": 1}],
+        "KEYS": ["Tube", "Hub-Tube"],
+        "COUNT": 1,
+    }
+    assert total_summary["GLOBAL"] == {}
@@ -0,0 +1,17 @@
+from sym_cps.tools.topology_index import TopologyIndex
+
+
+def test_duplicates_are_rejected_and_flushed_in_batches(tmp_path):
+    file_path = tmp_path / "index.txt"
+    index = TopologyIndex(file_path, flush_every=3)
+    assert index.add("a") and index.add("b")
+    assert not index.add("a")
+    assert not file_path.exists()
+    assert index.add("c")
+    assert file_path.read_text().split() == ["a", "b", "c"]
+    index.add("d")
+    index.flush()
+
+    reloaded = TopologyIndex(file_path)
+    assert len(reloaded) == 4 and "d" in reloaded
+    assert not reloaded.add("b")